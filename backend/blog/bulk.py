@@ -0,0 +1,133 @@
+"""
+Запись постов пачками.
+
+Рубрики поста разрешаются одним запросом (недостающие создаются одной
+вставкой), изображения и вложения добавляются через bulk_create. Массовый
+импорт создаёт сразу много постов фиксированным числом запросов.
+"""
+import os
+import shutil
+import uuid
+
+from django.db import transaction
+from .models import Post, PostImage, PostAttachment, AttachmentUpload, Category
+from .search import POST_VECTOR
+from .search_cache import invalidate_search_results
+from .timeline import is_push_strategy, fan_out_posts
+from .uploads import AssembledFile
+
+BATCH_SIZE = 500
+
+
+def clean_category_names(names):
+    """Названия без пробелов по краям и повторов, в исходном порядке"""
+    return list(dict.fromkeys(name.strip() for name in names if name and name.strip()))
+
+
+def parse_category_names(text):
+    """Рубрики из строки через запятую"""
+    return clean_category_names((text or '').split(','))
+
+
+def build_attachment(post, content, name, content_type):
+    """Сохраняет файл в хранилище и возвращает ещё не записанное в БД вложение"""
+    attachment = PostAttachment(post=post, file_type=PostAttachment.detect_file_type(content_type or ''))
+    attachment.file.save(name, content, save=False)
+    # bulk_create не вызывает save(), поэтому имя и размер заполняются здесь
+    attachment.file_name = os.path.basename(attachment.file.name)
+    attachment.file_size = attachment.file.size
+    return attachment
+
+
+def stage_upload(upload):
+    """
+    Жёсткая ссылка на собранный файл загрузки: хранилище переносит её, а сам
+    файл остаётся на месте до коммита, чтобы после отката загрузку можно было
+    использовать повторно. Без поддержки ссылок файл копируется.
+    """
+    staged = f'{upload.path}.{uuid.uuid4().hex}'
+    try:
+        os.link(upload.path, staged)
+    except OSError:
+        shutil.copyfile(upload.path, staged)
+    return AssembledFile(staged, upload.file_name)
+
+
+def remove_files(paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def add_images(post, images, start_order=0):
+    PostImage.objects.bulk_create([
+        PostImage(post=post, image=image, order=start_order + order)
+        for order, image in enumerate(images)
+    ])
+
+
+def add_attachments(post, files=(), uploads=()):
+    """
+    Вложения из файлов запроса и из загрузок по частям (AttachmentUpload).
+    Собранные загрузки попадают в хранилище без копирования (stage_upload),
+    их исходные файлы удаляются только после коммита.
+    """
+    attachments = []
+    try:
+        for file in files:
+            attachments.append(build_attachment(post, file, file.name, file.content_type))
+        for upload in uploads:
+            attachments.append(
+                build_attachment(post, stage_upload(upload), upload.file_name, upload.content_type)
+            )
+        PostAttachment.objects.bulk_create(attachments)
+    except Exception:
+        for attachment in attachments:
+            attachment.file.delete(save=False)
+        raise
+    if uploads:
+        AttachmentUpload.objects.filter(id__in=[upload.id for upload in uploads]).delete()
+        paths = [upload.path for upload in uploads]
+        transaction.on_commit(lambda: remove_files(paths))
+
+
+def import_posts(author, items):
+    """
+    Создаёт посты автора пачкой в одной транзакции. items — словари с title,
+    content, is_published и categories (список названий).
+    Сигналы post_save не вызываются: поисковые векторы и ленты обновляются
+    здесь же, одним запросом на всю пачку; письма подписчикам об
+    импортированных постах не рассылаются.
+    """
+    item_names = [clean_category_names(item.get('categories', [])) for item in items]
+
+    with transaction.atomic():
+        categories = {
+            category.name: category
+            for category in Category.get_or_create_many(
+                name for names in item_names for name in names
+            )
+        }
+        posts = Post.objects.bulk_create([
+            Post(
+                author=author,
+                title=item['title'],
+                content=item['content'],
+                is_published=item.get('is_published', True),
+            )
+            for item in items
+        ], batch_size=BATCH_SIZE)
+
+        PostCategory = Post.categories.through
+        PostCategory.objects.bulk_create([
+            PostCategory(post_id=post.id, category_id=categories[name].id)
+            for post, names in zip(posts, item_names)
+            for name in names
+        ], batch_size=BATCH_SIZE)
+
+        Post.objects.filter(id__in=[post.id for post in posts]).update(search_vector=POST_VECTOR)
+        if is_push_strategy():
+            fan_out_posts(author.id, posts)
+
+    invalidate_search_results()
+    return posts
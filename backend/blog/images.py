@@ -0,0 +1,199 @@
+"""
+Обработка загруженных изображений вне запроса.
+
+Для изображений постов и аватаров строятся уменьшенные варианты
+(settings.POST_IMAGE_VARIANTS / AVATAR_VARIANTS) в JPEG и WebP без EXIF,
+оригинал пересохраняется без EXIF, размеры записываются в модель.
+Новые изображения получают статус pending, их разбирает команда
+process_images (сервис image_worker).
+"""
+import logging
+import os
+from collections import namedtuple
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+IMAGE_STATUS_CHOICES = [
+    ('pending', 'Ожидает обработки'),
+    ('ready', 'Готово'),
+    ('failed', 'Ошибка'),
+]
+
+VARIANTS_DIR = 'variants'
+FORMATS = (('jpeg', 'JPEG', 'jpg'), ('webp', 'WEBP', 'webp'))
+
+# Модель, поле с файлом, поле статуса, поле с вариантами, настройка размеров,
+# поля для ширины и высоты оригинала (None, если не нужны)
+ImageSource = namedtuple('ImageSource', [
+    'model', 'file_field', 'status_field', 'variants_field', 'sizes_setting', 'size_fields',
+])
+
+IMAGE_SOURCES = [
+    ImageSource('blog.PostImage', 'image', 'variants_status', 'variants',
+                'POST_IMAGE_VARIANTS', ('width', 'height')),
+    ImageSource('users.Profile', 'avatar', 'avatar_status', 'avatar_variants',
+                'AVATAR_VARIANTS', None),
+]
+
+
+def _encode(image, format_name):
+    buffer = BytesIO()
+    if format_name == 'JPEG' and image.mode != 'RGB':
+        image = _flatten(image)
+    image.save(buffer, format=format_name, quality=settings.IMAGE_VARIANT_QUALITY, optimize=True)
+    return ContentFile(buffer.getvalue())
+
+
+def _flatten(image):
+    """RGB без прозрачности: JPEG не поддерживает альфа-канал"""
+    image = image.convert('RGBA')
+    background = Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+
+def strip_exif(field_file, image, format_name, has_exif):
+    """
+    Сохраняет копию оригинала без EXIF (геометки, данные камеры), если они были.
+    Ориентация из EXIF к этому моменту уже применена к пикселям.
+    Возвращает имя копии в хранилище; старый файл удаляет process_instance
+    только после того, как новое имя записано в модель.
+    """
+    if not has_exif:
+        return field_file.name
+    saved = image if format_name != 'JPEG' else image.convert('RGB')
+    buffer = BytesIO()
+    saved.save(buffer, format=format_name, quality=95)
+    return field_file.storage.save(field_file.name, ContentFile(buffer.getvalue()))
+
+
+def build_variants(field_file, sizes):
+    """
+    Строит варианты изображения заданных размеров (вписываются в рамку,
+    пропорции сохраняются). Возвращает (имя оригинала, (ширина, высота),
+    {вариант: {'width', 'height', 'jpeg', 'webp'}}), где jpeg/webp — имена
+    файлов в хранилище. При ошибке уже записанные новые файлы удаляются,
+    исходный файл не трогается.
+    """
+    with field_file.open('rb') as f:
+        source = Image.open(f)
+        source.load()
+    format_name = source.format
+    has_exif = bool(source.getexif()) or 'exif' in source.info
+    image = ImageOps.exif_transpose(source)
+    image.info.pop('exif', None)
+
+    storage = field_file.storage
+    name = strip_exif(field_file, image, format_name or 'PNG', has_exif)
+    directory, filename = os.path.split(os.path.splitext(name)[0])
+
+    variants = {}
+    try:
+        for variant, size in sizes.items():
+            resized = image.copy()
+            resized.thumbnail(tuple(size), Image.LANCZOS)
+            entry = variants[variant] = {'width': resized.width, 'height': resized.height}
+            for key, format_name, extension in FORMATS:
+                path = os.path.join(directory, VARIANTS_DIR, f'{filename}_{variant}.{extension}')
+                entry[key] = storage.save(path, _encode(resized, format_name))
+    except Exception:
+        delete_variants(storage, variants)
+        if name != field_file.name:
+            storage.delete(name)
+        raise
+    return name, image.size, variants
+
+
+def delete_variants(storage, variants):
+    for entry in (variants or {}).values():
+        for key, _, _ in FORMATS:
+            if entry.get(key):
+                storage.delete(entry[key])
+
+
+def process_instance(source, instance):
+    """Обрабатывает изображение одного объекта и сохраняет результат"""
+    field_file = getattr(instance, source.file_field)
+    update_fields = [source.status_field, source.variants_field]
+    if not field_file:
+        setattr(instance, source.variants_field, {})
+        setattr(instance, source.status_field, 'ready')
+        instance.save(update_fields=update_fields)
+        return True
+
+    storage = field_file.storage
+    old_name = field_file.name
+    old_variants = getattr(instance, source.variants_field)
+    try:
+        name, size, variants = build_variants(field_file, getattr(settings, source.sizes_setting))
+    except Exception as e:
+        logger.error(f"❌ Can not process image {field_file.name}: {e}")
+        setattr(instance, source.status_field, 'failed')
+        instance.save(update_fields=[source.status_field])
+        return False
+
+    field_file.name = name
+    setattr(instance, source.variants_field, variants)
+    setattr(instance, source.status_field, 'ready')
+    update_fields.append(source.file_field)
+    if source.size_fields:
+        for field, value in zip(source.size_fields, size):
+            setattr(instance, field, value)
+        update_fields.extend(source.size_fields)
+    instance.save(update_fields=update_fields)
+
+    # Старые файлы больше не нужны только после фиксации новых имён в БД
+    def delete_old_files():
+        delete_variants(storage, old_variants)
+        if name != old_name:
+            storage.delete(old_name)
+    transaction.on_commit(delete_old_files)
+    return True
+
+
+def process_pending_images(batch_size=None):
+    """
+    Обрабатывает одну пачку ожидающих изображений каждого источника.
+    Строки заблокированы (SKIP LOCKED), поэтому несколько воркеров не возьмут
+    одно изображение дважды. Возвращает (обработано, ошибок).
+    """
+    batch_size = batch_size or settings.IMAGE_PROCESSING_BATCH_SIZE
+    processed = failed = 0
+    for source in IMAGE_SOURCES:
+        model = apps.get_model(source.model)
+        with transaction.atomic():
+            batch = model.objects.select_for_update(skip_locked=True).filter(
+                **{source.status_field: 'pending'}
+            ).order_by('pk')[:batch_size]
+            for instance in batch:
+                if process_instance(source, instance):
+                    processed += 1
+                else:
+                    failed += 1
+    return processed, failed
+
+
+def variant_urls(field_file, variants, request=None):
+    """URL вариантов для ответа API; пустой словарь, пока обработка не завершена"""
+    if not field_file or not variants:
+        return {}
+
+    def absolute(name):
+        url = field_file.storage.url(name)
+        return request.build_absolute_uri(url) if request else url
+
+    return {
+        variant: {
+            'width': entry['width'],
+            'height': entry['height'],
+            **{key: absolute(entry[key]) for key, _, _ in FORMATS},
+        }
+        for variant, entry in variants.items()
+    }
@@ -0,0 +1,143 @@
+"""
+Буфер лайков (write-behind) для популярных постов.
+
+При LIKE_BUFFER_ENABLED лайк не трогает строки Like и Post: в журнал
+PendingLike добавляется запись о действии пользователя. Команда flush_likes
+раз в несколько секунд схлопывает журнал до последнего состояния каждой
+пары (пост, пользователь), пачкой вставляет и удаляет Like и одним
+запросом меняет likes_count всех затронутых постов.
+
+Свой лайк пользователь видит сразу: is_liked учитывает его последнюю
+запись в журнале (PostQuerySet.with_viewer_like).
+"""
+from django.db import connection, transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+from .models import Post, Like, PendingLike
+
+POST_TABLE = connection.ops.quote_name(Post._meta.db_table)
+LIKE_TABLE = connection.ops.quote_name(Like._meta.db_table)
+PENDING_TABLE = connection.ops.quote_name(PendingLike._meta.db_table)
+
+# Ключ advisory-блокировки сброса: одновременно журнал переносит один процесс
+FLUSH_LOCK_KEY = 0x6C696B65
+
+# Записываем действие, только если оно меняет текущее состояние пользователя
+BUFFER_SQL = f'''
+    WITH target AS (
+        SELECT p.id, p.likes_count,
+               EXISTS (
+                   SELECT 1 FROM {LIKE_TABLE} l
+                   WHERE l.post_id = p.id AND l.user_id = %(user_id)s
+               ) AS committed,
+               (
+                   SELECT b.liked FROM {PENDING_TABLE} b
+                   WHERE b.post_id = p.id AND b.user_id = %(user_id)s
+                   ORDER BY b.id DESC LIMIT 1
+               ) AS pending
+        FROM {POST_TABLE} p
+        WHERE p.id = %(post_id)s AND p.is_published
+    ), buffered AS (
+        INSERT INTO {PENDING_TABLE} (post_id, user_id, liked, created_at)
+        SELECT id, %(user_id)s, %(liked)s, NOW() FROM target
+        WHERE COALESCE(pending, committed) IS DISTINCT FROM %(liked)s
+        RETURNING post_id
+    )
+    SELECT likes_count, committed, EXISTS (SELECT 1 FROM buffered) FROM target
+'''
+
+
+def buffer_like(post_id, user_id, liked):
+    """
+    Добавляет действие в журнал. Возвращает (изменилось ли состояние,
+    likes_count с учётом действия пользователя) или None, если поста нет.
+    Лайки других пользователей из журнала в счётчик попадут после сброса.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(BUFFER_SQL, {'post_id': post_id, 'user_id': user_id, 'liked': liked})
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    likes_count, committed, changed = row
+    return changed, likes_count - int(committed) + int(liked)
+
+
+def _values(rows):
+    placeholders = ', '.join(['(%s, %s)'] * len(rows))
+    params = [value for row in rows for value in row]
+    return placeholders, params
+
+
+def flush_like_buffer(batch_size):
+    """
+    Переносит пачку записей журнала в Like и likes_count. Возвращает число записей.
+
+    Действия одной пары должны применяться по порядку, а при нескольких
+    сбросах более позднее «снять лайк» могло бы попасть в пачку другого
+    процесса раньше «лайка». Поэтому сброс идёт под advisory-блокировкой
+    на время транзакции: пока её держит другой процесс, вызов ничего не делает.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_try_advisory_xact_lock(%s)', [FLUSH_LOCK_KEY])
+            if not cursor.fetchone()[0]:
+                return 0
+        events = list(
+            PendingLike.objects.order_by('id').values_list('id', 'post_id', 'user_id', 'liked')[:batch_size]
+        )
+        if not events:
+            return 0
+
+        # Итоговое состояние каждой пары — последнее действие
+        final = {}
+        for _, post_id, user_id, liked in events:
+            final[(post_id, user_id)] = liked
+        to_like = [pair for pair, liked in final.items() if liked]
+        to_unlike = [pair for pair, liked in final.items() if not liked]
+
+        deltas = {}
+        with connection.cursor() as cursor:
+            if to_like:
+                values, params = _values(to_like)
+                cursor.execute(
+                    f'INSERT INTO {LIKE_TABLE} (post_id, user_id, created_at) '
+                    f'SELECT v.post_id, v.user_id, NOW() FROM (VALUES {values}) AS v (post_id, user_id) '
+                    f'JOIN {POST_TABLE} p ON p.id = v.post_id '
+                    f'ON CONFLICT (post_id, user_id) DO NOTHING RETURNING post_id',
+                    params
+                )
+                for (post_id,) in cursor.fetchall():
+                    deltas[post_id] = deltas.get(post_id, 0) + 1
+            if to_unlike:
+                values, params = _values(to_unlike)
+                cursor.execute(
+                    f'DELETE FROM {LIKE_TABLE} l USING (VALUES {values}) AS v (post_id, user_id) '
+                    f'WHERE l.post_id = v.post_id AND l.user_id = v.user_id RETURNING l.post_id',
+                    params
+                )
+                for (post_id,) in cursor.fetchall():
+                    deltas[post_id] = deltas.get(post_id, 0) - 1
+
+            changed = [(post_id, delta) for post_id, delta in deltas.items() if delta]
+            if changed:
+                values, params = _values(changed)
+                cursor.execute(
+                    f'UPDATE {POST_TABLE} p SET likes_count = GREATEST(p.likes_count + v.delta, 0) '
+                    f'FROM (VALUES {values}) AS v (id, delta) WHERE p.id = v.id',
+                    params
+                )
+
+        PendingLike.objects.filter(id__in=[event[0] for event in events]).delete()
+    return len(events)
+
+
+def buffer_stats():
+    """Глубина буфера: записей, затронутых постов и возраст самой старой записи"""
+    stats = PendingLike.objects.aggregate(
+        pending=Count('id'),
+        posts=Count('post_id', distinct=True),
+        oldest=Min('created_at'),
+    )
+    oldest = stats.pop('oldest')
+    stats['oldest_age_seconds'] = round((timezone.now() - oldest).total_seconds(), 1) if oldest else 0
+    return stats
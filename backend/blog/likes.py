@@ -0,0 +1,78 @@
+"""
+Лайки одним SQL-выражением.
+
+Вставка (или удаление) лайка и изменение счётчика likes_count выполняются
+одним запросом с CTE, поэтому двойной клик не приводит к IntegrityError,
+а строка поста блокируется только на время этого выражения.
+Сигналы post_save/post_delete для Like здесь не срабатывают: счётчик
+обновляется тем же запросом. При LIKE_BUFFER_ENABLED действие вместо этого
+пишется в журнал (blog.like_buffer).
+"""
+from django.conf import settings
+from django.db import connection
+from .like_buffer import buffer_like
+from .models import Post, Like
+
+POST_TABLE = connection.ops.quote_name(Post._meta.db_table)
+LIKE_TABLE = connection.ops.quote_name(Like._meta.db_table)
+
+LIKE_SQL = f'''
+    WITH inserted AS (
+        INSERT INTO {LIKE_TABLE} (post_id, user_id, created_at)
+        SELECT id, %(user_id)s, NOW() FROM {POST_TABLE}
+        WHERE id = %(post_id)s AND is_published
+        ON CONFLICT (post_id, user_id) DO NOTHING
+        RETURNING post_id
+    )
+    UPDATE {POST_TABLE} SET likes_count = likes_count + 1
+    WHERE id IN (SELECT post_id FROM inserted)
+    RETURNING likes_count
+'''
+
+UNLIKE_SQL = f'''
+    WITH deleted AS (
+        DELETE FROM {LIKE_TABLE}
+        WHERE post_id = %(post_id)s AND user_id = %(user_id)s
+          AND EXISTS (SELECT 1 FROM {POST_TABLE} WHERE id = %(post_id)s AND is_published)
+        RETURNING post_id
+    )
+    UPDATE {POST_TABLE} SET likes_count = GREATEST(likes_count - 1, 0)
+    WHERE id IN (SELECT post_id FROM deleted)
+    RETURNING likes_count
+'''
+
+
+def _execute(sql, post_id, user_id):
+    """
+    Возвращает (изменилось ли что-то, likes_count) или None, если
+    опубликованного поста нет.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {'post_id': post_id, 'user_id': user_id})
+        row = cursor.fetchone()
+    if row is not None:
+        return True, row[0]
+
+    # Лайк уже был (или уже снят) — повторный запрос ничего не меняет
+    likes_count = Post.objects.filter(
+        id=post_id, is_published=True
+    ).values_list('likes_count', flat=True).first()
+    if likes_count is None:
+        return None
+    return False, likes_count
+
+
+def like_post(post_id, user_id):
+    return _execute(LIKE_SQL, post_id, user_id)
+
+
+def unlike_post(post_id, user_id):
+    return _execute(UNLIKE_SQL, post_id, user_id)
+
+
+def set_like(post_id, user_id, liked):
+    if settings.LIKE_BUFFER_ENABLED:
+        return buffer_like(post_id, user_id, liked)
+    if liked:
+        return like_post(post_id, user_id)
+    return unlike_post(post_id, user_id)
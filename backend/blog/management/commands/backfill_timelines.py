@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from blog.timeline import rebuild_timeline
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает материализованные ленты пользователей (FEED_STRATEGY=push)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', action='append', dest='usernames', default=[],
+            help='Пересобрать ленту только этого пользователя (можно указать несколько раз)'
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True, is_approved=True)
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+
+        total_users = 0
+        total_entries = 0
+        for user_id in users.values_list('id', flat=True).iterator():
+            total_entries += rebuild_timeline(user_id)
+            total_users += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Пересобрано лент: {total_users}, записей: {total_entries}'
+        ))
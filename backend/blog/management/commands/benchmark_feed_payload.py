@@ -0,0 +1,92 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from blog.models import Post, PostImage, Category
+from blog.serializers import PostListSerializer
+from users.models import User, Profile
+from users.serializers import UserSerializer
+
+
+class FullAuthorPostListSerializer(PostListSerializer):
+    """Прежний ответ ленты: автор с полным профилем и is_online"""
+    author = UserSerializer(read_only=True)
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает размер страницы ленты с полным и кратким автором поста'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts', type=int, default=10,
+            help='Количество постов на странице ленты'
+        )
+        parser.add_argument(
+            '--authors', type=int, default=5,
+            help='Количество разных авторов'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=200,
+            help='Сколько раз сериализовать страницу для замера времени'
+        )
+
+    def handle(self, *args, **options):
+        posts = self.build_feed(options['posts'], max(options['authors'], 1))
+
+        before_size, before_time = self.measure(FullAuthorPostListSerializer, posts, options['repeat'])
+        after_size, after_time = self.measure(PostListSerializer, posts, options['repeat'])
+
+        self.stdout.write(f'   Постов на странице: {len(posts)}')
+        self.stdout.write(f'   Полный автор:  {before_size} байт, {before_time * 1000:.2f} мс на страницу')
+        self.stdout.write(f'   Краткий автор: {after_size} байт, {after_time * 1000:.2f} мс на страницу')
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Ответ меньше на {100 * (1 - after_size / before_size):.0f}%, '
+            f'сериализация быстрее в x{before_time / after_time:.1f}'
+        ))
+
+    def measure(self, serializer_class, posts, repeat):
+        """Размер JSON страницы и среднее время сериализации с рендерингом"""
+        renderer = JSONRenderer()
+        started = time.perf_counter()
+        for _ in range(max(repeat, 1)):
+            content = renderer.render(serializer_class(posts, many=True).data)
+        return len(content), (time.perf_counter() - started) / max(repeat, 1)
+
+    def build_feed(self, count, author_count):
+        """
+        Страница ленты в памяти, без обращений к БД: авторы с заполненными
+        профилями, у постов по изображению и две рубрики (как после prefetch_related)
+        """
+        authors = []
+        for i in range(author_count):
+            author = User(
+                id=i + 1, username=f'author{i}', email=f'author{i}@example.com',
+                first_name='Иван', last_name='Петров', is_approved=True,
+            )
+            author.profile = Profile(
+                user=author, avatar=f'avatars/author{i}.jpg',
+                avatar_variants={
+                    name: {'width': size, 'height': size,
+                           'jpeg': f'avatars/variants/author{i}_{name}.jpg',
+                           'webp': f'avatars/variants/author{i}_{name}.webp'}
+                    for name, size in (('thumbnail', 64), ('medium', 256))
+                },
+                bio='О себе. ' * 60, location='Москва', website='https://example.com',
+                relationship_status='single', political_views='moderate',
+                religious_views='Не указано', interests='Музыка, кино, книги. ' * 20,
+                favorite_music='Группа. ' * 30, favorite_movies='Фильм. ' * 30,
+                favorite_books='Книга. ' * 30, life_position='Позиция. ' * 20,
+            )
+            authors.append(author)
+
+        categories = [Category(id=1, name='Новости', color='#3b5998'), Category(id=2, name='Музыка', color='#42b72a')]
+        posts = []
+        for i in range(count):
+            post = Post(
+                id=i + 1, author=authors[i % author_count], title=f'Пост {i}',
+                content='Текст поста. ' * 40, likes_count=i, comments_count=i,
+            )
+            image = PostImage(id=i + 1, post=post, image=f'posts/post{i}.jpg', width=1280, height=960)
+            post._prefetched_objects_cache = {'images': [image], 'categories': categories}
+            posts.append(post)
+        return posts
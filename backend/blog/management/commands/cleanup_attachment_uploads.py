@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from blog.models import AttachmentUpload
+
+
+class Command(BaseCommand):
+    help = 'Удаляет брошенные загрузки вложений по частям вместе с недокачанными файлами'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours', type=int, default=settings.ATTACHMENT_UPLOAD_EXPIRY_HOURS,
+            help='Через сколько часов без новых частей загрузка считается брошенной'
+        )
+
+    def handle(self, *args, **options):
+        threshold = timezone.now() - timedelta(hours=options['hours'])
+        stale = AttachmentUpload.objects.filter(updated_at__lt=threshold)
+
+        count = 0
+        for upload in stale.iterator():
+            upload.discard()
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f'🧹 Удалено брошенных загрузок: {count}'))
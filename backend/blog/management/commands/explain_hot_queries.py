@@ -0,0 +1,142 @@
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.conf import settings
+from blog.models import Post, Comment
+from blog.pagination import feed_segments
+from friends.models import FriendRequest, Friendship, InternalNotification
+from messages_app.models import Conversation, Message
+from users.models import User
+
+USERS = 300
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет БД тестовыми данными, выполняет EXPLAIN для горячих запросов '
+        'и завершается с ошибкой, если в плане есть Seq Scan. Все изменения откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=20000,
+            help='Сколько строк генерировать в каждой большой таблице'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Проверка планов запросов поддерживается только для PostgreSQL')
+
+        self.random = random.Random(42)
+        failures = []
+
+        with transaction.atomic():
+            self.stdout.write(f'🌱 Генерация данных: {options["rows"]} строк на таблицу...')
+            user, conversation, post, friend_ids = self.seed(options['rows'])
+            self.analyze()
+
+            for name, model, queryset in self.hot_queries(user, conversation, post, friend_ids):
+                plan = queryset.explain()
+                if f'Seq Scan on {model._meta.db_table}' in plan:
+                    failures.append(name)
+                    self.stdout.write(self.style.ERROR(f'❌ {name}: Seq Scan'))
+                    self.stdout.write(plan)
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'✅ {name}'))
+
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(f'Seq Scan в запросах: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS('✅ Все горячие запросы используют индексы'))
+
+    def feed_queries(self, user, friend_ids):
+        """
+        Запросы PostFeedView: тот же queryset, что у view, разбитый на части
+        «друзья»/«остальные» так же, как в FeedCursorPagination
+        """
+        queryset = Post.objects.filter(is_published=True).with_feed_data(user)
+        titles = {1: 'Лента: посты друзей', 0: 'Лента: остальные посты'}
+        return [
+            (titles[is_friend_post], Post, segment.values_list('id', flat=True)[:settings.REST_FRAMEWORK['PAGE_SIZE'] + 1])
+            for is_friend_post, segment in feed_segments(queryset, friend_ids)
+        ]
+
+    def hot_queries(self, user, conversation, post, friend_ids):
+        return [
+            ('Непрочитанные сообщения диалога', Message, Message.objects.filter(
+                conversation=conversation, is_read=False
+            ).exclude(sender=user)),
+            ('Непрочитанные внутренние уведомления', InternalNotification, InternalNotification.objects.filter(
+                user=user, is_read=False
+            )),
+            ('Входящие заявки в друзья', FriendRequest, FriendRequest.objects.filter(
+                to_user=user, status='pending'
+            )),
+            ('Исходящие заявки в друзья', FriendRequest, FriendRequest.objects.filter(
+                from_user=user, status='pending'
+            )),
+            *self.feed_queries(user, friend_ids),
+            ('Комментарии поста', Comment, Comment.objects.filter(post=post).order_by('created_at', 'id')[:20]),
+        ]
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            for model in (Message, InternalNotification, FriendRequest, Friendship, Post, Comment, Conversation):
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+
+    def seed(self, rows):
+        rnd = self.random
+        users = User.objects.bulk_create([
+            User(username=f'explain_{i}', email=f'explain_{i}@example.com', password='!', is_approved=True)
+            for i in range(USERS)
+        ])
+
+        per_user = max(min(rows // USERS, USERS - 1), 1)
+        pairs = [(users[i], users[(i + step) % USERS]) for i in range(USERS) for step in range(1, per_user + 1)]
+
+        conversations = Conversation.objects.bulk_create([
+            Conversation(participant1=a, participant2=b) for a, b in pairs if a.id < b.id
+        ])
+        messages = []
+        for _ in range(rows):
+            conv = rnd.choice(conversations)
+            messages.append(Message(
+                conversation=conv,
+                sender=rnd.choice([conv.participant1, conv.participant2]),
+                content='Сообщение',
+                is_read=rnd.random() < 0.95,
+            ))
+        Message.objects.bulk_create(messages, batch_size=5000)
+
+        InternalNotification.objects.bulk_create([
+            InternalNotification(
+                user=rnd.choice(users), from_user=rnd.choice(users),
+                notification_type='new_subscriber', is_read=rnd.random() < 0.95,
+            )
+            for _ in range(rows)
+        ], batch_size=5000)
+
+        FriendRequest.objects.bulk_create([
+            FriendRequest(from_user=a, to_user=b, status='pending' if rnd.random() < 0.1 else 'accepted')
+            for a, b in pairs
+        ], batch_size=5000)
+
+        posts = Post.objects.bulk_create([
+            Post(author=rnd.choice(users), title='Пост', content='Текст', is_published=rnd.random() < 0.95)
+            for _ in range(rows)
+        ], batch_size=5000)
+        Comment.objects.bulk_create([
+            Comment(post=rnd.choice(posts), author=rnd.choice(users), content='Комментарий')
+            for _ in range(rows)
+        ], batch_size=5000)
+
+        Friendship.objects.bulk_create([
+            Friendship(user1=a, user2=b) for a, b in pairs if a.id < b.id
+        ], batch_size=5000)
+
+        user = users[0]
+        conversation = next(c for c in conversations if c.participant1_id == user.id)
+        friend_ids = {b.id if a.id == user.id else a.id for a, b in pairs if user.id in (a.id, b.id)}
+        return user, conversation, rnd.choice(posts), friend_ids
@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from blog.like_buffer import flush_like_buffer, buffer_stats
+
+
+class Command(BaseCommand):
+    help = 'Переносит лайки из буфера в таблицу лайков и счётчики постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.LIKE_BUFFER_FLUSH_BATCH_SIZE,
+            help='Сколько записей буфера переносить за один проход'
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, сбрасывая буфер с заданным интервалом'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=2,
+            help='Пауза между сбросами (секунд)'
+        )
+        parser.add_argument(
+            '--stats', action='store_true',
+            help='Только показать глубину буфера'
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.write_stats()
+            return
+
+        batch_size = options['batch_size']
+
+        while True:
+            flushed = 0
+            while True:
+                count = flush_like_buffer(batch_size)
+                flushed += count
+                if count < batch_size:
+                    break
+            if flushed:
+                self.stdout.write(f'👍 Перенесено из буфера: {flushed}')
+                self.write_stats()
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def write_stats(self):
+        stats = buffer_stats()
+        self.stdout.write(
+            f'📊 В буфере: {stats["pending"]} записей по {stats["posts"]} постам, '
+            f'самая старая — {stats["oldest_age_seconds"]} с'
+        )
@@ -0,0 +1,42 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from blog.bulk import import_posts
+from blog.serializers import PostImportItemSerializer
+from users.models import User
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует посты из JSON-файла (список объектов с title, content, '
+        'is_published и categories) от имени указанного автора'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к JSON-файлу')
+        parser.add_argument('--author', required=True, help='Имя пользователя автора')
+
+    def handle(self, *args, **options):
+        try:
+            author = User.objects.get(username=options['author'])
+        except User.DoesNotExist:
+            raise CommandError(f'Пользователь {options["author"]} не найден')
+
+        with open(options['path'], encoding='utf-8') as f:
+            items = json.load(f)
+
+        serializer = PostImportItemSerializer(data=items, many=True)
+        if not serializer.is_valid():
+            errors = {i: e for i, e in enumerate(serializer.errors) if e}
+            raise CommandError(f'Ошибки в данных: {errors}')
+
+        validated = serializer.validated_data
+        total = 0
+        # Каждая пачка импортируется в своей транзакции
+        for start in range(0, len(validated), BATCH_SIZE):
+            total += len(import_posts(author, validated[start:start + BATCH_SIZE]))
+            self.stdout.write(f'📥 Импортировано {total} из {len(validated)}')
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Импортировано постов: {total}'))
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from blog.images import process_pending_images
+
+
+class Command(BaseCommand):
+    help = 'Строит уменьшенные варианты (JPEG и WebP) загруженных изображений постов и аватаров'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.IMAGE_PROCESSING_BATCH_SIZE,
+            help='Сколько изображений каждого типа обрабатывать за один проход'
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, опрашивая очередь'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Пауза между опросами пустой очереди (секунд)'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        while True:
+            processed, failed = process_pending_images(batch_size)
+            if processed or failed:
+                self.stdout.write(f'🖼️ Обработано изображений: {processed}, ошибок: {failed}')
+
+            if not options['loop']:
+                # Разовый запуск: разбираем очередь до конца
+                if not processed and not failed:
+                    break
+                continue
+
+            if not processed and not failed:
+                time.sleep(options['interval'])
@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from blog.models import Post, Like, Comment
+
+
+def count_subquery(model):
+    """Коррелированный COUNT(*) по строкам model для текущего поста"""
+    return Coalesce(Subquery(
+        model.objects.filter(post=OuterRef('pk'))
+        .order_by().values('post').annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает и исправляет денормализованные счётчики лайков и комментариев постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько постов проверять за одну транзакцию'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать расхождения, ничего не исправлять'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        checked = 0
+        drifted_total = 0
+        last_id = 0
+
+        while True:
+            batch_ids = list(
+                Post.objects.filter(pk__gt=last_id).order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch_ids:
+                break
+            last_id = batch_ids[-1]
+            checked += len(batch_ids)
+
+            with transaction.atomic():
+                drifted_ids = list(
+                    Post.objects.filter(pk__in=batch_ids).annotate(
+                        actual_likes=count_subquery(Like),
+                        actual_comments=count_subquery(Comment),
+                    ).filter(
+                        ~Q(likes_count=F('actual_likes')) | ~Q(comments_count=F('actual_comments'))
+                    ).values_list('pk', flat=True)
+                )
+
+                if drifted_ids and not dry_run:
+                    Post.objects.filter(pk__in=drifted_ids).update(
+                        likes_count=count_subquery(Like),
+                        comments_count=count_subquery(Comment),
+                    )
+
+            drifted_total += len(drifted_ids)
+
+        self.stdout.write(f'   Проверено постов: {checked}')
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f'🔍 Найдено расхождений: {drifted_total}'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✅ Исправлено счётчиков: {drifted_total}'))
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.1 on 2026-10-18 09:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_full_text_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postimage',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='высота'),
+        ),
+        migrations.AddField(
+            model_name='postimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, verbose_name='варианты'),
+        ),
+        migrations.AddField(
+            model_name='postimage',
+            name='variants_status',
+            field=models.CharField(choices=[('pending', 'Ожидает обработки'), ('ready', 'Готово'), ('failed', 'Ошибка')], default='pending', max_length=20, verbose_name='статус обработки'),
+        ),
+        migrations.AddField(
+            model_name='postimage',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='ширина'),
+        ),
+    ]
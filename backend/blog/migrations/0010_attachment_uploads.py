@@ -0,0 +1,35 @@
+# Generated by Django 5.0.1 on 2026-10-18 10:00
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_image_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttachmentUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('file_name', models.CharField(max_length=255, verbose_name='название файла')),
+                ('content_type', models.CharField(blank=True, max_length=100, verbose_name='тип содержимого')),
+                ('file_size', models.PositiveBigIntegerField(verbose_name='размер файла')),
+                ('offset', models.PositiveBigIntegerField(default=0, verbose_name='получено байт')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='дата обновления')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attachment_uploads', to=settings.AUTH_USER_MODEL, verbose_name='пользователь')),
+            ],
+            options={
+                'verbose_name': 'загрузка вложения',
+                'verbose_name_plural': 'загрузки вложений',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
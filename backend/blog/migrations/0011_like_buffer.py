@@ -0,0 +1,36 @@
+# Generated by Django 5.0.1 on 2026-10-18 10:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_attachment_uploads'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingLike',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('liked', models.BooleanField(verbose_name='лайк поставлен')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='дата создания')),
+                ('post', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='pending_likes', to='blog.post', verbose_name='пост')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_likes', to=settings.AUTH_USER_MODEL, verbose_name='пользователь')),
+            ],
+            options={
+                'verbose_name': 'лайк в буфере',
+                'verbose_name_plural': 'лайки в буфере',
+                'indexes': [models.Index(fields=['post', 'user', '-id'], name='blog_pending_like_idx')],
+            },
+        ),
+        # Журнал лайков живёт секунды, WAL для него не нужен
+        migrations.RunSQL(
+            'ALTER TABLE blog_pendinglike SET UNLOGGED',
+            'ALTER TABLE blog_pendinglike SET LOGGED',
+        ),
+    ]
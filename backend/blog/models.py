@@ -1,7 +1,18 @@
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import Exists, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from .images import IMAGE_STATUS_CHOICES
+from .search_cache import invalidate_search_results
 from django.utils.translation import gettext_lazy as _
-import random
+import hashlib
+import os
+import uuid
+import zlib
 
 
 class Category(models.Model):
@@ -24,26 +35,146 @@ class Category(models.Model):
         verbose_name = _('рубрика')
         verbose_name_plural = _('рубрики')
         ordering = ['name']
+        indexes = [
+            # Нечёткий поиск по названию (ILIKE и %), см. blog.search
+            GinIndex(fields=['name'], name='blog_category_name_trgm', opclasses=['gin_trgm_ops']),
+        ]
     
     def __str__(self):
         return self.name
     
+    @classmethod
+    def color_for_name(cls, name):
+        """Цвет определяется названием, поэтому не зависит от порядка создания рубрик"""
+        return cls.COLOR_CHOICES[zlib.crc32(name.encode()) % len(cls.COLOR_CHOICES)][0]
+    
     @classmethod
     def get_or_create_with_color(cls, name):
         """Получить или создать рубрику с автоматическим назначением цвета"""
-        if not name:
+        if not name or not name.strip():
             return None
+        return cls.get_or_create_many([name])[0]
+    
+    @classmethod
+    def get_or_create_many(cls, names):
+        """
+        Рубрики по списку названий в исходном порядке. Известные рубрики
+        берутся из общего кэша Django (см. get_cached_categories), остальные
+        выбираются или создаются одним INSERT ... ON CONFLICT, что безопасно
+        при параллельном создании одной и той же рубрики.
+        """
+        names = list(dict.fromkeys(name.strip() for name in names if name and name.strip()))
+        categories = get_cached_categories(names)
         
-        category, created = cls.objects.get_or_create(name=name.strip())
-        
-        if created:
-            # Если рубрика новая, назначаем цвет по кругу
-            existing_categories = cls.objects.exclude(id=category.id).count()
-            color_index = existing_categories % len(cls.COLOR_CHOICES)
-            category.color = cls.COLOR_CHOICES[color_index][0]
-            category.save()
+        missing = [name for name in names if name not in categories]
+        if missing:
+            created = cls._upsert(missing)
+            categories.update((category.name, category) for category in created)
+            # В кэш попадают только закоммиченные строки: иначе после отката
+            # транзакции в нём остался бы id несуществующей рубрики
+            transaction.on_commit(lambda: cache_categories(created))
         
-        return category
+        return [categories[name] for name in names]
+    
+    @classmethod
+    def _upsert(cls, names):
+        # DO UPDATE без изменений нужен, чтобы RETURNING вернул и уже существующие строки
+        table = connection.ops.quote_name(cls._meta.db_table)
+        values = ', '.join(['(%s, %s, %s)'] * len(names))
+        params = []
+        now = timezone.now()
+        for name in names:
+            params += [name, cls.color_for_name(name), now]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} (name, color, created_at) VALUES {values} '
+                f'ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name '
+                f'RETURNING id, name, color, created_at, xmax = 0',
+                params
+            )
+            rows = cursor.fetchall()
+        # xmax = 0 у только что вставленных строк; сигналы post_save здесь не срабатывают
+        if any(inserted for *_, inserted in rows):
+            invalidate_search_results()
+        return [cls.from_db(connection.alias, ['id', 'name', 'color', 'created_at'], row[:-1])
+                for row in rows]
+
+
+# Рубрики по названию лежат в общем кэше Django, чтобы удаление рубрики в одном
+# процессе сразу было видно остальным. Ключи содержат версию, которую сигналы
+# увеличивают при любом изменении рубрик; хранятся только значения полей,
+# поэтому каждый вызов получает собственные экземпляры модели.
+CATEGORY_VERSION_KEY = 'category:version'
+
+
+def get_category_version():
+    version = cache.get(CATEGORY_VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(CATEGORY_VERSION_KEY, version, None)
+    return version
+
+
+def invalidate_category_cache():
+    try:
+        cache.incr(CATEGORY_VERSION_KEY)
+    except ValueError:
+        cache.set(CATEGORY_VERSION_KEY, 2, None)
+
+
+def _category_cache_key(version, name):
+    return f'category:{version}:{hashlib.md5(name.encode()).hexdigest()}'
+
+
+def get_cached_categories(names):
+    """Закэшированные рубрики {название: новый экземпляр Category}"""
+    if not names:
+        return {}
+    version = get_category_version()
+    keys = {_category_cache_key(version, name): name for name in names}
+    return {
+        keys[key]: Category.from_db(connection.alias, ['id', 'name', 'color', 'created_at'], values)
+        for key, values in cache.get_many(keys).items()
+    }
+
+
+def cache_categories(categories):
+    version = get_category_version()
+    cache.set_many({
+        _category_cache_key(version, c.name): (c.id, c.name, c.color, c.created_at)
+        for c in categories
+    }, settings.CATEGORY_CACHE_TIMEOUT)
+
+
+class PostQuerySet(models.QuerySet):
+    def with_feed_data(self, user=None):
+        """
+        Подгружает всё, что нужно PostListSerializer, одним запросом на страницу:
+        автор с профилем и флаг is_liked для user.
+        Счётчики лайков и комментариев хранятся в самом посте.
+        """
+        queryset = self.select_related('author', 'author__profile').prefetch_related(
+            'images', 'categories'
+        )
+
+        if user is not None and user.is_authenticated:
+            queryset = queryset.with_viewer_like(user)
+
+        return queryset
+
+    def with_viewer_like(self, user):
+        """
+        Аннотация is_liked_by_user. При включённом буфере лайков (blog.like_buffer)
+        учитывается последнее ещё не сброшенное действие пользователя,
+        чтобы он сразу видел свой лайк.
+        """
+        liked = Exists(Like.objects.filter(post=OuterRef('pk'), user=user))
+        if settings.LIKE_BUFFER_ENABLED:
+            pending = PendingLike.objects.filter(
+                post=OuterRef('pk'), user=user
+            ).order_by('-id').values('liked')[:1]
+            liked = Coalesce(Subquery(pending), liked)
+        return self.annotate(is_liked_by_user=liked)
 
 
 class Post(models.Model):
@@ -64,22 +195,44 @@ class Post(models.Model):
     created_at = models.DateTimeField(_('дата создания'), auto_now_add=True)
     updated_at = models.DateTimeField(_('дата обновления'), auto_now=True)
     is_published = models.BooleanField(_('опубликовано'), default=True)
+    # Денормализованные счётчики, обновляются сигналами Like/Comment через F()
+    likes_count = models.PositiveIntegerField(_('количество лайков'), default=0, editable=False)
+    comments_count = models.PositiveIntegerField(_('количество комментариев'), default=0, editable=False)
+    # Поисковый вектор заголовка и текста, обновляется сигналом (blog.search)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    COUNTER_FIELDS = ('likes_count', 'comments_count')
+    # Поля, которые обычный save() не перезаписывает
+    DERIVED_FIELDS = COUNTER_FIELDS + ('search_vector',)
+
+    objects = PostQuerySet.as_manager()
     
     class Meta:
         verbose_name = _('пост')
         verbose_name_plural = _('посты')
         ordering = ['-created_at']
+        indexes = [
+            # Лента опубликованных постов: ORDER BY created_at DESC, id DESC без сортировки
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(is_published=True),
+                name='blog_post_feed_idx',
+            ),
+            GinIndex(fields=['search_vector'], name='blog_post_search_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
-    @property
-    def likes_count(self):
-        return self.likes.count()
-
-    @property
-    def comments_count(self):
-        return self.comments.count()
+    def save(self, *args, **kwargs):
+        # Счётчики меняются только через F(), поисковый вектор — сигналом;
+        # обычный save() не должен перезаписывать их устаревшими значениями из памяти
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DERIVED_FIELDS
+            ]
+        super().save(*args, **kwargs)
 
 
 class PostImage(models.Model):
@@ -93,6 +246,16 @@ class PostImage(models.Model):
         _('изображение'),
         upload_to='posts/images/%Y/%m/%d/'
     )
+    width = models.PositiveIntegerField(_('ширина'), blank=True, null=True)
+    height = models.PositiveIntegerField(_('высота'), blank=True, null=True)
+    # Уменьшенные копии в JPEG и WebP, строятся командой process_images (см. blog.images)
+    variants = models.JSONField(_('варианты'), default=dict, blank=True)
+    variants_status = models.CharField(
+        _('статус обработки'),
+        max_length=20,
+        choices=IMAGE_STATUS_CHOICES,
+        default='pending'
+    )
     caption = models.CharField(
         _('подпись'),
         max_length=200,
@@ -110,6 +273,13 @@ class PostImage(models.Model):
         return f'Изображение для {self.post.title}'
 
 
+DOCUMENT_CONTENT_TYPES = [
+    'application/pdf',
+    'application/msword',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+]
+
+
 class PostAttachment(models.Model):
     FILE_TYPES = [
         ('audio', _('Аудио')),
@@ -151,6 +321,57 @@ class PostAttachment(models.Model):
             self.file_size = self.file.size
         super().save(*args, **kwargs)
 
+    @staticmethod
+    def detect_file_type(content_type):
+        if content_type.startswith('audio/'):
+            return 'audio'
+        if content_type in DOCUMENT_CONTENT_TYPES:
+            return 'document'
+        return 'other'
+
+
+class AttachmentUpload(models.Model):
+    """
+    Вложение, загружаемое по частям (см. blog.uploads).
+    Части дописываются в файл во временном каталоге, offset — сколько байт
+    уже получено. Готовая загрузка привязывается к посту при его сохранении.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='attachment_uploads',
+        verbose_name=_('пользователь')
+    )
+    file_name = models.CharField(_('название файла'), max_length=255)
+    content_type = models.CharField(_('тип содержимого'), max_length=100, blank=True)
+    file_size = models.PositiveBigIntegerField(_('размер файла'))
+    offset = models.PositiveBigIntegerField(_('получено байт'), default=0)
+    created_at = models.DateTimeField(_('дата создания'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('дата обновления'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('загрузка вложения')
+        verbose_name_plural = _('загрузки вложений')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.file_name} ({self.offset}/{self.file_size})'
+
+    @property
+    def path(self):
+        return os.path.join(settings.ATTACHMENT_UPLOAD_TEMP_DIR, f'{self.id}.part')
+
+    @property
+    def is_complete(self):
+        return self.offset == self.file_size
+
+    def discard(self):
+        """Удаляет загрузку вместе с недокачанным файлом"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.delete()
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -168,11 +389,17 @@ class Comment(models.Model):
     content = models.TextField(_('содержание'))
     created_at = models.DateTimeField(_('дата создания'), auto_now_add=True)
     updated_at = models.DateTimeField(_('дата обновления'), auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         verbose_name = _('комментарий')
         verbose_name_plural = _('комментарии')
-        ordering = ['created_at']
+        ordering = ['created_at', 'id']
+        indexes = [
+            # Ключ курсорной пагинации комментариев поста (blog.pagination)
+            models.Index(fields=['post', 'created_at', 'id'], name='blog_comment_post_idx'),
+            GinIndex(fields=['search_vector'], name='blog_comment_search_idx'),
+        ]
 
     def __str__(self):
         return f'Комментарий от {self.author.username} к {self.post.title}'
@@ -200,4 +427,71 @@ class Like(models.Model):
         ordering = ['-created_at']
 
     def __str__(self):
-        return f'{self.user.username} лайкнул {self.post.title}'
\ No newline at end of file
+        return f'{self.user.username} лайкнул {self.post.title}'
+
+
+class PendingLike(models.Model):
+    """
+    Лайк или снятие лайка в буфере (см. blog.like_buffer): строки только
+    добавляются, а в Like и likes_count их пачками переносит команда flush_likes.
+    Таблица UNLOGGED — при аварийной остановке БД теряются несколько секунд лайков.
+    """
+    id = models.BigAutoField(primary_key=True)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='pending_likes',
+        db_index=False,
+        verbose_name=_('пост')
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='pending_likes',
+        verbose_name=_('пользователь')
+    )
+    liked = models.BooleanField(_('лайк поставлен'))
+    created_at = models.DateTimeField(_('дата создания'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('лайк в буфере')
+        verbose_name_plural = _('лайки в буфере')
+        indexes = [
+            # Последнее действие пользователя с постом (read-your-writes)
+            models.Index(fields=['post', 'user', '-id'], name='blog_pending_like_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} {"+" if self.liked else "-"} {self.post_id}'
+
+
+class TimelineEntry(models.Model):
+    """
+    Запись в материализованной ленте пользователя (стратегия FEED_STRATEGY='push').
+    Создаётся при публикации поста для друзей и подписчиков автора.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name=_('пользователь')
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name=_('пост')
+    )
+    post_created_at = models.DateTimeField(_('дата создания поста'))
+
+    class Meta:
+        verbose_name = _('запись ленты')
+        verbose_name_plural = _('записи ленты')
+        unique_together = ['user', 'post']
+        ordering = ['-post_created_at']
+        indexes = [
+            models.Index(fields=['user', '-post_created_at'], name='blog_timeline_user_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user.username}: {self.post.title}'
@@ -0,0 +1,210 @@
+import base64
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+
+def encode_position(values):
+    """Непрозрачный для клиента курсор из значений ключа сортировки"""
+    payload = json.dumps(values)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_position(encoded):
+    """Значения ключа из курсора; ValueError/TypeError, если курсор испорчен"""
+    padded = encoded + '=' * (-len(encoded) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded))
+
+
+def feed_segments(queryset, friend_ids):
+    """
+    Части ленты в порядке показа: (is_friend_post, queryset). Каждая часть
+    отсортирована по '-created_at', '-id', поэтому читается по индексу
+    blog_post_feed_idx без сортировки всей таблицы по вычисляемому флагу.
+    """
+    ordering = ('-created_at', '-id')
+    if not friend_ids:
+        return [(0, queryset.order_by(*ordering))]
+    friend_ids = list(friend_ids)
+    return [
+        (1, queryset.filter(author_id__in=friend_ids).order_by(*ordering)),
+        (0, queryset.exclude(author_id__in=friend_ids).order_by(*ordering)),
+    ]
+
+
+class FeedCursorPagination(BasePagination):
+    """
+    Keyset-пагинация ленты по ключу (is_friend_post, created_at, id):
+    сначала посты друзей, затем остальные.
+    Курсор непрозрачен для клиента, общее количество постов не считается,
+    поэтому любая страница стоит столько же, сколько первая.
+    Посты друзей и остальные выбираются отдельными запросами по индексу
+    (см. feed_segments); id друзей берутся из view.get_feed_friend_ids().
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        position = self.decode_cursor(request)
+        friend_ids = view.get_feed_friend_ids() if view is not None else ()
+
+        # Берём на один пост больше, чтобы узнать, есть ли следующая страница.
+        # Сначала только id по индексу, затем одна выборка страницы с данными
+        limit = self.page_size + 1
+        keys = []
+        for is_friend_post, segment in feed_segments(queryset, friend_ids):
+            if position is not None:
+                cursor_flag, created_at, post_id = position
+                if is_friend_post > cursor_flag:
+                    continue
+                if is_friend_post == cursor_flag:
+                    segment = segment.filter(
+                        Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=post_id)
+                    )
+            ids = list(segment.values_list('id', flat=True)[:limit - len(keys)])
+            keys.extend((post_id, is_friend_post) for post_id in ids)
+            if len(keys) >= limit:
+                break
+
+        self.has_next = len(keys) > self.page_size
+        keys = keys[:self.page_size]
+        posts = {post.id: post for post in queryset.filter(id__in=[post_id for post_id, _ in keys])}
+        self.page = []
+        for post_id, is_friend_post in keys:
+            post = posts[post_id]
+            post.is_friend_post = is_friend_post
+            self.page.append(post)
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        cursor = self.encode_cursor((last.is_friend_post, last.created_at, last.id))
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def encode_cursor(self, position):
+        is_friend_post, created_at, post_id = position
+        return encode_position([is_friend_post, created_at.isoformat(), post_id])
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            is_friend_post, created_at, post_id = decode_position(encoded)
+            return int(is_friend_post), datetime.fromisoformat(created_at), int(post_id)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+def encode_comment_cursor(comment):
+    return encode_position([comment.created_at.isoformat(), comment.id])
+
+
+class CommentCursorPagination(BasePagination):
+    """
+    Keyset-пагинация комментариев по ключу (created_at, id).
+    after=<курсор> — следующие комментарии после позиции, before=<курсор> —
+    предыдущие перед ней; страница всегда отдаётся в хронологическом порядке.
+    Общее количество не считается: оно есть в comments_count поста.
+    """
+    after_query_param = 'after'
+    before_query_param = 'before'
+    invalid_cursor_message = 'Неверный курсор'
+
+    def get_page_size(self):
+        return settings.COMMENTS_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size()
+        after = self.decode_cursor(request, self.after_query_param)
+        before = self.decode_cursor(request, self.before_query_param)
+
+        if before is not None:
+            created_at, comment_id = before
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=comment_id)
+            ).order_by('-created_at', '-id')
+            results = list(queryset[:page_size + 1])
+            self.has_previous = len(results) > page_size
+            self.has_next = True
+            self.page = results[:page_size][::-1]
+        else:
+            if after is not None:
+                created_at, comment_id = after
+                queryset = queryset.filter(
+                    Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=comment_id)
+                )
+            results = list(queryset.order_by('created_at', 'id')[:page_size + 1])
+            self.has_next = len(results) > page_size
+            self.has_previous = after is not None
+            self.page = results[:page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.before_query_param)
+        return replace_query_param(url, self.after_query_param, encode_comment_cursor(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.after_query_param)
+        return replace_query_param(url, self.before_query_param, encode_comment_cursor(self.page[0]))
+
+    def decode_cursor(self, request, param):
+        encoded = request.query_params.get(param)
+        if not encoded:
+            return None
+
+        try:
+            created_at, comment_id = decode_position(encoded)
+            return datetime.fromisoformat(created_at), int(comment_id)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
@@ -0,0 +1,122 @@
+"""
+Кэш ответа PostDetailView.
+
+Кэшируется часть ответа, не зависящая от читателя: пост с автором,
+изображениями, вложениями, рубриками и комментариями. Счётчики и is_liked
+подставляются при ответе из одного запроса к строке поста. Тем же запросом
+запись проверяется на свежесть: updated_at и comments_count поста должны
+совпасть с сохранёнными вместе с записью, поэтому правка поста и новые
+комментарии видны сразу даже из другого процесса.
+
+Авторы поста и встроенных комментариев проверяются по версиям: запись
+хранит версию каждого пользователя на момент сериализации, а изменение
+пользователя или профиля заменяет только его версию, без поиска всех его
+постов и комментариев.
+
+Остальное (изображения, вложения, рубрики) сбрасывается сигналами
+(см. blog.signals) после коммита; POST_DETAIL_CACHE_TIMEOUT — страховка
+для изменений, сделанных в других процессах при локальном кэше.
+
+URL в записи относительные: абсолютные строятся для каждого запроса
+(build_absolute_urls), иначе все читатели получали бы хост первого.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .images import FORMATS
+
+DETAIL_KEY = 'post_detail:{}'
+USER_KEY = 'post_detail:user:{}'
+HITS_KEY = 'post_detail:hits'
+MISSES_KEY = 'post_detail:misses'
+
+
+def make_stamp(state):
+    return (state['updated_at'].isoformat(), state['comments_count'])
+
+
+def get_cached_detail(post_id, stamp):
+    """Закэшированный ответ или None, если записи нет или она устарела"""
+    entry = cache.get(DETAIL_KEY.format(post_id))
+    hit = (
+        entry is not None and tuple(entry['stamp']) == stamp
+        and cache.get_many(entry['users'].keys()) == entry['users']
+    )
+    _count(HITS_KEY if hit else MISSES_KEY)
+    return entry['data'] if hit else None
+
+
+def set_cached_detail(post_id, stamp, data):
+    user_ids = {data['author']['id'], *(comment['author']['id'] for comment in data['comments'])}
+    keys = [USER_KEY.format(user_id) for user_id in user_ids]
+    for key in set(keys) - cache.get_many(keys).keys():
+        cache.add(key, uuid.uuid4().hex, None)
+    cache.set(
+        DETAIL_KEY.format(post_id),
+        {'stamp': stamp, 'users': cache.get_many(keys), 'data': data},
+        settings.POST_DETAIL_CACHE_TIMEOUT
+    )
+
+
+def invalidate_post_details(post_ids):
+    keys = [DETAIL_KEY.format(post_id) for post_id in set(post_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_user_details(user_id):
+    """Сбрасывает записи всех постов, где встроен пользователь"""
+    transaction.on_commit(lambda: cache.set(USER_KEY.format(user_id), uuid.uuid4().hex, None))
+
+
+def build_absolute_urls(data, request):
+    """Копия записи с абсолютными URL файлов и ссылки на комментарии"""
+    def absolute(url):
+        return request.build_absolute_uri(url) if url else url
+
+    def user(entry):
+        return {**entry, 'avatar': absolute(entry['avatar']), 'avatar_webp': absolute(entry['avatar_webp'])}
+
+    def variants(entries):
+        return {
+            name: {**entry, **{key: absolute(entry[key]) for key, _, _ in FORMATS}}
+            for name, entry in entries.items()
+        }
+
+    return {
+        **data,
+        'author': user(data['author']),
+        'images': [
+            {**image, 'image': absolute(image['image']), 'variants': variants(image['variants'])}
+            for image in data['images']
+        ],
+        'attachments': [{**attachment, 'file': absolute(attachment['file'])} for attachment in data['attachments']],
+        'comments': [{**comment, 'author': user(comment['author'])} for comment in data['comments']],
+        'comments_next': absolute(data['comments_next']),
+    }
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def cache_stats():
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 3) if total else None,
+    }
+
+
+def reset_cache_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
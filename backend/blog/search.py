@@ -0,0 +1,95 @@
+"""
+Полнотекстовый поиск по постам и комментариям (PostgreSQL, конфигурация russian).
+
+Векторы хранятся в search_vector и пересчитываются сигналами при сохранении
+(см. blog.signals), поэтому запрос идёт по GIN-индексу, а не по ILIKE.
+Рубрики ищутся нечётко по триграммному индексу.
+"""
+import html
+import re
+
+from django.contrib.postgres.search import (
+    SearchHeadline, SearchQuery, SearchRank, SearchVector, TrigramSimilarity,
+)
+from django.db.models import F, Func, Q, TextField, Value
+from .models import Post, Comment, Category
+
+SEARCH_CONFIG = 'russian'
+TERM_RE = re.compile(r'\w+')
+TAG_RE = re.compile(r'<[^>]+>')
+
+# Маркеры подсветки из ts_headline; в HTML превращаются уже после экранирования
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_STOP = '\x03'
+
+
+def strip_tags(field):
+    """Текст поля без HTML-тегов (на стороне БД)"""
+    return Func(F(field), Value('<[^>]+>'), Value(' '), Value('g'),
+                function='REGEXP_REPLACE', output_field=TextField())
+
+
+POST_VECTOR = (
+    SearchVector('title', weight='A', config=SEARCH_CONFIG)
+    + SearchVector(strip_tags('content'), weight='B', config=SEARCH_CONFIG)
+)
+COMMENT_VECTOR = SearchVector('content', config=SEARCH_CONFIG)
+
+
+def update_post_vector(post_id):
+    Post.objects.filter(pk=post_id).update(search_vector=POST_VECTOR)
+
+
+def update_comment_vector(comment_id):
+    Comment.objects.filter(pk=comment_id).update(search_vector=COMMENT_VECTOR)
+
+
+def build_query(text):
+    """
+    tsquery из слов запроса с префиксным совпадением последнего слова,
+    чтобы поиск работал по мере набора. None, если слов нет.
+    """
+    terms = TERM_RE.findall(text.lower())
+    if not terms:
+        return None
+    terms[-1] += ':*'
+    return SearchQuery(' & '.join(terms), config=SEARCH_CONFIG, search_type='raw')
+
+
+def headline(field, query):
+    """Фрагмент текста без HTML-тегов с подсвеченными совпадениями"""
+    return SearchHeadline(
+        strip_tags(field), query, config=SEARCH_CONFIG,
+        start_sel=HIGHLIGHT_START, stop_sel=HIGHLIGHT_STOP,
+        max_words=30, min_words=10, max_fragments=2,
+    )
+
+
+def highlight_html(fragment):
+    """Экранирует фрагмент и заменяет маркеры подсветки на <mark>"""
+    if not fragment:
+        return ''
+    escaped = html.escape(html.unescape(TAG_RE.sub(' ', fragment)))
+    return escaped.replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_STOP, '</mark>')
+
+
+def search_posts(query):
+    return Post.objects.filter(search_vector=query, is_published=True).annotate(
+        rank=SearchRank(F('search_vector'), query),
+        headline=headline('content', query),
+    ).order_by('-rank', '-created_at')
+
+
+def search_comments(query):
+    return Comment.objects.filter(search_vector=query).annotate(
+        rank=SearchRank(F('search_vector'), query),
+        headline=headline('content', query),
+    ).order_by('-rank', '-created_at')
+
+
+def search_categories(text):
+    return Category.objects.filter(
+        Q(name__icontains=text) | Q(name__trigram_similar=text)
+    ).annotate(
+        similarity=TrigramSimilarity('name', text)
+    ).order_by('-similarity', 'name')
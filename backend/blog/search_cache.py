@@ -0,0 +1,77 @@
+"""
+Кэш результатов поиска.
+
+Ответы хранятся в памяти процесса (LRU с коротким TTL) под ключом из
+нормализованного запроса и версии поискового индекса. Версия лежит в общем
+кэше Django и увеличивается при изменении постов, комментариев и рубрик
+(см. blog.signals), так что правка сбрасывает результаты во всех процессах.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+VERSION_KEY = 'search:version'
+
+
+class SearchResultCache:
+    """LRU-кэш с ограничением по числу записей и времени жизни"""
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+search_cache = SearchResultCache(settings.SEARCH_CACHE_MAX_ENTRIES, settings.SEARCH_CACHE_TIMEOUT)
+
+
+def get_search_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(VERSION_KEY, version, None)
+    return version
+
+
+def invalidate_search_results():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 2, None)
+
+
+def make_key(kind, query_text):
+    normalized = ' '.join(query_text.lower().split())
+    return (kind, get_search_version(), normalized)
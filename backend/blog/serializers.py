@@ -1,6 +1,15 @@
+import os
+
+from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
 from rest_framework import serializers
-from .models import Post, PostImage, PostAttachment, Comment, Like, Category
-from users.serializers import UserSerializer
+from rest_framework.utils.urls import replace_query_param
+from .models import Post, PostImage, PostAttachment, AttachmentUpload, Comment, Like, Category
+from users.serializers import UserListSerializer
+from .images import variant_urls
+from .bulk import add_images, add_attachments, parse_category_names
+from .pagination import encode_comment_cursor
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -10,10 +19,37 @@ class CategorySerializer(serializers.ModelSerializer):
 
 
 class PostImageSerializer(serializers.ModelSerializer):
+    variants = serializers.SerializerMethodField()
+
     class Meta:
         model = PostImage
-        fields = ['id', 'image', 'caption', 'order', 'uploaded_at']
-        read_only_fields = ['uploaded_at']
+        fields = ['id', 'image', 'width', 'height', 'variants', 'caption', 'order', 'uploaded_at']
+        read_only_fields = ['width', 'height', 'uploaded_at']
+
+    def get_variants(self, obj):
+        return variant_urls(obj.image, obj.variants, self.context.get('request'))
+
+
+class AttachmentUploadSerializer(serializers.ModelSerializer):
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = AttachmentUpload
+        fields = ['id', 'file_name', 'content_type', 'file_size', 'offset', 'chunk_size', 'created_at']
+        read_only_fields = ['offset', 'created_at']
+
+    def get_chunk_size(self, obj):
+        return settings.ATTACHMENT_UPLOAD_CHUNK_SIZE
+
+    def validate_file_size(self, value):
+        if value > settings.ATTACHMENT_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'Файл больше {settings.ATTACHMENT_UPLOAD_MAX_SIZE // (1024 * 1024)} МБ'
+            )
+        return value
+
+    def validate_file_name(self, value):
+        return os.path.basename(value)
 
 
 class PostAttachmentSerializer(serializers.ModelSerializer):
@@ -24,7 +60,7 @@ class PostAttachmentSerializer(serializers.ModelSerializer):
 
 
 class CommentSerializer(serializers.ModelSerializer):
-    author = UserSerializer(read_only=True)
+    author = UserListSerializer(read_only=True)
     
     class Meta:
         model = Comment
@@ -33,7 +69,7 @@ class CommentSerializer(serializers.ModelSerializer):
 
 
 class LikeSerializer(serializers.ModelSerializer):
-    user = UserSerializer(read_only=True)
+    user = UserListSerializer(read_only=True)
     
     class Meta:
         model = Like
@@ -42,7 +78,7 @@ class LikeSerializer(serializers.ModelSerializer):
 
 
 class PostListSerializer(serializers.ModelSerializer):
-    author = UserSerializer(read_only=True)
+    author = UserListSerializer(read_only=True)
     images = PostImageSerializer(many=True, read_only=True)
     categories = CategorySerializer(many=True, read_only=True)
     likes_count = serializers.IntegerField(read_only=True)
@@ -61,15 +97,19 @@ class PostListSerializer(serializers.ModelSerializer):
     def get_is_liked(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            # Аннотация из Post.objects.with_feed_data() избавляет от запроса на каждый пост
+            if hasattr(obj, 'is_liked_by_user'):
+                return obj.is_liked_by_user
             return obj.likes.filter(user=request.user).exists()
         return False
 
 
 class PostDetailSerializer(serializers.ModelSerializer):
-    author = UserSerializer(read_only=True)
+    author = UserListSerializer(read_only=True)
     images = PostImageSerializer(many=True, read_only=True)
     attachments = PostAttachmentSerializer(many=True, read_only=True)
-    comments = CommentSerializer(many=True, read_only=True)
+    comments = serializers.SerializerMethodField()
+    comments_next = serializers.SerializerMethodField()
     categories = CategorySerializer(many=True, read_only=True)
     likes_count = serializers.IntegerField(read_only=True)
     comments_count = serializers.IntegerField(read_only=True)
@@ -79,14 +119,43 @@ class PostDetailSerializer(serializers.ModelSerializer):
         model = Post
         fields = [
             'id', 'title', 'content', 'author', 'images', 'attachments',
-            'comments', 'categories', 'created_at', 'updated_at', 'is_published',
-            'likes_count', 'comments_count', 'is_liked'
+            'comments', 'comments_next', 'categories', 'created_at', 'updated_at',
+            'is_published', 'likes_count', 'comments_count', 'is_liked'
         ]
         read_only_fields = ['created_at', 'updated_at', 'author']
+
+    def first_comments(self, obj):
+        """
+        Первые POST_DETAIL_COMMENTS комментариев. PostDetailView загружает их
+        через Prefetch(to_attr='first_comments'), остальные отдаются
+        постранично CommentListCreateView.
+        """
+        if not hasattr(obj, 'first_comments'):
+            obj.first_comments = list(
+                obj.comments.select_related('author', 'author__profile')
+                .order_by('created_at', 'id')[:settings.POST_DETAIL_COMMENTS]
+            )
+        return obj.first_comments
+
+    def get_comments(self, obj):
+        return CommentSerializer(self.first_comments(obj), many=True, context=self.context).data
+
+    def get_comments_next(self, obj):
+        """Ссылка на следующую страницу комментариев или None, если встроены все"""
+        comments = self.first_comments(obj)
+        if not comments or obj.comments_count <= len(comments):
+            return None
+        url = reverse('blog:comment_list_create', kwargs={'post_id': obj.id})
+        request = self.context.get('request')
+        if request:
+            url = request.build_absolute_uri(url)
+        return replace_query_param(url, 'after', encode_comment_cursor(comments[-1]))
     
     def get_is_liked(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            if hasattr(obj, 'is_liked_by_user'):
+                return obj.is_liked_by_user
             return obj.likes.filter(user=request.user).exists()
         return False
 
@@ -105,6 +174,12 @@ class PostCreateUpdateSerializer(serializers.ModelSerializer):
         write_only=True,
         required=False
     )
+    # Вложения, загруженные по частям через posts/uploads/ (крупные аудиофайлы)
+    attachment_uploads = serializers.ListField(
+        child=serializers.UUIDField(),
+        write_only=True,
+        required=False
+    )
     category_name = serializers.CharField(write_only=True, required=False, allow_blank=True)
     
     class Meta:
@@ -112,75 +187,71 @@ class PostCreateUpdateSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'title', 'content', 'is_published', 'categories', 'category_name',
             'images', 'attachments', 'uploaded_images', 'uploaded_attachments',
-            'created_at', 'updated_at'
+            'attachment_uploads', 'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
     
+    def validate_attachment_uploads(self, value):
+        uploads = list(AttachmentUpload.objects.filter(
+            id__in=value, user=self.context['request'].user
+        ))
+        if len(uploads) != len(set(value)):
+            raise serializers.ValidationError('Загрузка не найдена')
+        if not all(upload.is_complete for upload in uploads):
+            raise serializers.ValidationError('Файл загружен не полностью')
+        return uploads
+    
     def create(self, validated_data):
         uploaded_images = validated_data.pop('uploaded_images', [])
         uploaded_attachments = validated_data.pop('uploaded_attachments', [])
+        attachment_uploads = validated_data.pop('attachment_uploads', [])
         category_name = validated_data.pop('category_name', None)
         
-        post = Post.objects.create(**validated_data)
-        
-        # Обрабатываем множественные рубрики через запятую
-        if category_name:
-            category_names = [name.strip() for name in category_name.split(',') if name.strip()]
-            for cat_name in category_names:
-                category = Category.get_or_create_with_color(cat_name)
-                post.categories.add(category)
-        
-        for order, image in enumerate(uploaded_images):
-            PostImage.objects.create(post=post, image=image, order=order)
-        
-        for file in uploaded_attachments:
-            file_type = 'other'
-            if file.content_type.startswith('audio/'):
-                file_type = 'audio'
-            elif file.content_type in ['application/pdf', 'application/msword', 
-                                        'application/vnd.openxmlformats-officedocument.wordprocessingml.document']:
-                file_type = 'document'
+        with transaction.atomic():
+            post = Post.objects.create(**validated_data)
             
-            PostAttachment.objects.create(post=post, file=file, file_type=file_type)
+            # Множественные рубрики через запятую: один запрос на все названия
+            if category_name:
+                post.categories.add(*Category.get_or_create_many(parse_category_names(category_name)))
+            
+            add_images(post, uploaded_images)
+            add_attachments(post, uploaded_attachments, attachment_uploads)
         
         return post
     
     def update(self, instance, validated_data):
         uploaded_images = validated_data.pop('uploaded_images', [])
         uploaded_attachments = validated_data.pop('uploaded_attachments', [])
+        attachment_uploads = validated_data.pop('attachment_uploads', [])
         category_name = validated_data.pop('category_name', None)
         
-        # Обновляем рубрики если указаны
-        if category_name is not None:
-            instance.categories.clear()
-            if category_name:
-                category_names = [name.strip() for name in category_name.split(',') if name.strip()]
-                for cat_name in category_names:
-                    category = Category.get_or_create_with_color(cat_name)
-                    instance.categories.add(category)
-        
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-        
-        if uploaded_images:
-            current_max_order = instance.images.count()
-            for order, image in enumerate(uploaded_images):
-                PostImage.objects.create(
-                    post=instance,
-                    image=image,
-                    order=current_max_order + order
-                )
-        
-        if uploaded_attachments:
-            for file in uploaded_attachments:
-                file_type = 'other'
-                if file.content_type.startswith('audio/'):
-                    file_type = 'audio'
-                elif file.content_type in ['application/pdf', 'application/msword',
-                                            'application/vnd.openxmlformats-officedocument.wordprocessingml.document']:
-                    file_type = 'document'
-                
-                PostAttachment.objects.create(post=instance, file=file, file_type=file_type)
+        with transaction.atomic():
+            # Обновляем рубрики если указаны
+            if category_name is not None:
+                instance.categories.set(Category.get_or_create_many(parse_category_names(category_name)))
+            
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+            
+            if uploaded_images:
+                add_images(instance, uploaded_images, start_order=instance.images.count())
+            add_attachments(instance, uploaded_attachments, attachment_uploads)
         
-        return instance
\ No newline at end of file
+        return instance
+
+
+class PostImportItemSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=200)
+    content = serializers.CharField()
+    is_published = serializers.BooleanField(default=True)
+    categories = serializers.ListField(
+        child=serializers.CharField(max_length=100),
+        required=False,
+        default=list
+    )
+
+
+class PostImportSerializer(serializers.Serializer):
+    """Пачка постов для импорта (см. blog.bulk.import_posts)"""
+    posts = PostImportItemSerializer(many=True, allow_empty=False, max_length=settings.POST_IMPORT_MAX_ITEMS)
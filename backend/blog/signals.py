@@ -1,8 +1,20 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import Post
-from users.email_utils import send_new_post_notification
+from friends.models import Friendship, Subscription, BlockedUser
+from .models import Post, PostImage, PostAttachment, Comment, Like, Category, TimelineEntry, invalidate_category_cache
+from .timeline import (
+    is_push_strategy, fan_out_post, push_author_posts, remove_author_posts,
+    is_following, update_high_fanout
+)
+from .search import update_post_vector, update_comment_vector
+from .search_cache import invalidate_search_results
+from .post_cache import invalidate_post_details, invalidate_user_details
+from users.models import Profile
+from users.email_utils import queue_new_post_notification
 
 User = get_user_model()
 
@@ -10,8 +22,9 @@ User = get_user_model()
 @receiver(post_save, sender=Post)
 def notify_users_about_new_post(sender, instance, created, **kwargs):
     """
-    Отправляет уведомления пользователям о новом посте.
-    Срабатывает только при создании нового опубликованного поста.
+    Ставит в очередь уведомления пользователям о новом посте.
+    Срабатывает только при создании нового опубликованного поста,
+    письма отправляет воркер send_queued_emails вне запроса.
     """
     if created and instance.is_published:
         users_to_notify = User.objects.filter(
@@ -19,10 +32,155 @@ def notify_users_about_new_post(sender, instance, created, **kwargs):
             is_active=True,
             profile__email_notifications=True
         ).exclude(
-            id=instance.author.id  
-        )
+            id=instance.author_id
+        ).only('email', 'username', 'first_name')
         
-        if users_to_notify.exists():
-            send_new_post_notification(instance, users_to_notify)
-            
-            print(f"✉️ Отправлено {users_to_notify.count()} уведомлений о новом посте: {instance.title}")
\ No newline at end of file
+        queued = queue_new_post_notification(instance, users_to_notify)
+        if queued:
+            print(f"✉️ В очередь поставлено {queued} уведомлений о новом посте: {instance.title}")
+
+
+def _adjust_post_counter(post_id, field, delta):
+    """Атомарно меняет денормализованный счётчик поста, не уходя ниже нуля"""
+    Post.objects.filter(pk=post_id).update(
+        **{field: Greatest(F(field) + delta, 0)}
+    )
+
+
+@receiver(post_save, sender=Like)
+def increment_likes_count(sender, instance, created, **kwargs):
+    if created:
+        _adjust_post_counter(instance.post_id, 'likes_count', 1)
+
+
+@receiver(post_delete, sender=Like)
+def decrement_likes_count(sender, instance, **kwargs):
+    _adjust_post_counter(instance.post_id, 'likes_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+def increment_comments_count(sender, instance, created, **kwargs):
+    if created:
+        _adjust_post_counter(instance.post_id, 'comments_count', 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comments_count(sender, instance, **kwargs):
+    _adjust_post_counter(instance.post_id, 'comments_count', -1)
+
+
+
+@receiver(post_save, sender=Post)
+def fan_out_published_post(sender, instance, created, **kwargs):
+    """Раскладывает пост по лентам друзей и подписчиков при FEED_STRATEGY='push'"""
+    if not is_push_strategy() or not instance.is_published:
+        return
+    # При редактировании раскладываем только пост, который только что опубликовали
+    if created or not TimelineEntry.objects.filter(post=instance).exists():
+        fan_out_post(instance)
+
+
+@receiver(post_save, sender=Subscription)
+def fill_timeline_on_subscribe(sender, instance, created, **kwargs):
+    if created and is_push_strategy():
+        update_high_fanout(instance.subscribed_to_id)
+        push_author_posts(instance.subscriber_id, instance.subscribed_to_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def clear_timeline_on_unsubscribe(sender, instance, **kwargs):
+    if not is_push_strategy():
+        return
+    update_high_fanout(instance.subscribed_to_id)
+    # Друг остаётся в ленте и без подписки
+    if not is_following(instance.subscriber_id, instance.subscribed_to_id):
+        remove_author_posts(instance.subscriber_id, instance.subscribed_to_id)
+
+
+@receiver(post_save, sender=Friendship)
+def fill_timeline_on_friendship(sender, instance, created, **kwargs):
+    if created and is_push_strategy():
+        push_author_posts(instance.user1_id, instance.user2_id)
+        push_author_posts(instance.user2_id, instance.user1_id)
+
+
+@receiver(post_delete, sender=Friendship)
+def clear_timeline_on_unfriend(sender, instance, **kwargs):
+    if not is_push_strategy():
+        return
+    for user_id, author_id in ((instance.user1_id, instance.user2_id), (instance.user2_id, instance.user1_id)):
+        if not is_following(user_id, author_id):
+            remove_author_posts(user_id, author_id)
+
+
+@receiver(post_save, sender=BlockedUser)
+def clear_timeline_on_block(sender, instance, created, **kwargs):
+    if created and is_push_strategy():
+        remove_author_posts(instance.blocker_id, instance.blocked_id)
+        remove_author_posts(instance.blocked_id, instance.blocker_id)
+
+
+@receiver(post_save, sender=Post)
+def update_post_search_vector(sender, instance, **kwargs):
+    update_post_vector(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def update_comment_search_vector(sender, instance, **kwargs):
+    update_comment_vector(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=Comment)
+@receiver([post_save, post_delete], sender=Category)
+def reset_search_results(sender, instance, **kwargs):
+    invalidate_search_results()
+
+
+@receiver([post_save, post_delete], sender=Category)
+def reset_category_cache(sender, instance, **kwargs):
+    # Повторный сброс после коммита: иначе другой процесс успел бы до коммита
+    # закэшировать ещё видимую ему рубрику под новой версией
+    invalidate_category_cache()
+    transaction.on_commit(invalidate_category_cache)
+
+
+@receiver([post_save, post_delete], sender=Post)
+def reset_post_detail(sender, instance, **kwargs):
+    invalidate_post_details([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Comment)
+@receiver([post_save, post_delete], sender=PostImage)
+@receiver([post_save, post_delete], sender=PostAttachment)
+def reset_post_detail_of_related(sender, instance, **kwargs):
+    invalidate_post_details([instance.post_id])
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def reset_post_details_of_category(sender, instance, **kwargs):
+    # pre_delete: после удаления связи поста с рубрикой уже не найти
+    invalidate_post_details(
+        Post.categories.through.objects.filter(category_id=instance.pk).values_list('post_id', flat=True)
+    )
+
+
+# Поля, которые встроены в ответ поста (UserListSerializer)
+POST_DETAIL_USER_FIELDS = {'username', 'first_name', 'last_name', 'is_verified'}
+POST_DETAIL_PROFILE_FIELDS = {'avatar', 'avatar_variants'}
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Profile)
+def reset_post_details_of_user(sender, instance, created=False, update_fields=None, **kwargs):
+    """
+    Автор и комментаторы встроены в ответ вместе с аватаром. Сохранения
+    только невидимых в ответе полей (last_login, last_seen и т.п.) кэш не трогают.
+    """
+    if created:
+        return
+    rendered = POST_DETAIL_USER_FIELDS if sender is User else POST_DETAIL_PROFILE_FIELDS
+    if update_fields is not None and not rendered & set(update_fields):
+        return
+    invalidate_user_details(instance.pk if sender is User else instance.user_id)
@@ -1,3 +1,1028 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from friends.models import Friendship, Subscription, BlockedUser
+from . import images
+from .bulk import add_attachments
+from .like_buffer import FLUSH_LOCK_KEY, buffer_stats, flush_like_buffer
+from .models import (
+    Post, PostImage, PostAttachment, AttachmentUpload, Comment, Like, PendingLike, Category, TimelineEntry, get_cached_categories,
+)
+from .post_cache import cache_stats
+from .search_cache import SearchResultCache, search_cache
+from .serializers import PostImageSerializer
+
+User = get_user_model()
+
+
+class FeedQueryCountTests(TestCase):
+    """Количество запросов на страницу ленты не должно зависеть от числа постов"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass', is_approved=True
+        )
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass', is_approved=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_posts(self, count):
+        for i in range(count):
+            post = Post.objects.create(author=self.author, title=f'Пост {i}', content='Текст')
+            Comment.objects.create(post=post, author=self.user, content='Комментарий')
+            Like.objects.create(post=post, user=self.user)
+
+    def count_queries(self, url):
+        # Измеряется сам поиск, а не ответ из кэша результатов
+        search_cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def assert_constant_queries(self, url):
+        self.create_posts(2)
+        # Первый запрос прогревает кэш (например, список друзей)
+        self.client.get(url)
+        small_page, _ = self.count_queries(url)
+
+        self.create_posts(8)
+        full_page, response = self.count_queries(url)
+
+        self.assertEqual(small_page, full_page)
+        return response
+
+    def test_feed_page_has_fixed_query_count(self):
+        response = self.assert_constant_queries(reverse('blog:post_list'))
+        post = response.data['results'][0]
+        self.assertEqual(post['likes_count'], 1)
+        self.assertEqual(post['comments_count'], 1)
+        self.assertTrue(post['is_liked'])
+
+    def test_user_posts_page_has_fixed_query_count(self):
+        self.assert_constant_queries(reverse('blog:user_posts', args=[self.author.username]))
+
+    def test_user_liked_posts_page_has_fixed_query_count(self):
+        self.assert_constant_queries(reverse('blog:user_liked_posts', args=[self.user.username]))
+
+    def test_search_has_fixed_query_count(self):
+        self.assert_constant_queries(reverse('blog:search') + '?q=Пост')
+
+
+class PostCountersTests(TestCase):
+    """Денормализованные счётчики поста обновляются вместе с лайками и комментариями"""
+
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass', is_approved=True
+        )
+        self.post = Post.objects.create(author=self.author, title='Пост', content='Текст')
+
+    def test_counters_follow_likes_and_comments(self):
+        like = Like.objects.create(post=self.post, user=self.author)
+        comment = Comment.objects.create(post=self.post, author=self.author, content='Комментарий')
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.likes_count, self.post.comments_count), (1, 1))
+
+        like.delete()
+        comment.delete()
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.likes_count, self.post.comments_count), (0, 0))
+
+    def test_save_does_not_overwrite_counters(self):
+        stale = Post.objects.get(pk=self.post.pk)
+        Like.objects.create(post=self.post, user=self.author)
+
+        stale.title = 'Новый заголовок'
+        stale.save()
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+
+    def test_recount_command_repairs_drift(self):
+        Like.objects.create(post=self.post, user=self.author)
+        Post.objects.filter(pk=self.post.pk).update(likes_count=42, comments_count=7)
+
+        call_command('recount_post_counters', stdout=StringIO())
+
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.likes_count, self.post.comments_count), (1, 0))
+
+
+class FeedCursorPaginationTests(TestCase):
+    """Курсорная лента отдаёт все посты по порядку без COUNT(*)"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass', is_approved=True
+        )
+        self.friend = User.objects.create_user(
+            username='friend', email='friend@example.com', password='pass', is_approved=True
+        )
+        self.stranger = User.objects.create_user(
+            username='stranger', email='stranger@example.com', password='pass', is_approved=True
+        )
+        Friendship.objects.create(user1=self.user, user2=self.friend)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_walks_feed_friends_first_without_count(self):
+        friend_posts = [
+            Post.objects.create(author=self.friend, title=f'Друг {i}', content='Текст').id
+            for i in range(12)
+        ]
+        other_posts = [
+            Post.objects.create(author=self.stranger, title=f'Чужой {i}', content='Текст').id
+            for i in range(12)
+        ]
+
+        seen = []
+        url = reverse('blog:post_feed')
+        while url:
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(any('COUNT(' in q['sql'] for q in ctx.captured_queries))
+            # Порядок «сначала друзья» — без сортировки по вычисляемому CASE
+            self.assertFalse(any('CASE' in q['sql'] for q in ctx.captured_queries))
+            seen.extend(post['id'] for post in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(seen, friend_posts[::-1] + other_posts[::-1])
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get(reverse('blog:post_feed') + '?cursor=broken')
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(FEED_STRATEGY='push', TIMELINE_MAX_ENTRIES=3, TIMELINE_FANOUT_LIMIT=1)
+class TimelineFanOutTests(TestCase):
+    """Материализованная лента при FEED_STRATEGY='push'"""
+
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass', is_approved=True
+        )
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass', is_approved=True
+        )
+        self.stranger = User.objects.create_user(
+            username='stranger', email='stranger@example.com', password='pass', is_approved=True
+        )
+        Subscription.objects.create(subscriber=self.reader, subscribed_to=self.author)
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def feed_ids(self):
+        response = self.client.get(reverse('blog:post_feed'))
+        return [post['id'] for post in response.data['results']]
+
+    def test_published_post_is_pushed_to_subscribers_only(self):
+        post = Post.objects.create(author=self.author, title='Пост', content='Текст')
+        Post.objects.create(author=self.stranger, title='Чужой', content='Текст')
+
+        self.assertTrue(TimelineEntry.objects.filter(user=self.reader, post=post).exists())
+        self.assertEqual(self.feed_ids(), [post.id])
+
+    def test_timeline_is_bounded(self):
+        posts = [
+            Post.objects.create(author=self.author, title=f'Пост {i}', content='Текст').id
+            for i in range(5)
+        ]
+        self.assertEqual(TimelineEntry.objects.filter(user=self.reader).count(), 3)
+        self.assertEqual(self.feed_ids(), posts[:-4:-1])
+
+    def test_high_fanout_author_is_pulled_on_read(self):
+        Subscription.objects.create(subscriber=self.stranger, subscribed_to=self.author)
+        post = Post.objects.create(author=self.author, title='Пост', content='Текст')
+
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertEqual(self.feed_ids(), [post.id])
+
+    def test_high_fanout_authors_are_cached_between_requests(self):
+        self.feed_ids()
+        with CaptureQueriesContext(connection) as ctx:
+            self.feed_ids()
+        self.assertFalse(any(
+            'friends_subscription' in q['sql'] and 'COUNT(' in q['sql'] for q in ctx.captured_queries
+        ))
+
+    def test_new_friend_posts_are_backfilled(self):
+        post = Post.objects.create(author=self.stranger, title='Чужой', content='Текст')
+        self.assertNotIn(post.id, self.feed_ids())
+
+        Friendship.objects.create(user1=self.reader, user2=self.stranger)
+
+        self.assertIn(post.id, self.feed_ids())
+
+    def test_unsubscribe_removes_posts_unless_still_friends(self):
+        post = Post.objects.create(author=self.author, title='Пост', content='Текст')
+        friend_post = Post.objects.create(author=self.stranger, title='Друг', content='Текст')
+        Friendship.objects.create(user1=self.reader, user2=self.stranger)
+        Subscription.objects.create(subscriber=self.reader, subscribed_to=self.stranger)
+
+        Subscription.objects.filter(subscriber=self.reader).delete()
+
+        self.assertEqual(self.feed_ids(), [friend_post.id])
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader, post=post).exists())
+
+    def test_unfriend_and_block_remove_posts(self):
+        Friendship.objects.create(user1=self.reader, user2=self.stranger)
+        post = Post.objects.create(author=self.stranger, title='Друг', content='Текст')
+
+        Friendship.objects.all().delete()
+        self.assertNotIn(post.id, self.feed_ids())
+
+        author_post = Post.objects.create(author=self.author, title='Пост', content='Текст')
+        BlockedUser.objects.create(blocker=self.author, blocked=self.reader)
+        self.assertNotIn(author_post.id, self.feed_ids())
+
+    def test_backfill_rebuilds_timelines(self):
+        post = Post.objects.create(author=self.author, title='Пост', content='Текст')
+        TimelineEntry.objects.all().delete()
+
+        call_command('backfill_timelines', stdout=StringIO())
+
+        self.assertTrue(TimelineEntry.objects.filter(user=self.reader, post=post).exists())
+
+
+class FullTextSearchTests(TestCase):
+    """Полнотекстовый поиск: морфология, ранжирование, подсветка и рубрики"""
+
+    def setUp(self):
+        search_cache.clear()
+        self.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass', is_approved=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('blog:search')
+
+    def search(self, q):
+        response = self.client.get(self.url, {'q': q})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_posts_found_by_word_forms_and_ranked(self):
+        in_content = Post.objects.create(
+            author=self.user, title='Заметки', content='<p>Мы ходили по <b>старым</b> дорогам &amp; тропам</p>'
+        )
+        in_title = Post.objects.create(author=self.user, title='Старые дороги', content='Текст')
+        Post.objects.create(author=self.user, title='Другое', content='Ничего общего')
+
+        data = self.search('дорога')
+
+        self.assertEqual([p['id'] for p in data['posts']], [in_title.id, in_content.id])
+        headline = data['posts'][1]['headline']
+        self.assertIn('<mark>дорогам</mark>', headline)
+        self.assertIn('&amp; тропам', headline)
+        self.assertNotIn('<b>', headline)
+
+    def test_prefix_and_edited_content(self):
+        post = Post.objects.create(author=self.user, title='Черновик', content='Текст')
+        self.assertEqual(self.search('путешест')['posts'], [])
+
+        post.content = 'Путешествие на север'
+        post.save()
+
+        self.assertEqual([p['id'] for p in self.search('путешест')['posts']], [post.id])
+
+    def test_comments_are_escaped_in_headline(self):
+        post = Post.objects.create(author=self.user, title='Пост', content='Текст')
+        Comment.objects.create(post=post, author=self.user, content='<img src=x onerror=alert(1)> отличная фотография')
+
+        comment = self.search('фотография')['comments'][0]
+
+        self.assertIn('<mark>фотография</mark>', comment['headline'])
+        self.assertNotIn('<img', comment['headline'])
+
+    def test_categories_match_with_typos(self):
+        Category.objects.create(name='Путешествия', color='#1877F2')
+
+        self.assertEqual([c['name'] for c in self.search('Путешествея')['categories']], ['Путешествия'])
+
+
+class SearchCacheTests(TestCase):
+    """Повторный поиск берётся из кэша, правки сбрасывают результаты"""
+
+    def setUp(self):
+        cache.clear()
+        search_cache.clear()
+        self.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass', is_approved=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(author=self.user, title='Поход в горы', content='Текст')
+
+    def search(self, q):
+        return self.client.get(reverse('blog:search'), {'q': q}).data
+
+    def test_repeated_search_is_cached_with_viewer_likes(self):
+        self.assertFalse(self.search('горы')['posts'][0]['is_liked'])
+        Like.objects.create(post=self.post, user=self.user)
+
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.search('  ГОРЫ ')
+
+        self.assertTrue(data['posts'][0]['is_liked'])
+        self.assertEqual(search_cache.hits, 1)
+        self.assertEqual(len([q for q in ctx.captured_queries if 'blog_like' in q['sql']]), 1)
+
+    def test_edits_invalidate_results(self):
+        self.assertEqual(len(self.search('озеро')['posts']), 0)
+
+        self.post.content = 'Горное озеро'
+        self.post.save()
+
+        self.assertEqual(len(self.search('озеро')['posts']), 1)
+
+    def test_autocomplete_returns_ids_and_titles(self):
+        response = self.client.get(reverse('blog:search_autocomplete'), {'q': 'пох'})
+
+        self.assertEqual(response.data, [{'id': self.post.id, 'title': 'Поход в горы'}])
+
+    def test_lru_evicts_oldest_entry(self):
+        lru = SearchResultCache(max_entries=2, timeout=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+
+        self.assertEqual((lru.get('a'), lru.get('b'), lru.get('c')), (1, None, 3))
+
+
+def make_jpeg(size=(2000, 1000), orientation=None):
+    """JPEG с EXIF (геометка и, при необходимости, поворот)"""
+    exif = Image.Exif()
+    exif[0x010F] = 'Camera'  # Make
+    if orientation:
+        exif[0x0112] = orientation
+    buffer = BytesIO()
+    Image.new('RGB', size, (200, 30, 30)).save(buffer, format='JPEG', exif=exif)
+    return SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+
+class ImageVariantsTests(TestCase):
+    """Варианты изображений строятся воркером, EXIF удаляется"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user(
+            username='author', email='author@example.com', password='pass', is_approved=True
+        )
+        self.post = Post.objects.create(author=self.user, title='Пост', content='Текст')
+
+    def test_post_image_variants(self):
+        image = PostImage.objects.create(post=self.post, image=make_jpeg(orientation=6))
+        self.assertEqual((image.variants_status, image.variants), ('pending', {}))
+
+        call_command('process_images', stdout=StringIO())
+
+        image.refresh_from_db()
+        self.assertEqual(image.variants_status, 'ready')
+        # Ориентация из EXIF применена: 2000x1000 повёрнуто на 90°
+        self.assertEqual((image.width, image.height), (1000, 2000))
+        self.assertEqual(set(image.variants), {'thumbnail', 'medium'})
+        self.assertEqual(
+            (image.variants['thumbnail']['width'], image.variants['thumbnail']['height']), (160, 320)
+        )
+
+        with Image.open(image.image.path) as original:
+            self.assertFalse(original.getexif())
+        with Image.open(image.image.storage.path(image.variants['medium']['webp'])) as webp:
+            self.assertEqual((webp.format, webp.size), ('WEBP', (512, 1024)))
+
+    def test_old_original_is_deleted_after_commit(self):
+        image = PostImage.objects.create(post=self.post, image=make_jpeg())
+        old_path = image.image.path
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            call_command('process_images', stdout=StringIO())
+        self.assertTrue(os.path.exists(old_path))
+
+        for callback in callbacks:
+            callback()
+        image.refresh_from_db()
+        self.assertFalse(os.path.exists(old_path))
+        self.assertTrue(os.path.exists(image.image.path))
+
+    def test_failed_variant_keeps_original(self):
+        image = PostImage.objects.create(post=self.post, image=make_jpeg())
+        name, path = image.image.name, image.image.path
+        original_encode = images._encode
+
+        def encode(resized, format_name):
+            if format_name == 'WEBP':
+                raise OSError('Диск заполнен')
+            return original_encode(resized, format_name)
+
+        with mock.patch('blog.images._encode', side_effect=encode):
+            call_command('process_images', stdout=StringIO())
+
+        image.refresh_from_db()
+        self.assertEqual((image.variants_status, image.image.name), ('failed', name))
+        self.assertTrue(os.path.exists(path))
+        # Недостроенные варианты и копия без EXIF удалены
+        files = [name for _, _, names in os.walk(os.path.dirname(path)) for name in names]
+        self.assertEqual(files, [os.path.basename(path)])
+
+    def test_serializer_exposes_variant_urls(self):
+        image = PostImage.objects.create(post=self.post, image=make_jpeg())
+        self.assertEqual(PostImageSerializer(image).data['variants'], {})
+
+        call_command('process_images', stdout=StringIO())
+        image.refresh_from_db()
+
+        variants = PostImageSerializer(image).data['variants']
+        self.assertTrue(variants['thumbnail']['webp'].endswith('_thumbnail.webp'))
+        self.assertTrue(variants['medium']['jpeg'].startswith('/media/posts/images/'))
+
+    def test_new_avatar_is_queued(self):
+        profile = self.user.profile
+        self.assertEqual(profile.avatar_status, 'ready')
+
+        profile.avatar = make_jpeg((300, 300))
+        profile.save()
+        self.assertEqual(profile.avatar_status, 'pending')
+
+        call_command('process_images', stdout=StringIO())
+        profile.refresh_from_db()
+
+        self.assertEqual(profile.avatar_status, 'ready')
+        self.assertEqual(profile.avatar_variants['thumbnail']['width'], 64)
+
+        # Повторное сохранение без смены аватара не сбрасывает варианты
+        profile.bio = 'О себе'
+        profile.save()
+        self.assertEqual(profile.avatar_status, 'ready')
+
+
+@override_settings(ATTACHMENT_UPLOAD_CHUNK_SIZE=4)
+class ChunkedUploadTests(TestCase):
+    """Вложение загружается по частям и привязывается к посту при его создании"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(
+            MEDIA_ROOT=self.media_root, ATTACHMENT_UPLOAD_TEMP_DIR=f'{self.media_root}/chunked_uploads'
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user(
+            username='author', email='author@example.com', password='pass', is_approved=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def start(self, size=10):
+        response = self.client.post(reverse('blog:attachment_upload_create'), {
+            'file_name': '../song.mp3', 'content_type': 'audio/mpeg', 'file_size': size,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def put_chunk(self, upload_id, offset, data):
+        return self.client.generic(
+            'PUT', reverse('blog:attachment_upload_detail', args=[upload_id]), data,
+            content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def test_chunks_are_assembled_and_attached(self):
+        upload_id = self.start()
+        for offset, chunk in ((0, b'0123'), (4, b'4567'), (8, b'89')):
+            self.assertEqual(self.put_chunk(upload_id, offset, chunk).data['offset'], offset + len(chunk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('blog:post_create'), {
+                'title': 'Песня', 'content': 'Слушайте', 'attachment_uploads': [upload_id],
+            }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        attachment = Post.objects.get(id=response.data['id']).attachments.get()
+        self.assertEqual((attachment.file_type, attachment.file_size), ('audio', 10))
+        self.assertTrue(attachment.file_name.startswith('song'))
+        with attachment.file.open('rb') as f:
+            self.assertEqual(f.read(), b'0123456789')
+        self.assertFalse(AttachmentUpload.objects.exists())
+        # Исходный файл загрузки удалён после коммита
+        self.assertEqual(os.listdir(f'{self.media_root}/chunked_uploads'), [])
+
+    def test_upload_survives_rolled_back_post(self):
+        upload_id = self.start()
+        for offset, chunk in ((0, b'0123'), (4, b'4567'), (8, b'89')):
+            self.put_chunk(upload_id, offset, chunk)
+        upload = AttachmentUpload.objects.get(id=upload_id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    post = Post.objects.create(author=self.user, title='Песня', content='Слушайте')
+                    add_attachments(post, uploads=[upload])
+                    raise ValueError
+            except ValueError:
+                pass
+
+        with open(upload.path, 'rb') as f:
+            self.assertEqual(f.read(), b'0123456789')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('blog:post_create'), {
+                'title': 'Песня', 'content': 'Слушайте', 'attachment_uploads': [upload_id],
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+        with Post.objects.get(id=response.data['id']).attachments.get().file.open('rb') as f:
+            self.assertEqual(f.read(), b'0123456789')
+
+    def test_wrong_offset_returns_current_offset(self):
+        upload_id = self.start()
+        self.put_chunk(upload_id, 0, b'0123')
+
+        response = self.put_chunk(upload_id, 0, b'0123')
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['offset'], 4)
+
+    def test_oversized_chunk_and_incomplete_upload_are_rejected(self):
+        upload_id = self.start()
+        self.assertEqual(self.put_chunk(upload_id, 0, b'01234').status_code, 400)
+        self.put_chunk(upload_id, 0, b'0123')
+
+        response = self.client.post(reverse('blog:post_create'), {
+            'title': 'Песня', 'content': 'Слушайте', 'attachment_uploads': [upload_id],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('attachment_uploads', response.data)
+
+    def test_other_users_upload_is_not_found(self):
+        upload_id = self.start()
+        other = User.objects.create_user(
+            username='other', email='other@example.com', password='pass', is_approved=True
+        )
+        self.client.force_authenticate(other)
+
+        self.assertEqual(self.put_chunk(upload_id, 0, b'0123').status_code, 404)
+
+
+class BulkPostWriteTests(TestCase):
+    """Рубрики, изображения и вложения поста пишутся пачками"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user(
+            username='author', email='author@example.com', password='pass', is_approved=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        Category.objects.create(name='Музыка', color='#1877F2')
+
+    def create_post(self, count, prefix='Рубрика'):
+        data = {
+            'title': 'Пост', 'content': 'Текст',
+            'category_name': ', '.join(['Музыка'] + [f'{prefix} {i}' for i in range(count)]),
+            'uploaded_images': [make_jpeg((10, 10)) for _ in range(count)],
+            'uploaded_attachments': [
+                SimpleUploadedFile(f'track{i}.mp3', b'id3', content_type='audio/mpeg') for i in range(count)
+            ],
+        }
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('blog:post_create'), data, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        return Post.objects.get(id=response.data['id']), len(ctx.captured_queries)
+
+    def test_query_count_does_not_depend_on_number_of_items(self):
+        self.create_post(1, 'Прогрев')  # last_seen и прочие разовые запросы
+        post, few = self.create_post(1)
+        _, many = self.create_post(4, 'Другая')
+
+        self.assertEqual(few, many)
+        self.assertEqual(
+            sorted(post.categories.values_list('name', flat=True)), ['Музыка', 'Рубрика 0']
+        )
+        self.assertEqual(Category.objects.filter(name='Рубрика 0').count(), 1)
+        attachment = post.attachments.get()
+        self.assertEqual((attachment.file_type, attachment.file_size), ('audio', 3))
+        self.assertTrue(attachment.file_name.startswith('track0'))
+
+    def test_update_replaces_categories(self):
+        post, _ = self.create_post(2)
+
+        response = self.client.patch(
+            reverse('blog:post_update', args=[post.id]), {'category_name': 'Рубрика 1, Новая'}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(post.categories.values_list('name', flat=True)), ['Новая', 'Рубрика 1'])
+
+    def test_import_creates_posts_with_categories(self):
+        response = self.client.post(reverse('blog:post_import'), {'posts': [
+            {'title': 'Первый', 'content': 'Горное озеро', 'categories': ['Музыка', 'Походы']},
+            {'title': 'Второй', 'content': 'Текст', 'categories': [' Походы ', 'Походы']},
+            {'title': 'Черновик', 'content': 'Текст', 'is_published': False},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        posts = Post.objects.filter(id__in=response.data['ids']).order_by('id')
+        self.assertEqual([p.title for p in posts], ['Первый', 'Второй', 'Черновик'])
+        self.assertEqual(list(posts[1].categories.values_list('name', flat=True)), ['Походы'])
+        self.assertEqual(Category.objects.filter(name='Походы').count(), 1)
+        self.assertEqual(
+            [p['title'] for p in self.client.get(reverse('blog:search'), {'q': 'озеро'}).data['posts']],
+            ['Первый']
+        )
+
+
+
+class CategoryCreationTests(TestCase):
+    """Рубрика создаётся одним INSERT с цветом по названию и кэшируется после коммита"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_new_category_is_one_query_with_deterministic_color(self):
+        with self.assertNumQueries(1):
+            category = Category.get_or_create_with_color(' Музыка ')
+
+        self.assertEqual(category.name, 'Музыка')
+        self.assertEqual(category.color, Category.color_for_name('Музыка'))
+        self.assertEqual(Category.objects.get(id=category.id).color, category.color)
+
+    def test_existing_category_keeps_its_color(self):
+        existing = Category.objects.create(name='Походы', color='#F7B928')
+
+        categories = Category.get_or_create_many(['Походы', 'Новая', 'Походы'])
+
+        self.assertEqual([c.name for c in categories], ['Походы', 'Новая'])
+        self.assertEqual((categories[0].id, categories[0].color), (existing.id, '#F7B928'))
+
+    def test_repeated_names_are_served_from_cache(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = Category.get_or_create_many(['Музыка', 'Кино'])
+
+        with self.assertNumQueries(0):
+            second = Category.get_or_create_many(['Кино', 'Музыка'])
+
+        self.assertEqual([c.id for c in second], [first[1].id, first[0].id])
+        # Каждый вызов получает свои экземпляры, общий объект не разделяется между потоками
+        self.assertIsNot(second[1], first[0])
+        self.assertIsNot(Category.get_or_create_many(['Музыка'])[0], second[1])
+
+    def test_deleted_category_is_not_served_from_cache(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            deleted = Category.get_or_create_with_color('Архив')
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.filter(id=deleted.id).delete()
+
+        category = Category.get_or_create_with_color('Архив')
+
+        self.assertNotEqual(category.id, deleted.id)
+        self.assertTrue(Category.objects.filter(id=category.id).exists())
+
+    def test_rolled_back_category_is_not_cached(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Category.get_or_create_with_color('Черновик')
+                    raise ValueError
+            except ValueError:
+                pass
+
+        self.assertEqual(get_cached_categories(['Черновик']), {})
+        self.assertFalse(Category.objects.filter(name='Черновик').exists())
+
+
+class LikeEndpointTests(TestCase):
+    """Лайк и снятие лайка — идемпотентные запросы в одно SQL-выражение"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass', is_approved=True
+        )
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass', is_approved=True
+        )
+        self.post = Post.objects.create(author=self.author, title='Пост', content='Текст')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('blog:like', args=[self.post.id])
+        self.client.get(reverse('blog:post_list'))  # разовые запросы middleware
+
+    def test_like_is_single_statement_and_idempotent(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.put(self.url)
+        like_queries = [q for q in ctx.captured_queries if 'blog_like' in q['sql']]
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['is_liked'], response.data['likes_count']), (True, 1))
+        self.assertEqual(len(like_queries), 1)
+
+        response = self.client.put(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['likes_count'], 1)
+        self.assertEqual(Like.objects.filter(post=self.post).count(), 1)
+
+    def test_unlike_is_idempotent(self):
+        self.client.put(self.url)
+
+        first = self.client.delete(self.url)
+        second = self.client.delete(self.url)
+
+        self.assertEqual((first.data['is_liked'], first.data['likes_count']), (False, 0))
+        self.assertEqual(second.data['likes_count'], 0)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+
+    def test_unpublished_post_is_not_found(self):
+        Post.objects.filter(id=self.post.id).update(is_published=False)
+
+        self.assertEqual(self.client.put(self.url).status_code, 404)
+        self.assertFalse(Like.objects.exists())
+
+    def test_unlike_of_unpublished_post_is_not_found(self):
+        self.client.put(self.url)
+        Post.objects.filter(id=self.post.id).update(is_published=False)
+
+        self.assertEqual(self.client.delete(self.url).status_code, 404)
+        self.assertTrue(Like.objects.filter(post=self.post, user=self.user).exists())
+
+    def test_toggle_endpoint_still_works(self):
+        url = reverse('blog:like_toggle', args=[self.post.id])
+
+        self.assertEqual(self.client.post(url).data['is_liked'], True)
+        self.assertEqual(self.client.post(url).data['is_liked'], False)
+
+
+@override_settings(LIKE_BUFFER_ENABLED=True)
+class LikeBufferTests(TestCase):
+    """Лайки копятся в буфере, пользователь сразу видит свой лайк, сброс идёт пачкой"""
+
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass', is_approved=True
+        )
+        self.readers = [
+            User.objects.create_user(
+                username=f'reader{i}', email=f'reader{i}@example.com', password='pass', is_approved=True
+            )
+            for i in range(3)
+        ]
+        self.post = Post.objects.create(author=self.author, title='Пост', content='Текст')
+        self.url = reverse('blog:like', args=[self.post.id])
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_like_is_buffered_with_read_your_writes(self):
+        client = self.client_for(self.readers[0])
+
+        response = client.put(self.url)
+
+        self.assertEqual((response.data['is_liked'], response.data['likes_count']), (True, 1))
+        self.assertFalse(Like.objects.exists())
+        self.assertEqual(PendingLike.objects.count(), 1)
+        # Лента и пост уже показывают лайк, хотя в Like его ещё нет
+        feed = client.get(reverse('blog:post_list')).data['results']
+        self.assertTrue(feed[0]['is_liked'])
+        self.assertTrue(client.get(reverse('blog:post_detail', args=[self.post.id])).data['is_liked'])
+        # Повторный лайк не пишет в журнал
+        client.put(self.url)
+        self.assertEqual(PendingLike.objects.count(), 1)
+
+    def test_flush_applies_final_state(self):
+        for reader in self.readers:
+            self.client_for(reader).put(self.url)
+        # Передумал: последнее действие — снятие лайка
+        self.client_for(self.readers[2]).delete(self.url)
+        self.assertEqual(buffer_stats()['pending'], 4)
+
+        self.assertEqual(flush_like_buffer(100), 4)
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 2)
+        self.assertEqual(
+            set(Like.objects.values_list('user__username', flat=True)), {'reader0', 'reader1'}
+        )
+        self.assertEqual(buffer_stats(), {'pending': 0, 'posts': 0, 'oldest_age_seconds': 0})
+
+        self.client_for(self.readers[0]).delete(self.url)
+        call_command('flush_likes', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+
+    def test_concurrent_flush_is_skipped(self):
+        self.client_for(self.readers[0]).put(self.url)
+        other = connection.get_new_connection(connection.get_connection_params())
+        self.addCleanup(other.close)
+        with other.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_lock(%s)', [FLUSH_LOCK_KEY])
+
+        self.assertEqual(flush_like_buffer(100), 0)
+        self.assertEqual(buffer_stats()['pending'], 1)
+
+    def test_stats_endpoint_is_admin_only(self):
+        self.client_for(self.readers[0]).put(self.url)
+        admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='pass', is_approved=True, is_admin_user=True
+        )
+
+        self.assertEqual(self.client_for(self.readers[0]).get(reverse('blog:like_buffer_stats')).status_code, 403)
+        data = self.client_for(admin).get(reverse('blog:like_buffer_stats')).data
+        self.assertEqual((data['enabled'], data['pending'], data['posts']), (True, 1, 1))
+
+
+class PostDetailCacheTests(TestCase):
+    """Общая часть ответа поста кэшируется, данные читателя подставляются при ответе"""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass', is_approved=True
+        )
+        self.reader = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass', is_approved=True
+        )
+        self.post = Post.objects.create(author=self.author, title='Пост', content='Текст')
+        Comment.objects.create(post=self.post, author=self.reader, content='Первый')
+        self.url = reverse('blog:post_detail', args=[self.post.id])
+        self.author_client = APIClient()
+        self.author_client.force_authenticate(self.author)
+        self.reader_client = APIClient()
+        self.reader_client.force_authenticate(self.reader)
+
+    def test_second_reader_is_served_from_cache_with_own_like(self):
+        Like.objects.create(post=self.post, user=self.reader)
+        self.author_client.get(self.url)
+
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.reader_client.get(self.url).data
+
+        self.assertTrue(data['is_liked'])
+        self.assertEqual(data['likes_count'], 1)
+        self.assertEqual(len([q for q in ctx.captured_queries if 'blog_comment' in q['sql']]), 0)
+        self.assertFalse(self.author_client.get(self.url).data['is_liked'])
+        self.assertEqual(cache_stats()['hits'], 2)
+
+    def test_new_comment_and_edit_are_visible_immediately(self):
+        self.reader_client.get(self.url)
+
+        Comment.objects.create(post=self.post, author=self.author, content='Второй')
+        data = self.reader_client.get(self.url).data
+        self.assertEqual([c['content'] for c in data['comments']], ['Первый', 'Второй'])
+
+        self.post.title = 'Новый заголовок'
+        self.post.save()
+        self.assertEqual(self.reader_client.get(self.url).data['title'], 'Новый заголовок')
+
+    def test_profile_change_invalidates_cached_posts(self):
+        self.reader_client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reader.first_name = 'Мария'
+            self.reader.save()
+
+        data = self.author_client.get(self.url).data
+        self.assertEqual(data['comments'][0]['author']['first_name'], 'Мария')
+
+    def test_cached_urls_follow_each_request_host(self):
+        PostAttachment.objects.bulk_create([
+            PostAttachment(post=self.post, file='post_attachments/doc.pdf', file_name='doc.pdf', file_size=1)
+        ])
+        self.author_client.get(self.url, HTTP_HOST='localhost')
+
+        data = self.reader_client.get(self.url, HTTP_HOST='127.0.0.1').data
+
+        self.assertEqual(cache_stats()['hits'], 1)
+        self.assertTrue(data['attachments'][0]['file'].startswith('http://127.0.0.1/'))
+
+    def test_login_does_not_invalidate_cached_posts(self):
+        self.reader_client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(1):
+                self.reader.last_login = timezone.now()
+                self.reader.save(update_fields=['last_login'])
+
+        self.reader_client.get(self.url)
+        self.assertEqual(cache_stats()['hits'], 1)
+
+    def test_hidden_post_is_not_served_from_cache(self):
+        self.reader_client.get(self.url)
+        Post.objects.filter(id=self.post.id).update(is_published=False)
+
+        self.assertEqual(self.reader_client.get(self.url).status_code, 404)
+
+
+@override_settings(POST_DETAIL_COMMENTS=3, COMMENTS_PAGE_SIZE=4)
+class CommentPaginationTests(TestCase):
+    """Пост встраивает первые комментарии, остальные отдаются страницами по курсору"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass', is_approved=True
+        )
+        self.post = Post.objects.create(author=self.user, title='Пост', content='Текст')
+        self.comment_ids = [
+            Comment.objects.create(post=self.post, author=self.user, content=f'Комментарий {i}').id
+            for i in range(10)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_detail_embeds_first_comments_and_pages_through_the_rest(self):
+        data = self.client.get(reverse('blog:post_detail', args=[self.post.id])).data
+        self.assertEqual([c['id'] for c in data['comments']], self.comment_ids[:3])
+        self.assertEqual(data['comments_count'], 10)
+
+        seen, pages = [], []
+        url = data['comments_next']
+        while url:
+            with CaptureQueriesContext(connection) as ctx:
+                page = self.client.get(url).data
+            self.assertFalse(any('COUNT(' in q['sql'] for q in ctx.captured_queries))
+            seen.extend(c['id'] for c in page['results'])
+            pages.append(page)
+            url = page['next']
+        self.assertEqual(seen, self.comment_ids[3:])
+
+        previous = self.client.get(pages[-1]['previous']).data
+        self.assertEqual([c['id'] for c in previous['results']], self.comment_ids[3:7])
+        self.assertIsNotNone(previous['next'])
+
+    def test_short_thread_has_no_next_link(self):
+        Comment.objects.filter(id__in=self.comment_ids[2:]).delete()
+        data = self.client.get(reverse('blog:post_detail', args=[self.post.id])).data
+        self.assertEqual(len(data['comments']), 2)
+        self.assertIsNone(data['comments_next'])
+
+    def test_invalid_cursor_returns_404(self):
+        url = reverse('blog:comment_list_create', args=[self.post.id])
+        self.assertEqual(self.client.get(url + '?before=broken').status_code, 404)
+
+
+class CompactAuthorTests(TestCase):
+    """В списках автор отдаётся кратко, полный профиль — только на странице профиля"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass', is_approved=True
+        )
+        self.user.profile.bio = 'О себе'
+        self.user.profile.save()
+        Post.objects.create(author=self.user, title='Пост', content='Текст')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_feed_author_is_compact(self):
+        author = self.client.get(reverse('blog:post_feed')).data['results'][0]['author']
+        self.assertEqual(
+            set(author),
+            {'id', 'username', 'first_name', 'last_name', 'is_verified', 'avatar', 'avatar_webp'}
+        )
+        self.assertIsNone(author['avatar'])
+
+    def test_profile_endpoint_keeps_full_profile(self):
+        data = self.client.get(reverse('users:user_profile', args=[self.user.username])).data
+        self.assertEqual(data['profile']['bio'], 'О себе')
+        self.assertIn('is_online', data)
+
+    def test_payload_benchmark_reports_smaller_feed(self):
+        out = StringIO()
+        call_command('benchmark_feed_payload', '--repeat', '1', stdout=out)
+        self.assertIn('Ответ меньше', out.getvalue())
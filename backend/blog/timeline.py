@@ -0,0 +1,190 @@
+"""
+Материализованная лента (fan-out on write).
+
+При публикации id поста раскладывается в ограниченные ленты друзей и
+подписчиков автора, а лента пользователя читается из его записей.
+Посты авторов с большим числом подписчиков не раскладываются и
+подмешиваются при чтении (pull on read).
+
+Ленты следуют за графом: новая дружба или подписка добавляет последние
+посты автора, отписка, удаление из друзей и блокировка убирают их
+(см. blog.signals).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
+from friends.cache import get_friend_ids
+from friends.models import Friendship, Subscription
+from .models import Post, TimelineEntry
+
+BATCH_SIZE = 1000
+HIGH_FANOUT_KEY = 'timeline:high_fanout_ids'
+
+
+def is_push_strategy():
+    return settings.FEED_STRATEGY == 'push'
+
+
+def get_high_fanout_ids():
+    """
+    Авторы, у которых подписчиков больше TIMELINE_FANOUT_LIMIT. Таких немного,
+    поэтому множество считается одним запросом и хранится в кэше.
+    """
+    author_ids = cache.get(HIGH_FANOUT_KEY)
+    if author_ids is None:
+        author_ids = frozenset(
+            Subscription.objects.values('subscribed_to_id').annotate(
+                total=Count('id')
+            ).filter(
+                total__gt=settings.TIMELINE_FANOUT_LIMIT
+            ).values_list('subscribed_to_id', flat=True)
+        )
+        cache.set(HIGH_FANOUT_KEY, author_ids, settings.TIMELINE_HIGH_FANOUT_CACHE_TIMEOUT)
+    return author_ids
+
+
+def is_high_fanout(author_id):
+    return author_id in get_high_fanout_ids()
+
+
+def update_high_fanout(author_id):
+    """
+    Вызывается после подписки или отписки. Если автор перешёл через лимит,
+    множество сбрасывается; ставшему «обычным» автору последние посты
+    раскладываются заново, иначе они пропадут из лент подписчиков.
+    """
+    subscribers = Subscription.objects.filter(subscribed_to_id=author_id).count()
+    is_high = subscribers > settings.TIMELINE_FANOUT_LIMIT
+    if is_high == is_high_fanout(author_id):
+        return
+    cache.delete(HIGH_FANOUT_KEY)
+    if not is_high:
+        fan_out_posts(author_id, Post.objects.filter(
+            author_id=author_id, is_published=True
+        ).order_by('-created_at')[:settings.TIMELINE_MAX_ENTRIES])
+
+
+def get_recipient_ids(author_id):
+    """Чьи ленты получают посты автора: друзья, подписчики и сам автор"""
+    subscriber_ids = Subscription.objects.filter(
+        subscribed_to_id=author_id
+    ).values_list('subscriber_id', flat=True)
+    return set(subscriber_ids) | get_friend_ids(author_id) | {author_id}
+
+
+def get_followed_author_ids(user_id):
+    subscribed_ids = Subscription.objects.filter(
+        subscriber_id=user_id
+    ).values_list('subscribed_to_id', flat=True)
+    return set(subscribed_ids) | get_friend_ids(user_id)
+
+
+def fan_out_post(post):
+    """Раскладывает опубликованный пост по лентам. Возвращает число получателей."""
+    return fan_out_posts(post.author_id, [post])
+
+
+def fan_out_posts(author_id, posts):
+    """
+    Раскладывает опубликованные посты одного автора по лентам: получатели
+    определяются один раз на всю пачку (массовый импорт).
+    """
+    posts = [post for post in posts if post.is_published]
+    if not posts or is_high_fanout(author_id):
+        return 0
+
+    recipient_ids = get_recipient_ids(author_id)
+    entries = [
+        TimelineEntry(user_id=user_id, post_id=post.id, post_created_at=post.created_at)
+        for post in posts
+        for user_id in recipient_ids
+    ]
+    TimelineEntry.objects.bulk_create(entries, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    trim_timelines(recipient_ids)
+    return len(recipient_ids)
+
+
+def push_author_posts(user_id, author_id):
+    """Добавляет в ленту пользователя последние посты автора (после подписки)"""
+    if is_high_fanout(author_id):
+        return
+
+    posts = Post.objects.filter(
+        author_id=author_id, is_published=True
+    ).order_by('-created_at').values_list('id', 'created_at')[:settings.TIMELINE_MAX_ENTRIES]
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=user_id, post_id=post_id, post_created_at=created_at)
+         for post_id, created_at in posts],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    trim_timelines([user_id])
+
+
+def is_following(user_id, author_id):
+    """Подписан ли пользователь на автора или дружит с ним (по БД, без кэша)"""
+    return (
+        Subscription.objects.filter(subscriber_id=user_id, subscribed_to_id=author_id).exists() or
+        Friendship.objects.filter(
+            Q(user1_id=user_id, user2_id=author_id) | Q(user1_id=author_id, user2_id=user_id)
+        ).exists()
+    )
+
+
+def remove_author_posts(user_id, author_id):
+    """Убирает посты автора из ленты пользователя"""
+    TimelineEntry.objects.filter(user_id=user_id, post__author_id=author_id).delete()
+
+
+def trim_timelines(user_ids):
+    """Оставляет в каждой ленте не больше TIMELINE_MAX_ENTRIES последних записей"""
+    overflow_ids = list(
+        TimelineEntry.objects.filter(user_id__in=user_ids).annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=[F('user_id')],
+                order_by=F('post_created_at').desc(),
+            )
+        ).filter(
+            position__gt=settings.TIMELINE_MAX_ENTRIES
+        ).values_list('id', flat=True)
+    )
+    if overflow_ids:
+        TimelineEntry.objects.filter(id__in=overflow_ids).delete()
+
+
+def rebuild_timeline(user_id):
+    """Пересобирает ленту пользователя из постов тех, на кого он подписан"""
+    author_ids = get_followed_author_ids(user_id) | {user_id}
+    fanout_author_ids = list(author_ids - get_high_fanout_ids())
+
+    posts = Post.objects.filter(
+        author_id__in=fanout_author_ids, is_published=True
+    ).order_by('-created_at').values_list('id', 'created_at')[:settings.TIMELINE_MAX_ENTRIES]
+
+    with transaction.atomic():
+        TimelineEntry.objects.filter(user_id=user_id).delete()
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(user_id=user_id, post_id=post_id, post_created_at=created_at)
+             for post_id, created_at in posts],
+            batch_size=BATCH_SIZE,
+        )
+    return len(posts)
+
+
+def get_timeline_queryset(user):
+    """
+    Посты из материализованной ленты пользователя плюс посты авторов
+    с большим числом подписчиков, на которых он подписан.
+    """
+    high_fanout_ids = get_high_fanout_ids()
+    if high_fanout_ids:
+        high_fanout_ids &= get_followed_author_ids(user.id) | {user.id}
+
+    inbox_post_ids = TimelineEntry.objects.filter(user=user).values('post_id')
+    return Post.objects.filter(
+        Q(id__in=inbox_post_ids) | Q(author_id__in=list(high_fanout_ids)),
+        is_published=True
+    )
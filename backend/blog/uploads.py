@@ -0,0 +1,59 @@
+"""
+Загрузка вложений по частям.
+
+Клиент создаёт AttachmentUpload (имя, тип, размер), затем отправляет части
+запросами PUT с заголовком Upload-Offset. Каждая часть потоком дописывается
+в файл во временном каталоге, поэтому ни файл целиком, ни часть не держатся
+в памяти. Если соединение оборвалось, клиент узнаёт offset и продолжает с него.
+Готовый файл переносится в хранилище (rename жёсткой ссылки, без копирования)
+при сохранении поста с attachment_uploads (см. blog.bulk.add_attachments).
+"""
+import os
+
+from django.core.files import File
+
+READ_SIZE = 64 * 1024
+
+
+class AssembledFile(File):
+    """
+    Собранный на диске файл. temporary_file_path() позволяет
+    FileSystemStorage перенести его, а не копировать содержимое.
+    """
+
+    def __init__(self, path, name):
+        super().__init__(None, name)
+        self.path = path
+
+    def temporary_file_path(self):
+        return self.path
+
+    @property
+    def size(self):
+        return os.path.getsize(self.path)
+
+
+def create_upload_file(upload):
+    os.makedirs(os.path.dirname(upload.path), exist_ok=True)
+    open(upload.path, 'wb').close()
+
+
+def write_chunk(upload, stream, length):
+    """
+    Дописывает часть из потока запроса начиная с upload.offset.
+    Возвращает число записанных байт: меньше length, если клиент оборвал
+    передачу; такая часть не засчитывается и отправляется заново.
+    """
+    written = 0
+    with open(upload.path, 'r+b') as f:
+        f.seek(upload.offset)
+        while written < length:
+            data = stream.read(min(READ_SIZE, length - written))
+            if not data:
+                break
+            f.write(data)
+            written += len(data)
+        if written == length:
+            f.truncate()
+    return written
+
@@ -6,22 +6,32 @@ app_name = 'blog'
 urlpatterns = [
     # Posts
     path('posts/', views.PostListView.as_view(), name='post_list'),
+    path('posts/feed/', views.PostFeedView.as_view(), name='post_feed'),
     path('posts/create/', views.PostCreateView.as_view(), name='post_create'),
+    path('posts/import/', views.PostImportView.as_view(), name='post_import'),
     path('posts/<int:pk>/', views.PostDetailView.as_view(), name='post_detail'),
+    path('posts/cache/stats/', views.PostDetailCacheStatsView.as_view(), name='post_cache_stats'),
     path('posts/<int:pk>/update/', views.PostUpdateView.as_view(), name='post_update'),
     path('posts/<int:pk>/delete/', views.PostDeleteView.as_view(), name='post_delete'),
     path('posts/user/<str:username>/', views.UserPostsView.as_view(), name='user_posts'),
     path('posts/user/<str:username>/liked/', views.UserLikedPostsView.as_view(), name='user_liked_posts'),
     
+    # Attachment uploads by chunks
+    path('posts/uploads/', views.AttachmentUploadCreateView.as_view(), name='attachment_upload_create'),
+    path('posts/uploads/<uuid:upload_id>/', views.AttachmentUploadDetailView.as_view(), name='attachment_upload_detail'),
+    
     # Comments
     path('posts/<int:post_id>/comments/', views.CommentListCreateView.as_view(), name='comment_list_create'),
     path('comments/<int:pk>/', views.CommentDetailView.as_view(), name='comment_detail'),
     
     # Likes
     path('posts/<int:post_id>/like/', views.LikeToggleView.as_view(), name='like_toggle'),
+    path('posts/<int:post_id>/likes/me/', views.LikeView.as_view(), name='like'),
+    path('likes/buffer/', views.LikeBufferStatsView.as_view(), name='like_buffer_stats'),
     
     # Search
     path('search/', views.SearchView.as_view(), name='search'),
+    path('search/autocomplete/', views.SearchAutocompleteView.as_view(), name='search_autocomplete'),
     
     # Public stats
     path('public-stats/', views.PublicStatsView.as_view(), name='public_stats'),
@@ -1,14 +1,26 @@
 from rest_framework import generics, status, views
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from django.http import Http404
 from django.shortcuts import get_object_or_404
-from .models import Post, Comment, Like, Category
-from friends.models import Friendship
-from django.db.models import Q
+from django.db import transaction
+from django.conf import settings
+from .models import Post, AttachmentUpload, Comment, Like
+from friends.cache import get_friend_ids
+from django.db.models import Case, When, Value, IntegerField, Prefetch
 from .serializers import (
     PostListSerializer, PostDetailSerializer, PostCreateUpdateSerializer,
-    CommentSerializer, LikeSerializer
+    CommentSerializer, LikeSerializer, AttachmentUploadSerializer, PostImportSerializer
 )
+from .bulk import import_posts
+from .likes import set_like
+from .like_buffer import buffer_stats
+from .post_cache import get_cached_detail, set_cached_detail, make_stamp, build_absolute_urls, cache_stats
+from .uploads import create_upload_file, write_chunk
+from .pagination import FeedCursorPagination, CommentCursorPagination
+from .search import build_query, search_posts, search_comments, search_categories, highlight_html
+from .search_cache import search_cache, make_key
+from .timeline import is_push_strategy, get_timeline_queryset
 from users.permissions import IsApprovedUser, IsAdminUser, IsCommentAuthorOrReadOnly, IsPostAuthorOrAdmin
 from rest_framework.permissions import AllowAny
 
@@ -16,42 +28,103 @@ from rest_framework.permissions import AllowAny
 class PostListView(generics.ListAPIView):
     serializer_class = PostListSerializer
     permission_classes = [IsApprovedUser]
+
+    def get_base_queryset(self):
+        user = self.request.user
+        if is_push_strategy():
+            queryset = get_timeline_queryset(user)
+        else:
+            queryset = Post.objects.filter(is_published=True)
+        return queryset.with_feed_data(user)
+
+    def get_feed_friend_ids(self):
+        return get_friend_ids(self.request.user.id)
     
     def get_queryset(self):
-        user = self.request.user
-        queryset = Post.objects.filter(is_published=True).select_related('author').prefetch_related('images', 'categories')
+        queryset = self.get_base_queryset()
+        friend_ids = self.get_feed_friend_ids()
         
-        # Получаем список друзей пользователя
-        friendships = Friendship.objects.filter(
-            Q(user1=user) | Q(user2=user)
-        )
-        friend_ids = []
-        for friendship in friendships:
-            if friendship.user1 == user:
-                friend_ids.append(friendship.user2.id)
-            else:
-                friend_ids.append(friendship.user1.id)
-        
-        # Если есть друзья, сортируем: сначала посты друзей, потом остальные
+        # Сначала посты друзей, потом остальные; id — для однозначного порядка
         if friend_ids:
-            from django.db.models import Case, When, IntegerField
-            queryset = queryset.annotate(
-                is_friend_post=Case(
-                    When(author_id__in=friend_ids, then=1),
-                    default=0,
-                    output_field=IntegerField()
-                )
-            ).order_by('-is_friend_post', '-created_at')
+            is_friend_post = Case(
+                When(author_id__in=list(friend_ids), then=1),
+                default=0,
+                output_field=IntegerField()
+            )
         else:
-            queryset = queryset.order_by('-created_at')
+            is_friend_post = Value(0, output_field=IntegerField())
         
-        return queryset
+        return queryset.annotate(
+            is_friend_post=is_friend_post
+        ).order_by('-is_friend_post', '-created_at', '-id')
+
+
+class PostFeedView(PostListView):
+    """
+    Лента с курсорной пагинацией вместо номеров страниц. Порядок «сначала
+    друзья» задаёт FeedCursorPagination двумя запросами по индексу, поэтому
+    здесь queryset без вычисляемого флага и сортировки по нему.
+    """
+    pagination_class = FeedCursorPagination
+
+    def get_queryset(self):
+        return self.get_base_queryset()
 
 
 class PostDetailView(generics.RetrieveAPIView):
     serializer_class = PostDetailSerializer
     permission_classes = [IsApprovedUser]
-    queryset = Post.objects.filter(is_published=True).select_related('author').prefetch_related('images', 'attachments', 'categories', 'comments__author')
+    queryset = Post.objects.filter(is_published=True).select_related(
+        'author', 'author__profile'
+    ).prefetch_related('images', 'attachments', 'categories')
+
+    def get_queryset(self):
+        # Встраиваются только первые комментарии, остальные — через CommentListCreateView
+        first_comments = Prefetch(
+            'comments',
+            queryset=Comment.objects.select_related('author', 'author__profile')
+            .order_by('created_at', 'id')[:settings.POST_DETAIL_COMMENTS],
+            to_attr='first_comments'
+        )
+        return super().get_queryset().prefetch_related(first_comments).with_viewer_like(self.request.user)
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Общая для всех читателей часть ответа берётся из кэша (blog.post_cache);
+        счётчики и is_liked — из одного запроса к строке поста. В кэш попадает
+        ответ без request в контексте, то есть с относительными URL.
+        """
+        post_id = self.kwargs['pk']
+        state = Post.objects.filter(
+            pk=post_id, is_published=True
+        ).with_viewer_like(request.user).values(
+            'updated_at', 'likes_count', 'comments_count', 'is_liked_by_user'
+        ).first()
+        if state is None:
+            raise Http404
+
+        stamp = make_stamp(state)
+        data = get_cached_detail(post_id, stamp)
+        if data is None:
+            data = self.get_serializer(
+                self.get_object(), context={'request': None, 'format': self.format_kwarg, 'view': self}
+            ).data
+            set_cached_detail(post_id, stamp, data)
+
+        return Response({
+            **build_absolute_urls(data, request),
+            'likes_count': state['likes_count'],
+            'comments_count': state['comments_count'],
+            'is_liked': state['is_liked_by_user'],
+        })
+
+
+class PostDetailCacheStatsView(views.APIView):
+    """Доля ответов PostDetailView, отданных из кэша"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(cache_stats())
 
 
 class PostCreateView(generics.CreateAPIView):
@@ -75,9 +148,97 @@ class PostDeleteView(generics.DestroyAPIView):
     queryset = Post.objects.all()
 
 
+class PostImportView(views.APIView):
+    """Импорт пачки постов текущего пользователя одним запросом"""
+    permission_classes = [IsApprovedUser]
+
+    def post(self, request):
+        serializer = PostImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        posts = import_posts(request.user, serializer.validated_data['posts'])
+        return Response({
+            'message': f'Импортировано постов: {len(posts)}',
+            'ids': [post.id for post in posts],
+        }, status=status.HTTP_201_CREATED)
+
+
+class AttachmentUploadCreateView(generics.CreateAPIView):
+    """Начало загрузки вложения по частям (см. blog.uploads)"""
+    serializer_class = AttachmentUploadSerializer
+    permission_classes = [IsApprovedUser]
+
+    def perform_create(self, serializer):
+        upload = serializer.save(user=self.request.user)
+        create_upload_file(upload)
+
+
+class AttachmentUploadDetailView(views.APIView):
+    """
+    GET — сколько байт уже получено, PUT — очередная часть (тело запроса,
+    заголовок Upload-Offset), DELETE — отмена загрузки.
+    """
+    permission_classes = [IsApprovedUser]
+
+    def get_upload(self, request, upload_id):
+        return get_object_or_404(AttachmentUpload, id=upload_id, user=request.user)
+
+    def get(self, request, upload_id):
+        upload = self.get_upload(request, upload_id)
+        return Response(AttachmentUploadSerializer(upload).data)
+
+    def put(self, request, upload_id):
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers['Content-Length'])
+        except (KeyError, ValueError):
+            return Response(
+                {'error': 'Нужны заголовки Upload-Offset и Content-Length'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 0 < length <= settings.ATTACHMENT_UPLOAD_CHUNK_SIZE:
+            return Response(
+                {'error': f'Размер части должен быть от 1 до {settings.ATTACHMENT_UPLOAD_CHUNK_SIZE} байт'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic():
+            # Блокировка не даёт двум запросам писать одну загрузку одновременно
+            upload = get_object_or_404(
+                AttachmentUpload.objects.select_for_update(), id=upload_id, user=request.user
+            )
+            if offset != upload.offset:
+                return Response(
+                    {'error': 'Неверное смещение', 'offset': upload.offset},
+                    status=status.HTTP_409_CONFLICT
+                )
+            if offset + length > upload.file_size:
+                return Response(
+                    {'error': 'Часть выходит за размер файла', 'offset': upload.offset},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            # Тело читается потоком из исходного запроса, минуя парсеры DRF
+            written = write_chunk(upload, request._request, length)
+            if written != length:
+                return Response(
+                    {'error': 'Часть получена не полностью', 'offset': upload.offset},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            upload.offset += written
+            upload.save(update_fields=['offset', 'updated_at'])
+
+        return Response(AttachmentUploadSerializer(upload).data)
+
+    def delete(self, request, upload_id):
+        self.get_upload(request, upload_id).discard()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 class CommentListCreateView(generics.ListCreateAPIView):
+    """Комментарии поста страницами по курсорам after/before на (created_at, id)"""
     serializer_class = CommentSerializer
     permission_classes = [IsApprovedUser]
+    pagination_class = CommentCursorPagination
     
     def get_queryset(self):
         post_id = self.kwargs['post_id']
@@ -95,29 +256,48 @@ class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Comment.objects.all()
 
 
+def like_response(result, is_liked, changed_status=status.HTTP_200_OK):
+    if result is None:
+        return Response({'error': 'Пост не найден'}, status=status.HTTP_404_NOT_FOUND)
+    changed, likes_count = result
+    return Response({
+        'message': 'Лайк поставлен' if is_liked else 'Лайк удален',
+        'is_liked': is_liked,
+        'likes_count': likes_count
+    }, status=changed_status if changed else status.HTTP_200_OK)
+
+
+class LikeView(views.APIView):
+    """
+    PUT — поставить лайк, DELETE — снять. Оба запроса идемпотентны
+    и выполняются одним SQL-выражением (см. blog.likes).
+    """
+    permission_classes = [IsApprovedUser]
+
+    def put(self, request, post_id):
+        return like_response(set_like(post_id, request.user.id, True), True, status.HTTP_201_CREATED)
+
+    def delete(self, request, post_id):
+        return like_response(set_like(post_id, request.user.id, False), False)
+
+
 class LikeToggleView(views.APIView):
+    """Переключение лайка; оставлено для старых клиентов"""
     permission_classes = [IsApprovedUser]
     
     def post(self, request, post_id):
-        post = get_object_or_404(Post, id=post_id, is_published=True)
-        user = request.user
-        
-        like = Like.objects.filter(post=post, user=user).first()
-        
-        if like:
-            like.delete()
-            return Response({
-                'message': 'Лайк удален',
-                'is_liked': False,
-                'likes_count': post.likes_count
-            }, status=status.HTTP_200_OK)
-        else:
-            Like.objects.create(post=post, user=user)
-            return Response({
-                'message': 'Лайк поставлен',
-                'is_liked': True,
-                'likes_count': post.likes_count
-            }, status=status.HTTP_201_CREATED)
+        result = set_like(post_id, request.user.id, False)
+        if result is not None and result[0]:
+            return like_response(result, False)
+        return like_response(set_like(post_id, request.user.id, True), True, status.HTTP_201_CREATED)
+
+
+class LikeBufferStatsView(views.APIView):
+    """Глубина буфера лайков (для мониторинга)"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({'enabled': settings.LIKE_BUFFER_ENABLED, **buffer_stats()})
 
 
 class UserPostsView(generics.ListAPIView):
@@ -133,7 +313,7 @@ class UserPostsView(generics.ListAPIView):
         return Post.objects.filter(
             author=user,
             is_published=True
-        ).select_related('author').prefetch_related('images', 'categories').order_by('-created_at')
+        ).with_feed_data(self.request.user).order_by('-created_at')
 
 
 class UserLikedPostsView(generics.ListAPIView):
@@ -150,38 +330,65 @@ class UserLikedPostsView(generics.ListAPIView):
         return Post.objects.filter(
             id__in=liked_post_ids,
             is_published=True
-        ).select_related('author').prefetch_related('images', 'categories').order_by('-created_at')
+        ).with_feed_data(self.request.user).order_by('-created_at')
 
 
 class SearchView(views.APIView):
-    """Поиск по постам, рубрикам, комментариям"""
+    """
+    Поиск по постам, рубрикам, комментариям.
+    Посты и комментарии ищутся полнотекстово (см. blog.search) и сортируются
+    по релевантности, у каждого результата есть фрагмент с подсветкой.
+    Ответ кэшируется по запросу (blog.search_cache), is_liked подставляется
+    для каждого пользователя отдельно.
+    """
     permission_classes = [IsApprovedUser]
     
     def get(self, request):
-        query = request.query_params.get('q', '').strip()
+        query_text = request.query_params.get('q', '').strip()
+        query = build_query(query_text)
         
-        if not query:
+        if query is None:
             return Response({
                 'posts': [],
                 'categories': [],
                 'comments': []
             })
-        
+
+        key = make_key('results', query_text)
+        data = search_cache.get(key)
+        if data is None:
+            data = self.search(request, query, query_text)
+            search_cache.set(key, data)
+        else:
+            data = self.with_viewer_likes(data, request.user)
+        return Response(data)
+
+    def with_viewer_likes(self, data, user):
+        """Копия закэшированного ответа с is_liked текущего пользователя (один запрос)"""
+        post_ids = [post['id'] for post in data['posts']]
+        liked_ids = set()
+        if post_ids and user.is_authenticated:
+            liked_ids = set(Post.objects.filter(
+                id__in=post_ids
+            ).with_viewer_like(user).filter(is_liked_by_user=True).values_list('id', flat=True))
+        return {
+            **data,
+            'posts': [{**post, 'is_liked': post['id'] in liked_ids} for post in data['posts']],
+        }
+
+    def search(self, request, query, query_text):
         # Поиск по постам (заголовок и содержание)
-        posts = Post.objects.filter(
-            Q(title__icontains=query) | Q(content__icontains=query),
-            is_published=True
-        ).select_related('author').prefetch_related('images', 'categories')[:20]
+        posts = search_posts(query).with_feed_data(request.user)[:20]
         
-        # Поиск по рубрикам
-        categories = Category.objects.filter(name__icontains=query)[:10]
+        # Нечёткий поиск по рубрикам
+        categories = search_categories(query_text)[:10]
         
         # Поиск по комментариям
-        comments = Comment.objects.filter(
-            content__icontains=query
-        ).select_related('author', 'post', 'post__author')[:20]
+        comments = search_comments(query).select_related('author', 'post', 'post__author')[:20]
         
         posts_data = PostListSerializer(posts, many=True, context={'request': request}).data
+        for post, post_data in zip(posts, posts_data):
+            post_data['headline'] = highlight_html(post.headline)
         categories_data = [{'id': cat.id, 'name': cat.name, 'color': cat.color} for cat in categories]
         comments_data = []
         
@@ -203,14 +410,36 @@ class SearchView(views.APIView):
                         'username': comment.post.author.username,
                     }
                 },
+                'headline': highlight_html(comment.headline),
                 'created_at': comment.created_at
             })
         
-        return Response({
+        return {
             'posts': posts_data,
             'categories': categories_data,
             'comments': comments_data
-        })
+        }
+
+
+class SearchAutocompleteView(views.APIView):
+    """Подсказки при наборе: только id и заголовки постов из поискового индекса"""
+    permission_classes = [IsApprovedUser]
+    LIMIT = 8
+
+    def get(self, request):
+        query_text = request.query_params.get('q', '').strip()
+        query = build_query(query_text)
+        if query is None:
+            return Response([])
+
+        key = make_key('autocomplete', query_text)
+        suggestions = search_cache.get(key)
+        if suggestions is None:
+            suggestions = list(
+                search_posts(query).values('id', 'title')[:self.LIMIT]
+            )
+            search_cache.set(key, suggestions)
+        return Response(suggestions)
 
 
 class PublicStatsView(views.APIView):
@@ -0,0 +1,67 @@
+"""
+Кэш графа друзей и блокировок.
+Каждый набор читается из БД одним запросом и хранится до изменения
+Friendship/BlockedUser (см. friends.signals).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from .models import Friendship, BlockedUser
+
+FRIEND_IDS_KEY = 'friends:friend_ids:{}'
+BLOCKS_KEY = 'friends:blocks:{}'
+
+
+def get_friend_ids(user_id):
+    """Множество id друзей пользователя"""
+    key = FRIEND_IDS_KEY.format(user_id)
+    friend_ids = cache.get(key)
+
+    if friend_ids is None:
+        pairs = Friendship.objects.filter(
+            Q(user1_id=user_id) | Q(user2_id=user_id)
+        ).values_list('user1_id', 'user2_id')
+        friend_ids = frozenset(
+            user2_id if user1_id == user_id else user1_id
+            for user1_id, user2_id in pairs
+        )
+        cache.set(key, friend_ids, settings.FRIEND_GRAPH_CACHE_TIMEOUT)
+
+    return friend_ids
+
+
+def get_block_ids(user_id):
+    """
+    Пара множеств (кого заблокировал пользователь, кто заблокировал пользователя)
+    """
+    key = BLOCKS_KEY.format(user_id)
+    blocks = cache.get(key)
+
+    if blocks is None:
+        pairs = BlockedUser.objects.filter(
+            Q(blocker_id=user_id) | Q(blocked_id=user_id)
+        ).values_list('blocker_id', 'blocked_id')
+        blocked = frozenset(blocked_id for blocker_id, blocked_id in pairs if blocker_id == user_id)
+        blocked_by = frozenset(blocker_id for blocker_id, blocked_id in pairs if blocked_id == user_id)
+        blocks = (blocked, blocked_by)
+        cache.set(key, blocks, settings.FRIEND_GRAPH_CACHE_TIMEOUT)
+
+    return blocks
+
+
+def are_friends(user_id, other_id):
+    return other_id in get_friend_ids(user_id)
+
+
+def is_blocked_between(user_id, other_id):
+    """Есть ли блокировка в любую сторону между двумя пользователями"""
+    blocked, blocked_by = get_block_ids(user_id)
+    return other_id in blocked or other_id in blocked_by
+
+
+def invalidate_friend_ids(*user_ids):
+    cache.delete_many([FRIEND_IDS_KEY.format(user_id) for user_id in user_ids])
+
+
+def invalidate_block_ids(*user_ids):
+    cache.delete_many([BLOCKS_KEY.format(user_id) for user_id in user_ids])
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-18 09:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('friends', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='friendrequest',
+            index=models.Index(fields=['to_user', 'status', '-created_at'], name='friend_req_incoming_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='friendrequest',
+            index=models.Index(fields=['from_user', 'status', '-created_at'], name='friend_req_outgoing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='internalnotification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['user'], name='internal_notif_unread_idx'),
+        ),
+    ]
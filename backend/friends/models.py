@@ -36,6 +36,11 @@ class FriendRequest(models.Model):
         verbose_name_plural = _('заявки в друзья')
         unique_together = ['from_user', 'to_user']
         ordering = ['-created_at']
+        indexes = [
+            # Входящие и исходящие заявки по статусу, новые первыми
+            models.Index(fields=['to_user', 'status', '-created_at'], name='friend_req_incoming_idx'),
+            models.Index(fields=['from_user', 'status', '-created_at'], name='friend_req_outgoing_idx'),
+        ]
     
     def __str__(self):
         return f'{self.from_user.username} -> {self.to_user.username} ({self.get_status_display()})'
@@ -149,6 +154,14 @@ class InternalNotification(models.Model):
         verbose_name = _('внутреннее уведомление')
         verbose_name_plural = _('внутренние уведомления')
         ordering = ['-created_at']
+        indexes = [
+            # Счётчик непрочитанных для значка
+            models.Index(
+                fields=['user'],
+                condition=models.Q(is_read=False),
+                name='internal_notif_unread_idx',
+            ),
+        ]
     
     def __str__(self):
         return f'{self.user.username} - {self.get_notification_type_display()}'
\ No newline at end of file
@@ -1,11 +1,11 @@
 from rest_framework import serializers
 from .models import FriendRequest, Friendship, Subscription, BlockedUser, InternalNotification
-from users.serializers import UserSerializer
+from users.serializers import UserListSerializer
 
 
 class FriendRequestSerializer(serializers.ModelSerializer):
-    from_user = UserSerializer(read_only=True)
-    to_user = UserSerializer(read_only=True)
+    from_user = UserListSerializer(read_only=True)
+    to_user = UserListSerializer(read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     
     class Meta:
@@ -26,13 +26,13 @@ class FriendshipSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if request and request.user:
             friend = obj.user2 if obj.user1 == request.user else obj.user1
-            return UserSerializer(friend).data
+            return UserListSerializer(friend, context=self.context).data
         return None
 
 
 class SubscriptionSerializer(serializers.ModelSerializer):
-    subscriber = UserSerializer(read_only=True)
-    subscribed_to = UserSerializer(read_only=True)
+    subscriber = UserListSerializer(read_only=True)
+    subscribed_to = UserListSerializer(read_only=True)
     
     class Meta:
         model = Subscription
@@ -41,7 +41,7 @@ class SubscriptionSerializer(serializers.ModelSerializer):
 
 
 class BlockedUserSerializer(serializers.ModelSerializer):
-    blocked = UserSerializer(read_only=True)
+    blocked = UserListSerializer(read_only=True)
     
     class Meta:
         model = BlockedUser
@@ -50,7 +50,7 @@ class BlockedUserSerializer(serializers.ModelSerializer):
 
 
 class InternalNotificationSerializer(serializers.ModelSerializer):
-    from_user = UserSerializer(read_only=True)
+    from_user = UserListSerializer(read_only=True)
     type_display = serializers.CharField(source='get_notification_type_display', read_only=True)
     
     class Meta:
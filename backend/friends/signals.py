@@ -1,6 +1,7 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import FriendRequest, Friendship, Subscription, InternalNotification
+from .models import FriendRequest, Friendship, Subscription, BlockedUser, InternalNotification
+from .cache import invalidate_friend_ids, invalidate_block_ids
 
 
 @receiver(post_save, sender=FriendRequest)
@@ -41,4 +42,16 @@ def notify_new_subscriber(sender, instance, created, **kwargs):
             notification_type='new_subscriber',
             from_user=instance.subscriber
         )
-        print(f"👤 {instance.subscriber.username} подписался на {instance.subscribed_to.username}")
\ No newline at end of file
+        print(f"👤 {instance.subscriber.username} подписался на {instance.subscribed_to.username}")
+
+
+@receiver(post_save, sender=Friendship)
+@receiver(post_delete, sender=Friendship)
+def reset_friend_ids_cache(sender, instance, **kwargs):
+    invalidate_friend_ids(instance.user1_id, instance.user2_id)
+
+
+@receiver(post_save, sender=BlockedUser)
+@receiver(post_delete, sender=BlockedUser)
+def reset_block_ids_cache(sender, instance, **kwargs):
+    invalidate_block_ids(instance.blocker_id, instance.blocked_id)
@@ -1,3 +1,56 @@
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from users.models import User
+from .cache import get_friend_ids, get_block_ids
+from .models import FriendRequest
+
+
+class FriendGraphCacheTests(TestCase):
+    """Кэш друзей и блокировок сбрасывается при изменении связей"""
+
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(
+            username='alice', email='alice@example.com', password='pass', is_approved=True
+        )
+        self.bob = User.objects.create_user(
+            username='bob', email='bob@example.com', password='pass', is_approved=True
+        )
+        self.client = APIClient()
+
+    def become_friends(self):
+        friend_request = FriendRequest.objects.create(from_user=self.alice, to_user=self.bob)
+        self.client.force_authenticate(self.bob)
+        response = self.client.post(reverse('friends:accept_request', args=[friend_request.id]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_accept_and_remove_update_cached_friend_ids(self):
+        self.assertEqual(get_friend_ids(self.alice.id), frozenset())
+
+        self.become_friends()
+        self.assertEqual(get_friend_ids(self.alice.id), {self.bob.id})
+        self.assertEqual(get_friend_ids(self.bob.id), {self.alice.id})
+
+        self.client.delete(reverse('friends:remove_friend', args=[self.alice.id]))
+        self.assertEqual(get_friend_ids(self.alice.id), frozenset())
+
+    def test_block_drops_friendship_and_caches_block(self):
+        self.become_friends()
+        self.assertEqual(get_friend_ids(self.alice.id), {self.bob.id})
+
+        self.client.post(reverse('friends:block_user', args=[self.alice.id]))
+
+        self.assertEqual(get_friend_ids(self.alice.id), frozenset())
+        self.assertEqual(get_block_ids(self.alice.id), (frozenset(), {self.bob.id}))
+
+        response = self.client.get(reverse('friends:friendship_status', args=[self.alice.id]))
+        self.assertTrue(response.data['is_blocked'])
+        self.assertFalse(response.data['is_friend'])
+
+    def test_cached_friend_ids_need_no_queries(self):
+        get_friend_ids(self.alice.id)
+        with self.assertNumQueries(0):
+            get_friend_ids(self.alice.id)
@@ -5,7 +5,9 @@ from django.shortcuts import get_object_or_404
 from django.db.models import Q
 from users.permissions import IsApprovedUser
 from users.models import User
+from notifications.badge import invalidate_badge
 from .models import FriendRequest, Friendship, Subscription, BlockedUser, InternalNotification
+from .cache import get_block_ids, are_friends, is_blocked_between
 from .serializers import (
     FriendRequestSerializer, FriendshipSerializer, 
     SubscriptionSerializer, BlockedUserSerializer,
@@ -23,17 +25,11 @@ class SendFriendRequestView(views.APIView):
             return Response({'error': 'Нельзя отправить заявку самому себе'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        if BlockedUser.objects.filter(
-            Q(blocker=request.user, blocked=to_user) | 
-            Q(blocker=to_user, blocked=request.user)
-        ).exists():
+        if is_blocked_between(request.user.id, to_user.id):
             return Response({'error': 'Действие невозможно'}, 
                           status=status.HTTP_403_FORBIDDEN)
         
-        if Friendship.objects.filter(
-            Q(user1=request.user, user2=to_user) | 
-            Q(user1=to_user, user2=request.user)
-        ).exists():
+        if are_friends(request.user.id, to_user.id):
             return Response({'error': 'Вы уже друзья'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
@@ -155,7 +151,7 @@ class MyFriendsView(generics.ListAPIView):
     def get_queryset(self):
         return Friendship.objects.filter(
             Q(user1=self.request.user) | Q(user2=self.request.user)
-        )
+        ).select_related('user1__profile', 'user2__profile')
 
 
 class MySubscriptionsView(generics.ListAPIView):
@@ -163,7 +159,9 @@ class MySubscriptionsView(generics.ListAPIView):
     permission_classes = [IsAuthenticated, IsApprovedUser]
     
     def get_queryset(self):
-        return Subscription.objects.filter(subscriber=self.request.user)
+        return Subscription.objects.filter(
+            subscriber=self.request.user
+        ).select_related('subscriber__profile', 'subscribed_to__profile')
 
 
 class MySubscribersView(generics.ListAPIView):
@@ -171,7 +169,9 @@ class MySubscribersView(generics.ListAPIView):
     permission_classes = [IsAuthenticated, IsApprovedUser]
     
     def get_queryset(self):
-        return Subscription.objects.filter(subscribed_to=self.request.user)
+        return Subscription.objects.filter(
+            subscribed_to=self.request.user
+        ).select_related('subscriber__profile', 'subscribed_to__profile')
 
 
 class IncomingFriendRequestsView(generics.ListAPIView):
@@ -182,7 +182,7 @@ class IncomingFriendRequestsView(generics.ListAPIView):
         return FriendRequest.objects.filter(
             to_user=self.request.user,
             status='pending'
-        )
+        ).select_related('from_user__profile', 'to_user__profile')
 
 
 class OutgoingFriendRequestsView(generics.ListAPIView):
@@ -193,7 +193,7 @@ class OutgoingFriendRequestsView(generics.ListAPIView):
         return FriendRequest.objects.filter(
             from_user=self.request.user,
             status='pending'
-        )
+        ).select_related('from_user__profile', 'to_user__profile')
 
 
 class BlockUserView(views.APIView):
@@ -245,7 +245,7 @@ class BlockedUsersView(generics.ListAPIView):
     permission_classes = [IsAuthenticated, IsApprovedUser]
     
     def get_queryset(self):
-        return BlockedUser.objects.filter(blocker=self.request.user)
+        return BlockedUser.objects.filter(blocker=self.request.user).select_related('blocked__profile')
 
 
 class InternalNotificationsView(generics.ListAPIView):
@@ -253,7 +253,7 @@ class InternalNotificationsView(generics.ListAPIView):
     permission_classes = [IsAuthenticated, IsApprovedUser]
     
     def get_queryset(self):
-        return InternalNotification.objects.filter(user=self.request.user)
+        return InternalNotification.objects.filter(user=self.request.user).select_related('from_user__profile')
 
 
 class MarkNotificationReadView(views.APIView):
@@ -280,6 +280,8 @@ class MarkAllNotificationsReadView(views.APIView):
             user=request.user,
             is_read=False
         ).update(is_read=True)
+        # update() не вызывает сигналы
+        invalidate_badge(request.user.id)
         
         return Response({'message': 'Все уведомления прочитаны'})
 
@@ -302,20 +304,10 @@ class FriendshipStatusView(views.APIView):
     def get(self, request, user_id):
         target_user = get_object_or_404(User, id=user_id)
         
-        is_blocked = BlockedUser.objects.filter(
-            blocker=request.user,
-            blocked=target_user
-        ).exists()
-        
-        blocked_by = BlockedUser.objects.filter(
-            blocker=target_user,
-            blocked=request.user
-        ).exists()
-        
-        is_friend = Friendship.objects.filter(
-            Q(user1=request.user, user2=target_user) |
-            Q(user1=target_user, user2=request.user)
-        ).exists()
+        blocked_ids, blocked_by_ids = get_block_ids(request.user.id)
+        is_blocked = target_user.id in blocked_ids
+        blocked_by = target_user.id in blocked_by_ids
+        is_friend = are_friends(request.user.id, target_user.id)
         
         is_subscribed = Subscription.objects.filter(
             subscriber=request.user,
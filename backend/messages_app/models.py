@@ -1,8 +1,36 @@
 from django.db import models
+from django.db.models import Count, OuterRef, Q, Subquery
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 
 
+class ConversationQuerySet(models.QuerySet):
+    def for_user(self, user):
+        return self.filter(Q(participant1=user) | Q(participant2=user))
+
+    def with_inbox_data(self, user):
+        """
+        Всё, что нужно ConversationListSerializer, одним запросом:
+        участники с профилями, последнее сообщение и число непрочитанных для user.
+        Порядок задаётся явно: Meta.ordering не применяется к запросам с агрегацией.
+        """
+        last_message = Message.objects.filter(
+            conversation=OuterRef('pk')
+        ).order_by('-created_at', '-id')
+
+        return self.select_related(
+            'participant1__profile', 'participant2__profile'
+        ).annotate(
+            last_message_content=Subquery(last_message.values('content')[:1]),
+            last_message_sender_username=Subquery(last_message.values('sender__username')[:1]),
+            last_message_created_at=Subquery(last_message.values('created_at')[:1]),
+            unread_count=Count(
+                'messages',
+                filter=Q(messages__is_read=False) & ~Q(messages__sender=user)
+            ),
+        ).order_by('-updated_at', '-id')
+
+
 class Conversation(models.Model):
     """Диалог между двумя пользователями"""
     participant1 = models.ForeignKey(
@@ -20,6 +48,8 @@ class Conversation(models.Model):
     created_at = models.DateTimeField(_('создан'), auto_now_add=True)
     updated_at = models.DateTimeField(_('обновлён'), auto_now=True)
 
+    objects = ConversationQuerySet.as_manager()
+
     class Meta:
         verbose_name = _('диалог')
         verbose_name_plural = _('диалоги')
@@ -64,6 +94,14 @@ class Message(models.Model):
         verbose_name = _('сообщение')
         verbose_name_plural = _('сообщения')
         ordering = ['created_at']
+        indexes = [
+            # Непрочитанные сообщения диалога от собеседника (счётчики в списке диалогов и значке)
+            models.Index(
+                fields=['conversation', 'sender'],
+                condition=Q(is_read=False),
+                name='msg_unread_idx',
+            ),
+        ]
 
     def __str__(self):
         return f'{self.sender.username}: {self.content[:50]}...'
@@ -53,18 +53,30 @@ class ConversationListSerializer(serializers.ModelSerializer):
         }
 
     def get_last_message(self, obj):
-        last = obj.messages.order_by('-created_at').first()
-        if not last:
-            return None
+        # Аннотации из Conversation.objects.with_inbox_data()
+        if hasattr(obj, 'last_message_created_at'):
+            if obj.last_message_created_at is None:
+                return None
+            content = obj.last_message_content
+            sender_username = obj.last_message_sender_username
+            created_at = obj.last_message_created_at
+        else:
+            last = obj.messages.select_related('sender').order_by('-created_at').first()
+            if not last:
+                return None
+            content = last.content
+            sender_username = last.sender.username
+            created_at = last.created_at
         return {
-            'content': last.content[:80] + ('...' if len(last.content) > 80 else ''),
-            'sender_username': last.sender.username,
-            'created_at': last.created_at,
+            'content': content[:80] + ('...' if len(content) > 80 else ''),
+            'sender_username': sender_username,
+            'created_at': created_at,
         }
 
     def get_unread_count(self, obj):
+        if hasattr(obj, 'unread_count'):
+            return obj.unread_count
         current_user = self.context['request'].user
         return obj.messages.filter(
-            conversation=obj,
             is_read=False
         ).exclude(sender=current_user).count()
@@ -1,3 +1,115 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from users.models import User
+from .models import Conversation, Message
+
+
+class ConversationInboxTests(TestCase):
+    """Список диалогов строится за постоянное число запросов"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='owner', email='owner@example.com', password='pass', is_approved=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('messages_app:conversation_list')
+
+    def create_conversations(self, count):
+        start = User.objects.count()
+        for i in range(start, start + count):
+            other = User.objects.create_user(
+                username=f'user{i}', email=f'user{i}@example.com', password='pass', is_approved=True
+            )
+            conv = Conversation.get_or_create_between(self.user, other)
+            Message.objects.create(conversation=conv, sender=other, content='Привет')
+            Message.objects.create(conversation=conv, sender=self.user, content='Здравствуй')
+            Message.objects.create(conversation=conv, sender=other, content='Как дела?')
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_inbox_has_fixed_query_count(self):
+        self.create_conversations(1)
+        self.client.get(self.url)
+        few, _ = self.count_queries()
+
+        self.create_conversations(6)
+        many, response = self.count_queries()
+
+        self.assertEqual(few, many)
+        conversation = response.data['results'][0]
+        self.assertEqual(conversation['unread_count'], 2)
+        self.assertEqual(conversation['last_message']['content'], 'Как дела?')
+        self.assertIn('profile', conversation['other_user'])
+
+
+@override_settings(MESSAGES_LONG_POLL_TIMEOUT=1, MESSAGES_LONG_POLL_INTERVAL=0.05)
+class MessageSyncTests(TestCase):
+    """Клиент получает только новые сообщения: по since_id и через long-poll"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='owner', email='owner@example.com', password='pass', is_approved=True
+        )
+        self.other = User.objects.create_user(
+            username='other', email='other@example.com', password='pass', is_approved=True
+        )
+        self.conv = Conversation.get_or_create_between(self.user, self.other)
+        self.first = Message.objects.create(conversation=self.conv, sender=self.other, content='Привет')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_since_id_returns_only_newer_messages(self):
+        newer = Message.objects.create(conversation=self.conv, sender=self.other, content='Ещё')
+        url = reverse('messages_app:message_list', args=[self.conv.id])
+
+        response = self.client.get(url, {'since_id': self.first.id})
+
+        self.assertEqual([m['id'] for m in response.data], [newer.id])
+        self.assertEqual(self.client.get(url, {'since_id': newer.id}).data, [])
+
+    def test_poll_returns_new_messages_immediately(self):
+        newer = Message.objects.create(conversation=self.conv, sender=self.other, content='Ещё')
+        url = reverse('messages_app:message_poll', args=[self.conv.id])
+
+        response = self.client.get(url, {'since_id': self.first.id})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([m['id'] for m in response.data], [newer.id])
+
+    def test_poll_times_out_with_no_content(self):
+        url = reverse('messages_app:message_poll', args=[self.conv.id])
+
+        response = self.client.get(url, {'since_id': self.first.id, 'timeout': 0.1})
+
+        self.assertEqual(response.status_code, 204)
+
+    @override_settings(MESSAGES_LONG_POLL_TIMEOUT=0.1)
+    def test_poll_ignores_non_finite_timeout(self):
+        url = reverse('messages_app:message_poll', args=[self.conv.id])
+
+        for timeout in ('nan', 'inf', '-inf'):
+            response = self.client.get(url, {'since_id': self.first.id, 'timeout': timeout})
+            self.assertEqual(response.status_code, 204)
+
+    def test_poll_is_forbidden_for_outsiders(self):
+        stranger = User.objects.create_user(
+            username='stranger', email='stranger@example.com', password='pass', is_approved=True
+        )
+        self.client.force_authenticate(stranger)
+        url = reverse('messages_app:message_poll', args=[self.conv.id])
+
+        response = self.client.get(url, {'since_id': 0})
+
+        self.assertEqual(response.status_code, 403)
@@ -1,27 +1,39 @@
+import math
+import time
+
 from rest_framework import generics, status, views
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
 from django.utils import timezone
 from users.permissions import IsApprovedUser
 from users.models import User
-from friends.models import BlockedUser
+from friends.cache import is_blocked_between
+from notifications.badge import invalidate_badge
+from realtime.layers import publish_to_user
 from .models import Conversation, Message
 from .serializers import (
     ConversationListSerializer, MessageSerializer, MessageCreateSerializer
 )
 
 
+def get_since_id(request):
+    """id последнего сообщения, которое уже есть у клиента, или None"""
+    try:
+        return int(request.query_params['since_id'])
+    except (KeyError, ValueError):
+        return None
+
+
 class ConversationListView(generics.ListAPIView):
     """Список диалогов текущего пользователя"""
     permission_classes = [IsAuthenticated, IsApprovedUser]
     serializer_class = ConversationListSerializer
 
     def get_queryset(self):
-        return Conversation.objects.filter(
-            Q(participant1=self.request.user) | Q(participant2=self.request.user)
-        )
+        user = self.request.user
+        return Conversation.objects.for_user(user).with_inbox_data(user)
 
 
 class ConversationDetailView(views.APIView):
@@ -32,10 +44,7 @@ class ConversationDetailView(views.APIView):
         other_user = get_object_or_404(User, username=username, is_approved=True)
         if other_user == request.user:
             return Response({'error': 'Нельзя начать диалог с собой'}, status=status.HTTP_400_BAD_REQUEST)
-        if BlockedUser.objects.filter(
-            Q(blocker=request.user, blocked=other_user) |
-            Q(blocker=other_user, blocked=request.user)
-        ).exists():
+        if is_blocked_between(request.user.id, other_user.id):
             return Response({'error': 'Действие невозможно'}, status=status.HTTP_403_FORBIDDEN)
         conv = Conversation.get_or_create_between(request.user, other_user)
         serializer = ConversationListSerializer(conv, context={'request': request})
@@ -43,7 +52,10 @@ class ConversationDetailView(views.APIView):
 
 
 class MessageListView(generics.ListAPIView):
-    """Сообщения в диалоге"""
+    """
+    Сообщения в диалоге.
+    С параметром since_id возвращает только сообщения новее указанного, без пагинации.
+    """
     permission_classes = [IsAuthenticated, IsApprovedUser]
     serializer_class = MessageSerializer
 
@@ -52,7 +64,54 @@ class MessageListView(generics.ListAPIView):
         conv = get_object_or_404(Conversation, id=conv_id)
         if self.request.user not in [conv.participant1, conv.participant2]:
             return Message.objects.none()
-        return Message.objects.filter(conversation=conv).select_related('sender')
+        queryset = Message.objects.filter(conversation=conv).select_related('sender')
+        since_id = get_since_id(self.request)
+        if since_id is not None:
+            queryset = queryset.filter(id__gt=since_id).order_by('id')[:settings.MESSAGES_SYNC_LIMIT]
+        return queryset
+
+    def paginate_queryset(self, queryset):
+        if get_since_id(self.request) is not None:
+            return None
+        return super().paginate_queryset(queryset)
+
+
+class MessagePollView(views.APIView):
+    """
+    Long-poll: держит запрос, пока в диалоге не появится сообщение новее since_id
+    или не истечёт таймаут. Если ничего не изменилось, отвечает 204.
+    """
+    permission_classes = [IsAuthenticated, IsApprovedUser]
+
+    def get(self, request, conversation_id):
+        conv = get_object_or_404(Conversation, id=conversation_id)
+        if request.user not in [conv.participant1, conv.participant2]:
+            return Response({'error': 'Нет доступа'}, status=status.HTTP_403_FORBIDDEN)
+
+        since_id = get_since_id(request)
+        if since_id is None:
+            return Response({'error': 'Требуется since_id'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            timeout = float(request.query_params.get('timeout', settings.MESSAGES_LONG_POLL_TIMEOUT))
+        except ValueError:
+            timeout = settings.MESSAGES_LONG_POLL_TIMEOUT
+        # nan и inf проходят через float(), но сделали бы ожидание бесконечным
+        if not math.isfinite(timeout):
+            timeout = settings.MESSAGES_LONG_POLL_TIMEOUT
+        deadline = time.monotonic() + min(max(timeout, 0), settings.MESSAGES_LONG_POLL_TIMEOUT)
+
+        new_messages = Message.objects.filter(
+            conversation=conv, id__gt=since_id
+        ).select_related('sender').order_by('id')
+
+        while True:
+            messages = list(new_messages[:settings.MESSAGES_SYNC_LIMIT])
+            if messages:
+                return Response(MessageSerializer(messages, many=True).data)
+            if time.monotonic() >= deadline:
+                return Response(status=status.HTTP_204_NO_CONTENT)
+            time.sleep(settings.MESSAGES_LONG_POLL_INTERVAL)
 
 
 class MessageCreateView(views.APIView):
@@ -64,10 +123,7 @@ class MessageCreateView(views.APIView):
         if request.user not in [conv.participant1, conv.participant2]:
             return Response({'error': 'Нет доступа'}, status=status.HTTP_403_FORBIDDEN)
         other = conv.get_other_participant(request.user)
-        if BlockedUser.objects.filter(
-            Q(blocker=request.user, blocked=other) |
-            Q(blocker=other, blocked=request.user)
-        ).exists():
+        if is_blocked_between(request.user.id, other.id):
             return Response({'error': 'Действие невозможно'}, status=status.HTTP_403_FORBIDDEN)
         serializer = MessageCreateSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -88,7 +144,18 @@ class MessageMarkReadView(views.APIView):
         conv = get_object_or_404(Conversation, id=conversation_id)
         if request.user not in [conv.participant1, conv.participant2]:
             return Response({'error': 'Нет доступа'}, status=status.HTTP_403_FORBIDDEN)
-        Message.objects.filter(
-            conversation=conv
-        ).exclude(sender=request.user).update(is_read=True, read_at=timezone.now())
+        read_at = timezone.now()
+        updated = Message.objects.filter(
+            conversation=conv, is_read=False
+        ).exclude(sender=request.user).update(is_read=True, read_at=read_at)
+        if updated:
+            # update() не вызывает сигналы, поэтому значок сбрасывается явно
+            invalidate_badge(request.user.id)
+            # Собеседник видит отметку о прочтении без перезагрузки
+            publish_to_user(conv.get_other_participant(request.user).id, {
+                'type': 'message.read',
+                'conversation_id': conv.id,
+                'reader_id': request.user.id,
+                'read_at': read_at.isoformat(),
+            })
         return Response({'status': 'ok'})
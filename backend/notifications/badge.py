@@ -0,0 +1,84 @@
+"""
+Счётчики для значка уведомлений: уведомления администрации, внутренние
+уведомления и непрочитанные сообщения.
+
+Счётчики кэшируются на пользователя. Ключ включает глобальную версию
+уведомлений администрации, поэтому их изменение сбрасывает кэш всех
+пользователей одной записью. Личные счётчики сбрасываются сигналами
+(см. notifications.signals) и явно там, где используется QuerySet.update().
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Q
+from friends.models import InternalNotification
+from messages_app.models import Message
+from users.models import User
+from .models import Notification, UserNotificationStatus
+
+BADGE_KEY = 'badge:{}:{}'
+VERSION_KEY = 'badge:notifications_version'
+
+
+def get_notifications_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(VERSION_KEY, version, None)
+    return version
+
+
+def bump_notifications_version():
+    """Сбрасывает значки всех пользователей (изменились уведомления администрации)"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 2, None)
+
+
+def invalidate_badge(*user_ids):
+    version = get_notifications_version()
+    cache.delete_many([BADGE_KEY.format(user_id, version) for user_id in user_ids])
+
+
+def count_badge(user_id):
+    """Счётчики из БД; None, если пользователь не одобрен"""
+    if not User.objects.filter(id=user_id, is_active=True, is_approved=True).exists():
+        return None
+
+    seen = UserNotificationStatus.objects.filter(
+        Q(is_read=True) | Q(is_dismissed=True),
+        user_id=user_id, notification=OuterRef('pk')
+    )
+    notifications = Notification.objects.filter(is_active=True).exclude(Exists(seen)).count()
+    internal = InternalNotification.objects.filter(user_id=user_id, is_read=False).count()
+    messages = Message.objects.filter(
+        Q(conversation__participant1_id=user_id) | Q(conversation__participant2_id=user_id),
+        is_read=False
+    ).exclude(sender_id=user_id).count()
+
+    return {
+        'notifications': notifications,
+        'internal_notifications': internal,
+        'messages': messages,
+        'total': notifications + internal + messages,
+    }
+
+
+def get_badge(user_id):
+    """
+    Пара (counts, etag) из кэша или БД.
+    counts равен None, если пользователю значок недоступен.
+    """
+    key = BADGE_KEY.format(user_id, get_notifications_version())
+    badge = cache.get(key)
+
+    if badge is None:
+        counts = count_badge(user_id)
+        etag = '"{}"'.format(hashlib.md5(json.dumps(counts, sort_keys=True).encode()).hexdigest())
+        badge = (counts, etag)
+        cache.set(key, badge, settings.BADGE_CACHE_TIMEOUT)
+
+    return badge
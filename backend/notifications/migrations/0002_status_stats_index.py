@@ -0,0 +1,19 @@
+# Generated by Django 5.0.1 on 2026-10-18 09:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usernotificationstatus',
+            index=models.Index(fields=['notification', 'is_read', 'is_dismissed'], name='notif_status_stats_idx'),
+        ),
+    ]
@@ -78,6 +78,18 @@ class UserNotificationStatus(models.Model):
         verbose_name_plural = _('статусы уведомлений')
         unique_together = ['user', 'notification']
         ordering = ['-notification__created_at']
+        indexes = [
+            # Статистика по уведомлению: счётчики прочтений и закрытий без обращения к таблице
+            models.Index(fields=['notification', 'is_read', 'is_dismissed'], name='notif_status_stats_idx'),
+        ]
     
     def __str__(self):
-        return f'{self.user.username} - {self.notification.title}'
\ No newline at end of file
+        return f'{self.user.username} - {self.notification.title}'
+
+    @classmethod
+    def get_status_map(cls, user, notification_ids):
+        """{id уведомления: (is_read, is_dismissed)} для пользователя одним запросом"""
+        rows = cls.objects.filter(
+            user=user, notification_id__in=notification_ids
+        ).values_list('notification_id', 'is_read', 'is_dismissed')
+        return {notification_id: (is_read, is_dismissed) for notification_id, is_read, is_dismissed in rows}
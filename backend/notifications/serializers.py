@@ -22,25 +22,36 @@ class NotificationSerializer(serializers.ModelSerializer):
     def get_colors(self, obj):
         return Notification.TYPE_COLORS.get(obj.type, Notification.TYPE_COLORS['info'])
     
+    def get_user_status(self, obj):
+        """
+        (is_read, is_dismissed) текущего пользователя.
+        Списки передают статусы всей страницы в context['user_statuses'],
+        админка отключает их через context['skip_user_status'].
+        """
+        if self.context.get('skip_user_status'):
+            return (None, None)
+
+        statuses = self.context.get('user_statuses')
+        if statuses is not None:
+            return statuses.get(obj.id, (False, False))
+
+        # Карты нет (одиночный объект или вложенный список): статус этого
+        # уведомления запоминается на нём самом, а не в общем контексте,
+        # иначе остальные элементы списка не нашли бы в карте свои id
+        if not hasattr(obj, '_user_status'):
+            request = self.context.get('request')
+            if not (request and request.user.is_authenticated):
+                return (False, False)
+            obj._user_status = UserNotificationStatus.get_status_map(
+                request.user, [obj.id]
+            ).get(obj.id, (False, False))
+        return obj._user_status
+
     def get_is_dismissed(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            status = UserNotificationStatus.objects.filter(
-                user=request.user,
-                notification=obj
-            ).first()
-            return status.is_dismissed if status else False
-        return False
-    
+        return self.get_user_status(obj)[1]
+
     def get_is_read(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            status = UserNotificationStatus.objects.filter(
-                user=request.user,
-                notification=obj
-            ).first()
-            return status.is_read if status else False
-        return False
+        return self.get_user_status(obj)[0]
 
 
 class NotificationCreateUpdateSerializer(serializers.ModelSerializer):  
@@ -0,0 +1,31 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from friends.models import InternalNotification
+from messages_app.models import Message
+from users.models import User
+from .badge import bump_notifications_version, invalidate_badge
+from .models import Notification, UserNotificationStatus
+
+
+@receiver([post_save, post_delete], sender=Notification)
+def reset_badges_on_notification_change(sender, instance, **kwargs):
+    bump_notifications_version()
+
+
+@receiver([post_save, post_delete], sender=UserNotificationStatus)
+@receiver([post_save, post_delete], sender=InternalNotification)
+def reset_badge_on_user_notification_change(sender, instance, **kwargs):
+    invalidate_badge(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Message)
+def reset_badges_on_message_change(sender, instance, **kwargs):
+    conv = instance.conversation
+    invalidate_badge(conv.participant1_id, conv.participant2_id)
+
+
+@receiver(post_save, sender=User)
+def reset_badge_on_user_change(sender, instance, created, **kwargs):
+    # Одобрение или блокировка пользователя меняет доступ к значку
+    if not created:
+        invalidate_badge(instance.id)
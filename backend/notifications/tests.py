@@ -1,3 +1,187 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from friends.models import InternalNotification
+from messages_app.models import Conversation, Message
+from users.models import User
+from .models import Notification, UserNotificationStatus
+from .serializers import NotificationSerializer
+
+
+class NotificationStatusBatchTests(TestCase):
+    """Статусы пользователя для страницы уведомлений читаются одним запросом"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='pass',
+            is_approved=True, is_staff=True
+        )
+        self.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass', is_approved=True
+        )
+        self.client = APIClient()
+
+    def create_notifications(self, count):
+        return [
+            Notification.objects.create(title=f'Новость {i}', message='Текст', created_by=self.admin)
+            for i in range(count)
+        ]
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_active_notifications_have_fixed_query_count(self):
+        url = reverse('notifications:active_notifications')
+        self.client.force_authenticate(self.user)
+        first, second = self.create_notifications(2)
+        UserNotificationStatus.objects.create(user=self.user, notification=first, is_read=True)
+        UserNotificationStatus.objects.create(
+            user=self.user, notification=second, is_read=True, is_dismissed=True
+        )
+        self.client.get(url)
+        few, _ = self.count_queries(url)
+
+        self.create_notifications(6)
+        many, response = self.count_queries(url)
+
+        self.assertEqual(few, many)
+        by_id = {n['id']: n for n in response.data['results']}
+        self.assertEqual((by_id[first.id]['is_read'], by_id[first.id]['is_dismissed']), (True, False))
+        self.assertEqual((by_id[second.id]['is_read'], by_id[second.id]['is_dismissed']), (True, True))
+        unread = [n for n in by_id.values() if n['id'] not in (first.id, second.id)]
+        self.assertTrue(all(not n['is_read'] and not n['is_dismissed'] for n in unread))
+
+    def test_list_without_precomputed_map_reports_each_status(self):
+        first, second = self.create_notifications(2)
+        UserNotificationStatus.objects.create(user=self.user, notification=second, is_read=True)
+        request = APIRequestFactory().get('/')
+        request.user = self.user
+
+        data = NotificationSerializer([first, second], many=True, context={'request': request}).data
+
+        self.assertEqual([n['is_read'] for n in data], [False, True])
+
+    def test_admin_list_skips_user_statuses(self):
+        url = reverse('notifications:admin_list')
+        self.client.force_authenticate(self.admin)
+        self.create_notifications(2)
+        self.client.get(url)
+        few, _ = self.count_queries(url)
+
+        self.create_notifications(6)
+        many, response = self.count_queries(url)
+
+        self.assertEqual(few, many)
+        self.assertIsNone(response.data['results'][0]['is_read'])
+
+
+class NotificationStatsTests(TestCase):
+    """Статистика считается одним агрегирующим запросом"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='pass',
+            is_approved=True, is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.first = Notification.objects.create(title='Первое', message='Текст', created_by=self.admin)
+        self.second = Notification.objects.create(title='Второе', message='Текст', created_by=self.admin)
+        now = timezone.now()
+        for i in range(4):
+            user = User.objects.create_user(
+                username=f'user{i}', email=f'user{i}@example.com', password='pass', is_approved=True
+            )
+            UserNotificationStatus.objects.create(
+                user=user, notification=self.first,
+                is_read=i < 3, read_at=now if i < 3 else None, is_dismissed=i == 0
+            )
+            UserNotificationStatus.objects.create(user=user, notification=self.second)
+
+    def test_single_notification_stats(self):
+        url = reverse('notifications:admin_stats', args=[self.first.id])
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+
+        self.assertEqual(
+            [response.data[key] for key in ('total_interactions', 'read_count', 'dismissed_count')],
+            [4, 3, 1]
+        )
+        self.assertEqual(response.data['read_rate'], 0.75)
+        self.assertEqual(response.data['timeline'][0]['read_count'], 3)
+        aggregates = [q for q in ctx.captured_queries if 'COUNT(' in q['sql'] and 'GROUP BY' not in q['sql']]
+        self.assertEqual(len(aggregates), 1)
+
+    def test_stats_for_all_notifications(self):
+        response = self.client.get(reverse('notifications:admin_stats_all'))
+
+        self.assertIsNone(response.data['notification_id'])
+        self.assertEqual(
+            [response.data[key] for key in ('total_interactions', 'read_count', 'dismissed_count')],
+            [8, 3, 1]
+        )
+
+
+class BadgeTests(TestCase):
+    """Значок: кэшированные счётчики, ETag и сброс при изменениях"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass', is_approved=True
+        )
+        self.other = User.objects.create_user(
+            username='other', email='other@example.com', password='pass', is_approved=True
+        )
+        self.conv = Conversation.get_or_create_between(self.user, self.other)
+        Notification.objects.create(title='Новость', message='Текст')
+        InternalNotification.objects.create(
+            user=self.user, from_user=self.other, notification_type='new_subscriber'
+        )
+        Message.objects.create(conversation=self.conv, sender=self.other, content='Привет')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        self.url = reverse('notifications:badge')
+
+    def test_counts_and_not_modified_without_queries(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.data, {
+            'notifications': 1, 'internal_notifications': 1, 'messages': 1, 'total': 3
+        })
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_invalidate_badge(self):
+        etag = self.client.get(self.url)['ETag']
+
+        Message.objects.create(conversation=self.conv, sender=self.other, content='Ещё')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['messages'], 2)
+
+        Notification.objects.create(title='Ещё новость', message='Текст')
+        self.assertEqual(self.client.get(self.url).data['notifications'], 2)
+
+        writer = APIClient()
+        writer.force_authenticate(self.user)
+        writer.post(reverse('messages_app:message_mark_read', args=[self.conv.id]))
+        writer.post(reverse('friends:mark_all_read'))
+        self.assertEqual(self.client.get(self.url).data['total'], 2)
+
+    def test_unapproved_user_is_forbidden(self):
+        self.user.is_approved = False
+        self.user.save()
+
+        self.assertEqual(self.client.get(self.url).status_code, 403)
@@ -12,9 +12,11 @@ urlpatterns = [
     path('<int:notification_id>/dismiss/', views.DismissNotificationView.as_view(), name='dismiss_notification'),
     path('<int:notification_id>/read/', views.MarkNotificationReadView.as_view(), name='mark_read'),
     path('unread-count/', views.UnreadNotificationsCountView.as_view(), name='unread_count'),
+    path('badge/', views.BadgeView.as_view(), name='badge'),
 
     path('admin/list/', views.AdminNotificationListView.as_view(), name='admin_list'),
     path('admin/create/', views.AdminNotificationCreateView.as_view(), name='admin_create'),
     path('admin/<int:pk>/', views.AdminNotificationDetailView.as_view(), name='admin_detail'),
+    path('admin/stats/', views.AdminNotificationStatsView.as_view(), name='admin_stats_all'),
     path('admin/<int:notification_id>/stats/', views.AdminNotificationStatsView.as_view(), name='admin_stats'),
 ]
\ No newline at end of file
@@ -1,12 +1,19 @@
+from datetime import timedelta
+
 from rest_framework import generics, status, views
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
 from users.permissions import IsApprovedUser
 from django.contrib.admin.views.decorators import staff_member_required
 from rest_framework.permissions import IsAdminUser as DjangoIsAdminUser
 
+from .badge import get_badge
 from .models import Notification, UserNotificationStatus
 from .serializers import (
     NotificationSerializer,
@@ -20,7 +27,18 @@ class ActiveNotificationsView(generics.ListAPIView):
     permission_classes = [IsAuthenticated, IsApprovedUser]
     
     def get_queryset(self):
-        return Notification.objects.filter(is_active=True)
+        return Notification.objects.filter(is_active=True).select_related('created_by')
+
+    def get_serializer(self, *args, **kwargs):
+        # Статусы пользователя для всей страницы загружаются одним запросом
+        if kwargs.get('many') and args:
+            notifications = list(args[0])
+            context = kwargs.setdefault('context', self.get_serializer_context())
+            context['user_statuses'] = UserNotificationStatus.get_status_map(
+                self.request.user, [n.id for n in notifications]
+            )
+            args = (notifications,) + args[1:]
+        return super().get_serializer(*args, **kwargs)
 
 
 class DismissNotificationView(views.APIView):
@@ -89,10 +107,40 @@ class UnreadNotificationsCountView(views.APIView):
         }, status=status.HTTP_200_OK)
 
 
+class BadgeView(views.APIView):
+    """
+    Все счётчики значка одним запросом: уведомления администрации,
+    внутренние уведомления и непрочитанные сообщения.
+    Аутентификация без обращения к БД, счётчики берутся из кэша,
+    а при совпадении If-None-Match возвращается 304.
+    """
+    authentication_classes = [JWTStatelessUserAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        counts, etag = get_badge(request.user.id)
+        if counts is None:
+            return Response({'detail': IsApprovedUser.message}, status=status.HTTP_403_FORBIDDEN)
+
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(counts)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
 class AdminNotificationListView(generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [DjangoIsAdminUser]
-    queryset = Notification.objects.all()
+    queryset = Notification.objects.select_related('created_by')
+
+    def get_serializer_context(self):
+        # Личные статусы администратора в списке не нужны
+        context = super().get_serializer_context()
+        context['skip_user_status'] = True
+        return context
 
 
 class AdminNotificationCreateView(generics.CreateAPIView):
@@ -109,29 +157,54 @@ class AdminNotificationDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Notification.objects.all()
 
 
+def get_status_counts(statuses):
+    """Всего взаимодействий, прочтений и закрытий одним агрегирующим запросом"""
+    return statuses.aggregate(
+        total_interactions=Count('id'),
+        read_count=Count('id', filter=Q(is_read=True)),
+        dismissed_count=Count('id', filter=Q(is_dismissed=True)),
+    )
+
+
+def get_read_timeline(statuses, total, days):
+    """Прочтения по дням за последние days дней и их доля от всех взаимодействий"""
+    since = timezone.now() - timedelta(days=days)
+    rows = statuses.filter(read_at__gte=since).annotate(
+        date=TruncDate('read_at')
+    ).values('date').annotate(reads=Count('id')).order_by('date')
+    return [
+        {
+            'date': row['date'],
+            'read_count': row['reads'],
+            'read_rate': round(row['reads'] / total, 4) if total else 0,
+        }
+        for row in rows
+    ]
+
+
 class AdminNotificationStatsView(views.APIView):
+    """
+    Статистика по одному уведомлению (notification_id в URL) или по всем сразу.
+    Параметр days задаёт период для динамики прочтений (по умолчанию 30 дней).
+    """
     permission_classes = [DjangoIsAdminUser]
-    
-    def get(self, request, notification_id):
-        notification = get_object_or_404(Notification, id=notification_id)
-        
-        total_users = UserNotificationStatus.objects.filter(
-            notification=notification
-        ).count()
-        
-        read_count = UserNotificationStatus.objects.filter(
-            notification=notification,
-            is_read=True
-        ).count()
-        
-        dismissed_count = UserNotificationStatus.objects.filter(
-            notification=notification,
-            is_dismissed=True
-        ).count()
-        
+
+    def get(self, request, notification_id=None):
+        statuses = UserNotificationStatus.objects.order_by()
+        if notification_id is not None:
+            get_object_or_404(Notification, id=notification_id)
+            statuses = statuses.filter(notification_id=notification_id)
+
+        try:
+            days = min(max(int(request.query_params.get('days', 30)), 1), 365)
+        except ValueError:
+            days = 30
+
+        counts = get_status_counts(statuses)
+        total = counts['total_interactions']
         return Response({
             'notification_id': notification_id,
-            'total_interactions': total_users,
-            'read_count': read_count,
-            'dismissed_count': dismissed_count,
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+            **counts,
+            'read_rate': round(counts['read_count'] / total, 4) if total else 0,
+            'timeline': get_read_timeline(statuses, total, days),
+        }, status=status.HTTP_200_OK)
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class RealtimeConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'realtime'
+    verbose_name = 'Уведомления в реальном времени'
+
+    def ready(self):
+        import realtime.signals
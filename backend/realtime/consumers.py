@@ -0,0 +1,119 @@
+"""
+WebSocket-обработчик (чистый ASGI, без сторонних зависимостей).
+
+Клиент подключается к /ws/ и первым сообщением отправляет
+{"type": "auth", "token": <access JWT>}: токен не попадает в URL, а значит
+и в журналы прокси. После ответа {"type": "ready"} клиент получает
+JSON-события своей группы user_<id>: новые сообщения, прочтения и
+внутренние уведомления. Остальные сообщения от клиента игнорируются,
+кроме {"type": "ping"}.
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from .layers import get_channel_layer, user_group
+
+CLOSE_UNAUTHORIZED = 4401
+DISCONNECTED = object()
+
+
+@sync_to_async
+def authenticate(token):
+    """
+    Пользователь по access-токену или None. Процесс живёт долго, поэтому, как
+    database_sync_to_async в Channels, соединение с БД проверяется до и после
+    запроса: иначе после перезапуска или простоя БД авторизация ломалась бы
+    до перезапуска процесса.
+    """
+    if not token or not isinstance(token, str):
+        return None
+    try:
+        user_id = AccessToken(token)[api_settings.USER_ID_CLAIM]
+    except (TokenError, KeyError):
+        return None
+
+    close_old_connections()
+    try:
+        user = get_user_model().objects.filter(id=user_id, is_active=True).first()
+    finally:
+        close_old_connections()
+    if user is None or not user.is_approved:
+        return None
+    return user
+
+
+async def receive_auth(receive):
+    """
+    Токен из первого сообщения клиента, None при таймауте или другом
+    сообщении, DISCONNECTED, если клиент отключился
+    """
+    try:
+        message = await asyncio.wait_for(receive(), settings.REALTIME_AUTH_TIMEOUT)
+    except asyncio.TimeoutError:
+        return None
+    if message['type'] == 'websocket.disconnect':
+        return DISCONNECTED
+    data = parse_json(message)
+    return data.get('token') if data.get('type') == 'auth' else None
+
+
+async def websocket_application(scope, receive, send):
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+
+    await send({'type': 'websocket.accept'})
+    token = await receive_auth(receive)
+    if token is DISCONNECTED:
+        return
+    user = await authenticate(token)
+    if user is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
+        return
+
+    layer = get_channel_layer()
+    group = user_group(user.id)
+    queue = layer.subscribe(group)
+    await send({'type': 'websocket.send', 'text': json.dumps({'type': 'ready'})})
+
+    receive_task = asyncio.ensure_future(receive())
+    event_task = asyncio.ensure_future(queue.get())
+    try:
+        while True:
+            done, _ = await asyncio.wait(
+                {receive_task, event_task}, return_when=asyncio.FIRST_COMPLETED
+            )
+            if event_task in done:
+                await send({'type': 'websocket.send', 'text': json.dumps(event_task.result())})
+                event_task = asyncio.ensure_future(queue.get())
+
+            if receive_task in done:
+                message = receive_task.result()
+                if message['type'] == 'websocket.disconnect':
+                    break
+                if is_ping(message):
+                    await send({'type': 'websocket.send', 'text': json.dumps({'type': 'pong'})})
+                receive_task = asyncio.ensure_future(receive())
+    finally:
+        receive_task.cancel()
+        event_task.cancel()
+        layer.unsubscribe(group, queue)
+
+
+def parse_json(message):
+    try:
+        data = json.loads(message.get('text') or '{}')
+    except (ValueError, AttributeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def is_ping(message):
+    return parse_json(message).get('type') == 'ping'
@@ -0,0 +1,173 @@
+"""
+Слой каналов: доставка событий в WebSocket-соединения по группам.
+
+Группа пользователя — user_<id>. Синхронный код (views, сигналы, воркеры)
+публикует событие через publish_to_user(), а открытые соединения этого
+пользователя получают его из своей очереди.
+
+Класс слоя задаётся настройкой REALTIME_CHANNEL_LAYER. PostgresChannelLayer
+передаёт события между процессами через LISTEN/NOTIFY: публиковать можно
+из HTTP-воркеров, email_worker и команд, а доставляет их отдельный
+ASGI-процесс realtime. InMemoryChannelLayer работает в пределах одного
+процесса и годится только для разработки и тестов.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+from collections import defaultdict
+
+import psycopg2
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL не принимает NOTIFY с payload длиннее 8000 байт
+MAX_NOTIFY_PAYLOAD = 7900
+LISTEN_POLL_SECONDS = 1
+LISTEN_RECONNECT_DELAY = 5
+
+_layer = None
+_layer_lock = threading.Lock()
+
+
+class InMemoryChannelLayer:
+    """Группы и очереди подписчиков в памяти процесса"""
+
+    def __init__(self):
+        self._groups = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, group):
+        """Подписывает текущий event loop на группу. Возвращает очередь событий."""
+        queue = asyncio.Queue(maxsize=settings.REALTIME_QUEUE_SIZE)
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._groups[group].add(subscriber)
+        return queue
+
+    def unsubscribe(self, group, queue):
+        with self._lock:
+            subscribers = self._groups.get(group, set())
+            subscribers.difference_update({s for s in subscribers if s[1] is queue})
+            if not subscribers:
+                self._groups.pop(group, None)
+
+    def publish(self, group, event):
+        """Отправляет событие всем подписчикам группы. Можно вызывать из любого потока."""
+        with self._lock:
+            subscribers = list(self._groups.get(group, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(_put_nowait, queue, event)
+
+    def group_size(self, group):
+        with self._lock:
+            return len(self._groups.get(group, ()))
+
+
+class PostgresChannelLayer(InMemoryChannelLayer):
+    """
+    Межпроцессный слой на LISTEN/NOTIFY. publish() выполняет pg_notify через
+    соединение Django, поэтому событие уходит только после коммита транзакции.
+    Процесс с открытыми соединениями слушает канал в отдельном потоке
+    (запускается при первой подписке) и раздаёт события локальным очередям.
+    """
+    channel = 'realtime_events'
+
+    def __init__(self):
+        super().__init__()
+        self.listening = threading.Event()
+        self._stopping = threading.Event()
+        self._listener = None
+
+    def subscribe(self, group):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='realtime-listener', daemon=True)
+                self._listener.start()
+        return super().subscribe(group)
+
+    def publish(self, group, event):
+        payload = json.dumps({'group': group, 'event': event}, ensure_ascii=False)
+        if len(payload.encode()) > MAX_NOTIFY_PAYLOAD:
+            logger.warning('Событие %s для %s не отправлено: слишком большое', event.get('type'), group)
+            return
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.channel, payload])
+
+    def close(self):
+        """Останавливает поток-слушатель (тесты, завершение процесса)"""
+        self._stopping.set()
+        if self._listener is not None:
+            self._listener.join(LISTEN_POLL_SECONDS * 2)
+
+    def _listen(self):
+        while not self._stopping.is_set():
+            conn = None
+            try:
+                conn = connection.get_new_connection(connection.get_connection_params())
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN {self.channel}')
+                self.listening.set()
+                while not self._stopping.is_set():
+                    if select.select([conn], [], [], LISTEN_POLL_SECONDS) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self._dispatch(conn.notifies.pop(0).payload)
+            except (psycopg2.Error, OSError):
+                # Пропущенные за время переподключения события клиенты догружают через API
+                logger.exception('Соединение LISTEN потеряно, переподключение')
+                self.listening.clear()
+                self._stopping.wait(LISTEN_RECONNECT_DELAY)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def _dispatch(self, payload):
+        try:
+            message = json.loads(payload)
+            group, event = message['group'], message['event']
+        except (ValueError, KeyError, TypeError):
+            return
+        super().publish(group, event)
+
+
+def _put_nowait(queue, event):
+    # Медленный клиент теряет события, а не копит их в памяти:
+    # после переподключения он догружает пропущенное через API
+    if not queue.full():
+        queue.put_nowait(event)
+
+
+def get_channel_layer():
+    global _layer
+    if _layer is None:
+        with _layer_lock:
+            if _layer is None:
+                _layer = import_string(settings.REALTIME_CHANNEL_LAYER)()
+    return _layer
+
+
+def reset_channel_layer():
+    """Сбрасывает слой, чтобы при следующем обращении он создался заново по настройкам"""
+    global _layer
+    with _layer_lock:
+        if _layer is not None and hasattr(_layer, 'close'):
+            _layer.close()
+        _layer = None
+
+
+def user_group(user_id):
+    return f'user_{user_id}'
+
+
+def publish_to_user(user_id, event):
+    """Публикует событие пользователю после фиксации текущей транзакции"""
+    transaction.on_commit(
+        lambda: get_channel_layer().publish(user_group(user_id), event)
+    )
@@ -0,0 +1,34 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from friends.models import InternalNotification
+from messages_app.models import Message
+from messages_app.serializers import MessageSerializer
+from .layers import publish_to_user
+
+
+@receiver(post_save, sender=Message)
+def push_new_message(sender, instance, created, **kwargs):
+    """Новое сообщение уходит обоим участникам диалога"""
+    if not created:
+        return
+
+    conv = instance.conversation
+    event = {
+        'type': 'message.new',
+        'conversation_id': conv.id,
+        'message': MessageSerializer(instance).data,
+    }
+    for user_id in {conv.participant1_id, conv.participant2_id}:
+        publish_to_user(user_id, event)
+
+
+@receiver(post_save, sender=InternalNotification)
+def push_internal_notification(sender, instance, created, **kwargs):
+    if not created:
+        return
+
+    publish_to_user(instance.user_id, {
+        'type': 'notification.new',
+        'id': instance.id,
+        'notification_type': instance.notification_type,
+    })
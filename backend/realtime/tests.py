@@ -0,0 +1,165 @@
+import asyncio
+import json
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework.test import APIClient
+from django.urls import reverse
+
+from friends.models import InternalNotification
+from messages_app.models import Conversation, Message
+from users.models import User
+from .consumers import CLOSE_UNAUTHORIZED, authenticate, websocket_application
+from .layers import get_channel_layer, reset_channel_layer, user_group
+
+
+class RecordingLayer:
+    """Заглушка слоя: запоминает опубликованные события"""
+
+    def __init__(self):
+        self.events = []
+
+    def publish(self, group, event):
+        self.events.append((group, event))
+
+
+@override_settings(REALTIME_CHANNEL_LAYER='realtime.tests.RecordingLayer')
+class RealtimeEventsTests(TestCase):
+    """Сообщения, прочтения и уведомления публикуются в группы пользователей"""
+
+    def setUp(self):
+        reset_channel_layer()
+        self.addCleanup(reset_channel_layer)
+        self.alice = User.objects.create_user(
+            username='alice', email='alice@example.com', password='pass', is_approved=True
+        )
+        self.bob = User.objects.create_user(
+            username='bob', email='bob@example.com', password='pass', is_approved=True
+        )
+        self.conv = Conversation.get_or_create_between(self.alice, self.bob)
+
+    def published(self):
+        return get_channel_layer().events
+
+    def test_new_message_is_pushed_to_both_participants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            message = Message.objects.create(conversation=self.conv, sender=self.alice, content='Привет')
+
+        self.assertEqual(
+            sorted(group for group, _ in self.published()),
+            [user_group(self.alice.id), user_group(self.bob.id)]
+        )
+        _, event = self.published()[0]
+        self.assertEqual(event['type'], 'message.new')
+        self.assertEqual(event['message']['id'], message.id)
+
+    def test_mark_read_pushes_receipt_to_sender(self):
+        Message.objects.create(conversation=self.conv, sender=self.alice, content='Привет')
+        self.published().clear()
+        client = APIClient()
+        client.force_authenticate(self.bob)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post(reverse('messages_app:message_mark_read', args=[self.conv.id]))
+            client.post(reverse('messages_app:message_mark_read', args=[self.conv.id]))
+
+        self.assertEqual(len(self.published()), 1)
+        group, event = self.published()[0]
+        self.assertEqual(group, user_group(self.alice.id))
+        self.assertEqual((event['type'], event['reader_id']), ('message.read', self.bob.id))
+
+    def test_internal_notification_is_pushed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            InternalNotification.objects.create(
+                user=self.bob, from_user=self.alice, notification_type='new_subscriber'
+            )
+
+        group, event = self.published()[-1]
+        self.assertEqual(group, user_group(self.bob.id))
+        self.assertEqual(event['type'], 'notification.new')
+
+
+@override_settings(REALTIME_CHANNEL_LAYER='realtime.layers.InMemoryChannelLayer', REALTIME_AUTH_TIMEOUT=0.2)
+class WebSocketConsumerTests(TestCase):
+    """Соединение принимается по JWT из первого сообщения и получает события своей группы"""
+
+    def setUp(self):
+        reset_channel_layer()
+        self.addCleanup(reset_channel_layer)
+        # Внутри транзакции TestCase соединение закрывать нельзя
+        patcher = mock.patch('realtime.consumers.close_old_connections')
+        self.close_old_connections = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(
+            username='alice', email='alice@example.com', password='pass', is_approved=True
+        )
+
+    async def connect(self, query_string=b''):
+        scope = {'type': 'websocket', 'path': '/ws/', 'query_string': query_string}
+        communicator = ApplicationCommunicator(websocket_application, scope)
+        await communicator.send_input({'type': 'websocket.connect'})
+        self.assertEqual((await communicator.receive_output(1))['type'], 'websocket.accept')
+        return communicator
+
+    async def authenticate(self, communicator, token):
+        await communicator.send_input({
+            'type': 'websocket.receive', 'text': json.dumps({'type': 'auth', 'token': str(token)})
+        })
+        return await communicator.receive_output(1)
+
+    @async_to_sync
+    async def test_authenticated_socket_receives_group_events(self):
+        communicator = await self.connect()
+        output = await self.authenticate(communicator, AccessToken.for_user(self.user))
+        self.assertEqual(json.loads(output['text']), {'type': 'ready'})
+
+        get_channel_layer().publish(user_group(self.user.id), {'type': 'notification.new', 'id': 1})
+        output = await communicator.receive_output(1)
+        self.assertEqual(json.loads(output['text']), {'type': 'notification.new', 'id': 1})
+
+        await communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        await communicator.wait(1)
+        self.assertEqual(get_channel_layer().group_size(user_group(self.user.id)), 0)
+
+    @async_to_sync
+    async def test_invalid_token_is_rejected(self):
+        communicator = await self.connect()
+        output = await self.authenticate(communicator, 'garbage')
+        self.assertEqual((output['type'], output['code']), ('websocket.close', CLOSE_UNAUTHORIZED))
+
+    def test_authentication_drops_stale_database_connections(self):
+        user = async_to_sync(authenticate)(str(AccessToken.for_user(self.user)))
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(self.close_old_connections.call_count, 2)
+
+    @async_to_sync
+    async def test_token_in_query_string_is_not_accepted(self):
+        token = AccessToken.for_user(self.user)
+        communicator = await self.connect(f'token={token}'.encode())
+        output = await communicator.receive_output(1)
+        self.assertEqual((output['type'], output['code']), ('websocket.close', CLOSE_UNAUTHORIZED))
+
+
+@override_settings(REALTIME_CHANNEL_LAYER='realtime.layers.PostgresChannelLayer')
+class PostgresChannelLayerTests(TransactionTestCase):
+    """События, опубликованные через NOTIFY, доходят до подписчиков слушающего процесса"""
+
+    def setUp(self):
+        reset_channel_layer()
+        self.addCleanup(reset_channel_layer)
+
+    @async_to_sync
+    async def test_published_event_reaches_local_subscriber(self):
+        layer = get_channel_layer()
+        queue = layer.subscribe(user_group(1))
+        self.assertTrue(await sync_to_async(layer.listening.wait)(5))
+
+        await sync_to_async(layer.publish)(user_group(1), {'type': 'message.new', 'text': 'Привет'})
+
+        event = await asyncio.wait_for(queue.get(), 5)
+        self.assertEqual(event, {'type': 'message.new', 'text': 'Привет'})
+        layer.unsubscribe(user_group(1), queue)
@@ -13,4 +13,20 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'retro_blog_project.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from realtime.consumers import websocket_application  # noqa: E402  (после инициализации Django)
+
+
+async def application(scope, receive, send):
+    """
+    WebSocket по /ws/ — realtime. В docker-compose этот процесс получает только
+    /ws/ (сервис realtime), HTTP API обслуживает gunicorn через WSGI; разбор
+    HTTP здесь оставлен для локального запуска одним процессом.
+    """
+    if scope['type'] == 'websocket':
+        if scope['path'].rstrip('/') == '/ws':
+            return await websocket_application(scope, receive, send)
+        await receive()
+        return await send({'type': 'websocket.close'})
+    return await django_application(scope, receive, send)
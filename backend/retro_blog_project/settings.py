@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     # third-party apps
     'rest_framework',
@@ -56,6 +57,7 @@ INSTALLED_APPS = [
     'notifications',
     'friends',
     'messages_app',
+    'realtime',
 ]
 
 MIDDLEWARE = [
@@ -109,6 +111,51 @@ DATABASES = {
 AUTH_USER_MODEL = 'users.User'
 
 
+# Cache
+# LocMemCache живёт внутри одного процесса: при нескольких воркерах gunicorn
+# нужен общий бэкенд (filebased, redis), иначе инвалидация не дойдёт до соседей.
+# Фоновые воркеры (изображения, лайки, письма) тоже сбрасывают кэши, поэтому
+# им нужен тот же CACHE_BACKEND/CACHE_LOCATION, что и backend
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'retro-blog'),
+    }
+}
+
+# Сколько секунд хранить закэшированные списки друзей и блокировок
+FRIEND_GRAPH_CACHE_TIMEOUT = int(os.getenv('FRIEND_GRAPH_CACHE_TIMEOUT', 600))
+# Счётчики значка уведомлений (сбрасываются сигналами, таймаут — страховка)
+BADGE_CACHE_TIMEOUT = int(os.getenv('BADGE_CACHE_TIMEOUT', 300))
+# Результаты поиска: LRU в памяти процесса с коротким TTL
+SEARCH_CACHE_TIMEOUT = int(os.getenv('SEARCH_CACHE_TIMEOUT', 60))
+SEARCH_CACHE_MAX_ENTRIES = 500
+
+# Ответ PostDetailView без данных читателя (сбрасывается сигналами, таймаут — страховка)
+POST_DETAIL_CACHE_TIMEOUT = int(os.getenv('POST_DETAIL_CACHE_TIMEOUT', 300))
+
+# Сколько первых комментариев встраивать в ответ PostDetailView;
+# остальные подгружаются страницами по COMMENTS_PAGE_SIZE (blog.pagination)
+POST_DETAIL_COMMENTS = int(os.getenv('POST_DETAIL_COMMENTS', 10))
+COMMENTS_PAGE_SIZE = int(os.getenv('COMMENTS_PAGE_SIZE', 20))
+
+# Рубрики по названию в общем кэше (Category.get_or_create_many)
+CATEGORY_CACHE_TIMEOUT = 300
+
+
+# Feed
+# 'pull' — лента собирается из всех постов при каждом запросе,
+# 'push' — посты раскладываются по материализованным лентам при публикации
+FEED_STRATEGY = os.getenv('FEED_STRATEGY', 'pull')
+# Сколько записей хранить в ленте одного пользователя
+TIMELINE_MAX_ENTRIES = int(os.getenv('TIMELINE_MAX_ENTRIES', 500))
+# Авторы с большим числом подписчиков не раскладываются, их посты читаются при запросе
+TIMELINE_FANOUT_LIMIT = int(os.getenv('TIMELINE_FANOUT_LIMIT', 1000))
+# Сколько секунд хранить список таких авторов (сбрасывается при переходе через лимит)
+TIMELINE_HIGH_FANOUT_CACHE_TIMEOUT = int(os.getenv('TIMELINE_HIGH_FANOUT_CACHE_TIMEOUT', 60))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -150,6 +197,18 @@ STATICFILES_DIRS = [BASE_DIR / 'static'] if os.path.exists(BASE_DIR / 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Варианты загруженных изображений (команда process_images): имя -> рамка (ширина, высота)
+POST_IMAGE_VARIANTS = {
+    'thumbnail': (320, 320),
+    'medium': (1024, 1024),
+}
+AVATAR_VARIANTS = {
+    'thumbnail': (64, 64),
+    'medium': (256, 256),
+}
+IMAGE_VARIANT_QUALITY = 82
+IMAGE_PROCESSING_BATCH_SIZE = int(os.getenv('IMAGE_PROCESSING_BATCH_SIZE', 20))
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
@@ -275,9 +334,40 @@ if not DEBUG:
     os.makedirs(BASE_DIR / 'logs', exist_ok=True)
 
 
+# Messages
+# Максимум сообщений в ответе инкрементальной синхронизации (since_id)
+MESSAGES_SYNC_LIMIT = 100
+# Сколько секунд long-poll держит запрос и как часто проверяет новые сообщения
+MESSAGES_LONG_POLL_TIMEOUT = int(os.getenv('MESSAGES_LONG_POLL_TIMEOUT', 25))
+MESSAGES_LONG_POLL_INTERVAL = 1
+
+# Realtime (WebSocket)
+# Класс слоя каналов: PostgresChannelLayer доставляет события из любого процесса
+# (HTTP-воркеры, email_worker, команды) в ASGI-процесс realtime
+REALTIME_CHANNEL_LAYER = os.getenv('REALTIME_CHANNEL_LAYER', 'realtime.layers.PostgresChannelLayer')
+# Сколько неотправленных событий держать на одно соединение
+REALTIME_QUEUE_SIZE = 100
+# Сколько секунд ждать сообщения с токеном после открытия WebSocket
+REALTIME_AUTH_TIMEOUT = 10
+
+
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
 
+# Загрузка вложений по частям (blog.uploads): части пишутся сразу на диск
+ATTACHMENT_UPLOAD_TEMP_DIR = os.getenv('ATTACHMENT_UPLOAD_TEMP_DIR', str(MEDIA_ROOT / 'chunked_uploads'))
+ATTACHMENT_UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024  # меньше client_max_body_size в nginx
+ATTACHMENT_UPLOAD_MAX_SIZE = int(os.getenv('ATTACHMENT_UPLOAD_MAX_SIZE', 500 * 1024 * 1024))
+ATTACHMENT_UPLOAD_EXPIRY_HOURS = 24
+
+# Буфер лайков (blog.like_buffer): лайки пишутся в журнал и переносятся
+# в Like и likes_count командой flush_likes
+LIKE_BUFFER_ENABLED = os.getenv('LIKE_BUFFER_ENABLED', 'False') == 'True'
+LIKE_BUFFER_FLUSH_BATCH_SIZE = int(os.getenv('LIKE_BUFFER_FLUSH_BATCH_SIZE', 5000))
+
+# Максимум постов в одном запросе импорта (blog.bulk.import_posts)
+POST_IMPORT_MAX_ITEMS = 500
+
 # Email settings
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = os.getenv('EMAIL_HOST', 'smtp.yandex.ru')
@@ -290,4 +380,9 @@ DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', EMAIL_HOST_USER)
 
 EMAIL_TIMEOUT = 10
 
+# Очередь исходящих писем (команда send_queued_emails)
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 50))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 5))
+EMAIL_OUTBOX_RETRY_DELAY = int(os.getenv('EMAIL_OUTBOX_RETRY_DELAY', 60))  # секунд, удваивается с каждой попыткой
+
 SITE_URL = os.getenv('SITE_URL', 'https://myposts.ru')
\ No newline at end of file
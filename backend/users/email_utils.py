@@ -1,10 +1,19 @@
-from django.core.mail import send_mail, EmailMultiAlternatives
+from django.core.mail import send_mail, EmailMultiAlternatives, get_connection
 from django.conf import settings
+from django.db import transaction
 from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import escape
+from datetime import timedelta
+from html import unescape
+from .models import OutgoingEmail
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
+TAG_RE = re.compile('<[^<]+?>')
+
 
 def send_verification_email(email, code, username):
     """
@@ -110,138 +119,160 @@ def send_verification_email(email, code, username):
         return False
 
 
-def send_new_post_notification(post, users):
+class NewPostEmail:
     """
-    Отправляет уведомление о новом посте всем одобренным пользователям
+    Письмо о новом посте, отрендеренное один раз на пост.
+    Шаблоны рендерятся с маркером вместо имени получателя и делятся по нему
+    на две части, так что для каждого получателя остаётся только склеить
+    строки с экранированным именем.
     """
-    if not users or not users.exists():
-        logger.info("No users to notify about new post")
-        return
-    
-    subject = f'Новый пост: {post.title} - vld.blog'
-    
-    # Получаем превью контента (первые 200 символов без HTML)
-    import re
-    content_preview = re.sub('<[^<]+?>', '', post.content)[:200]
-    if len(post.content) > 200:
-        content_preview += '...'
-    
-    author_name = f"{post.author.first_name} {post.author.last_name}".strip() if post.author.first_name else post.author.username
-    post_url = f"{settings.SITE_URL}/post/{post.id}"
-    
-    success_count = 0
-    fail_count = 0
+    TEXT_TEMPLATE = 'emails/new_post_notification.txt'
+    HTML_TEMPLATE = 'emails/new_post_notification.html'
+    RECIPIENT_MARKER = '__RECIPIENT_NAME__'
+
+    def __init__(self, post):
+        self.subject = f'Новый пост: {post.title} - vld.blog'
+        context = {
+            'recipient_name': self.RECIPIENT_MARKER,
+            'post_title': post.title,
+            'author_name': get_author_name(post.author),
+            'content_preview': get_content_preview(post.content),
+            'post_url': f"{settings.SITE_URL}/post/{post.id}",
+            'site_url': settings.SITE_URL,
+        }
+        self.text_parts = self._split(render_to_string(self.TEXT_TEMPLATE, context))
+        self.html_parts = self._split(render_to_string(self.HTML_TEMPLATE, context))
+
+    def _split(self, rendered):
+        head, marker, tail = rendered.partition(self.RECIPIENT_MARKER)
+        if not marker:
+            raise ValueError(f'{self.RECIPIENT_MARKER} not found in rendered email template')
+        return head, tail
+
+    def render(self, user_name):
+        """Возвращает (текст, html) для получателя"""
+        text_head, text_tail = self.text_parts
+        html_head, html_tail = self.html_parts
+        return (
+            text_head + user_name + text_tail,
+            html_head + escape(user_name) + html_tail,
+        )
+
+
+def get_author_name(author):
+    if author.first_name:
+        return f"{author.first_name} {author.last_name}".strip()
+    return author.username
+
+
+def get_content_preview(content, length=200):
+    """Превью контента: первые length символов без HTML"""
+    preview = unescape(TAG_RE.sub('', content))
+    if len(preview) > length:
+        preview = preview[:length] + '...'
+    return preview
+
+
+def queue_new_post_notification(post, users):
+    """
+    Ставит в очередь уведомления о новом посте для переданных пользователей.
+    Сами письма отправляет send_queued_emails (команда send_queued_emails).
+    """
+    email = NewPostEmail(post)
+    emails = []
     
     for user in users:
         user_name = user.first_name if user.first_name else user.username
-        
-        # Текстовая версия
-        message = f"""
-Привет, {user_name}!
+        message, html_message = email.render(user_name)
+        emails.append(OutgoingEmail(
+            to_email=user.email,
+            subject=email.subject,
+            body=message,
+            html_body=html_message,
+        ))
+    
+    OutgoingEmail.objects.bulk_create(emails, batch_size=500)
+    logger.info(f"📬 Queued {len(emails)} post notifications for post {post.id}")
+    return len(emails)
 
-На vld.blog опубликован новый пост:
 
-"{post.title}"
-Автор: {author_name}
+def _retry_delay(attempts):
+    """Экспоненциальная задержка перед следующей попыткой"""
+    return timedelta(seconds=settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1))
 
-{content_preview}
 
-Читайте на сайте: {post_url}
+def _mark_failed_attempt(email, error, now):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = 'failed'
+    else:
+        email.next_attempt_at = now + _retry_delay(email.attempts)
 
----
-Вы получили это письмо, потому что подписаны на уведомления vld.blog.
-Чтобы отписаться, зайдите в настройки профиля: {settings.SITE_URL}/profile/edit
-        """
-        
-        # HTML версия
-        html_message = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        </head>
-        <body style="margin: 0; padding: 0; font-family: Arial, sans-serif; background-color: #f0f2f5;">
-            <table width="100%" cellpadding="0" cellspacing="0" style="background-color: #f0f2f5; padding: 20px;">
-                <tr>
-                    <td align="center">
-                        <table width="600" cellpadding="0" cellspacing="0" style="background-color: white; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
-                            <!-- Header -->
-                            <tr>
-                                <td style="padding: 30px; text-align: center; background: linear-gradient(#4e69a2, #3b5998); border-radius: 8px 8px 0 0;">
-                                    <h1 style="color: white; margin: 0; font-size: 28px;">vld.blog</h1>
-                                </td>
-                            </tr>
-                            
-                            <!-- Body -->
-                            <tr>
-                                <td style="padding: 30px;">
-                                    <h2 style="color: #333; margin-top: 0;">Привет, {user_name}!</h2>
-                                    
-                                    <p style="color: #666; line-height: 1.6; font-size: 15px; margin-bottom: 25px;">
-                                        На vld.blog опубликован новый пост:
-                                    </p>
-                                    
-                                    <!-- Post Preview -->
-                                    <div style="background-color: #f0f2f5; padding: 25px; border-radius: 8px; margin: 25px 0; border-left: 4px solid #3b5998;">
-                                        <h3 style="color: #3b5998; margin: 0 0 10px 0; font-size: 20px;">{post.title}</h3>
-                                        <p style="color: #999; margin: 0 0 15px 0; font-size: 13px;">
-                                            ✍️ <strong>{author_name}</strong>
-                                        </p>
-                                        <p style="color: #666; margin: 0; font-size: 14px; line-height: 1.6;">
-                                            {content_preview}
-                                        </p>
-                                    </div>
-                                    
-                                    <!-- CTA Button -->
-                                    <table width="100%" cellpadding="0" cellspacing="0">
-                                        <tr>
-                                            <td align="center" style="padding: 20px 0;">
-                                                <a href="{post_url}" style="display: inline-block; background: linear-gradient(#4e69a2, #3b5998); color: white; padding: 15px 40px; text-decoration: none; border-radius: 5px; font-weight: bold; font-size: 16px; box-shadow: 0 2px 4px rgba(0,0,0,0.2);">
-                                                    📖 Читать полностью
-                                                </a>
-                                            </td>
-                                        </tr>
-                                    </table>
-                                </td>
-                            </tr>
-                            
-                            <!-- Footer -->
-                            <tr>
-                                <td style="padding: 20px 30px; background-color: #f8f9fa; border-radius: 0 0 8px 8px; text-align: center;">
-                                    <p style="color: #999; font-size: 12px; margin: 0 0 10px 0;">
-                                        Вы получили это письмо, потому что подписаны на уведомления vld.blog.
-                                    </p>
-                                    <p style="margin: 0;">
-                                        <a href="{settings.SITE_URL}/profile/edit" style="color: #3b5998; font-size: 12px; text-decoration: none;">
-                                            ⚙️ Управление подписками
-                                        </a>
-                                    </p>
-                                </td>
-                            </tr>
-                        </table>
-                    </td>
-                </tr>
-            </table>
-        </body>
-        </html>
-        """
+
+def send_queued_emails(batch_size=None):
+    """
+    Отправляет одну пачку писем из очереди через одно SMTP-соединение.
+    Письма передаются в send_messages() по одному, чтобы у каждого
+    получателя был свой статус; соединение при этом не переоткрывается.
+    Строки пачки заблокированы (SKIP LOCKED), поэтому несколько воркеров
+    не отправят одно письмо дважды.
+    Возвращает (отправлено, ошибок).
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    now = timezone.now()
+    sent_count = 0
+    fail_count = 0
+    
+    with transaction.atomic():
+        batch = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True).filter(
+                status='pending',
+                next_attempt_at__lte=now
+            ).order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if not batch:
+            return 0, 0
         
+        connection = get_connection(fail_silently=False)
         try:
-            email_message = EmailMultiAlternatives(
-                subject=subject,
-                body=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[user.email]
-            )
-            email_message.attach_alternative(html_message, "text/html")
-            email_message.send(fail_silently=False)
-            
-            logger.info(f"✅ Notification sent to {user.email}")
-            success_count += 1
+            connection.open()
         except Exception as e:
-            logger.error(f"❌ Error sending notification to {user.email}: {e}")
-            fail_count += 1
+            logger.error(f"❌ Can not open email connection: {e}")
+            for email in batch:
+                _mark_failed_attempt(email, e, now)
+            fail_count = len(batch)
+        else:
+            try:
+                for email in batch:
+                    email_message = EmailMultiAlternatives(
+                        subject=email.subject,
+                        body=email.body,
+                        from_email=settings.DEFAULT_FROM_EMAIL,
+                        to=[email.to_email],
+                        connection=connection
+                    )
+                    if email.html_body:
+                        email_message.attach_alternative(email.html_body, "text/html")
+                    
+                    try:
+                        connection.send_messages([email_message])
+                    except Exception as e:
+                        logger.error(f"❌ Error sending email to {email.to_email}: {e}")
+                        _mark_failed_attempt(email, e, now)
+                        fail_count += 1
+                    else:
+                        email.status = 'sent'
+                        email.sent_at = timezone.now()
+                        email.attempts += 1
+                        email.last_error = ''
+                        sent_count += 1
+            finally:
+                connection.close()
+        
+        OutgoingEmail.objects.bulk_update(
+            batch, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at']
+        )
     
-    logger.info(f"📊 Post notification stats: {success_count} sent, {fail_count} failed")
-    return success_count, fail_count
\ No newline at end of file
+    logger.info(f"📊 Outbox batch stats: {sent_count} sent, {fail_count} failed")
+    return sent_count, fail_count
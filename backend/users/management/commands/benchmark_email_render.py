@@ -0,0 +1,178 @@
+import re
+import time
+
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.template.loader import render_to_string
+from blog.models import Post
+from users.email_utils import NewPostEmail, get_author_name, get_content_preview
+from users.models import User
+
+
+def render_legacy(post, user_names):
+    """
+    Код queue_new_post_notification до перехода на шаблоны: превью считается
+    один раз, а текст и HTML письма собираются f-строками для каждого получателя
+    """
+    subject = f'Новый пост: {post.title} - vld.blog'
+    
+    # Получаем превью контента (первые 200 символов без HTML)
+    content_preview = re.sub('<[^<]+?>', '', post.content)[:200]
+    if len(post.content) > 200:
+        content_preview += '...'
+    
+    author_name = f"{post.author.first_name} {post.author.last_name}".strip() if post.author.first_name else post.author.username
+    post_url = f"{settings.SITE_URL}/post/{post.id}"
+    
+    emails = []
+    
+    for user_name in user_names:
+        # Текстовая версия
+        message = f"""
+Привет, {user_name}!
+
+На vld.blog опубликован новый пост:
+
+"{post.title}"
+Автор: {author_name}
+
+{content_preview}
+
+Читайте на сайте: {post_url}
+
+---
+Вы получили это письмо, потому что подписаны на уведомления vld.blog.
+Чтобы отписаться, зайдите в настройки профиля: {settings.SITE_URL}/profile/edit
+        """
+        
+        # HTML версия
+        html_message = f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="utf-8">
+            <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        </head>
+        <body style="margin: 0; padding: 0; font-family: Arial, sans-serif; background-color: #f0f2f5;">
+            <table width="100%" cellpadding="0" cellspacing="0" style="background-color: #f0f2f5; padding: 20px;">
+                <tr>
+                    <td align="center">
+                        <table width="600" cellpadding="0" cellspacing="0" style="background-color: white; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
+                            <!-- Header -->
+                            <tr>
+                                <td style="padding: 30px; text-align: center; background: linear-gradient(#4e69a2, #3b5998); border-radius: 8px 8px 0 0;">
+                                    <h1 style="color: white; margin: 0; font-size: 28px;">vld.blog</h1>
+                                </td>
+                            </tr>
+                            
+                            <!-- Body -->
+                            <tr>
+                                <td style="padding: 30px;">
+                                    <h2 style="color: #333; margin-top: 0;">Привет, {user_name}!</h2>
+                                    
+                                    <p style="color: #666; line-height: 1.6; font-size: 15px; margin-bottom: 25px;">
+                                        На vld.blog опубликован новый пост:
+                                    </p>
+                                    
+                                    <!-- Post Preview -->
+                                    <div style="background-color: #f0f2f5; padding: 25px; border-radius: 8px; margin: 25px 0; border-left: 4px solid #3b5998;">
+                                        <h3 style="color: #3b5998; margin: 0 0 10px 0; font-size: 20px;">{post.title}</h3>
+                                        <p style="color: #999; margin: 0 0 15px 0; font-size: 13px;">
+                                            ✍️ <strong>{author_name}</strong>
+                                        </p>
+                                        <p style="color: #666; margin: 0; font-size: 14px; line-height: 1.6;">
+                                            {content_preview}
+                                        </p>
+                                    </div>
+                                    
+                                    <!-- CTA Button -->
+                                    <table width="100%" cellpadding="0" cellspacing="0">
+                                        <tr>
+                                            <td align="center" style="padding: 20px 0;">
+                                                <a href="{post_url}" style="display: inline-block; background: linear-gradient(#4e69a2, #3b5998); color: white; padding: 15px 40px; text-decoration: none; border-radius: 5px; font-weight: bold; font-size: 16px; box-shadow: 0 2px 4px rgba(0,0,0,0.2);">
+                                                    📖 Читать полностью
+                                                </a>
+                                            </td>
+                                        </tr>
+                                    </table>
+                                </td>
+                            </tr>
+                            
+                            <!-- Footer -->
+                            <tr>
+                                <td style="padding: 20px 30px; background-color: #f8f9fa; border-radius: 0 0 8px 8px; text-align: center;">
+                                    <p style="color: #999; font-size: 12px; margin: 0 0 10px 0;">
+                                        Вы получили это письмо, потому что подписаны на уведомления vld.blog.
+                                    </p>
+                                    <p style="margin: 0;">
+                                        <a href="{settings.SITE_URL}/profile/edit" style="color: #3b5998; font-size: 12px; text-decoration: none;">
+                                            ⚙️ Управление подписками
+                                        </a>
+                                    </p>
+                                </td>
+                            </tr>
+                        </table>
+                    </td>
+                </tr>
+            </table>
+        </body>
+        </html>
+        """
+        emails.append((subject, message, html_message))
+    return emails
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время рендеринга писем о новом посте: прежние f-строки, '
+        'шаблоны на каждого получателя и шаблоны один раз на пост'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recipients', type=int, default=1000,
+            help='Количество получателей'
+        )
+
+    def handle(self, *args, **options):
+        recipients = [f'Пользователь {i}' for i in range(options['recipients'])]
+        author = User(username='author', first_name='Иван', last_name='Петров')
+        post = Post(id=1, author=author, title='Тестовый пост', content='<p>Текст поста</p>' * 200)
+
+        legacy = self.measure(lambda: render_legacy(post, recipients))
+        per_recipient = self.measure(lambda: self.render_per_recipient(post, recipients))
+        once = self.measure(lambda: self.render_once(post, recipients))
+
+        per_thousand = 1000 / max(len(recipients), 1)
+        self.stdout.write(f'   Получателей: {len(recipients)}')
+        self.stdout.write(f'   Прежний код (f-строки):         {legacy * per_thousand * 1000:.1f} мс / 1000')
+        self.stdout.write(f'   Шаблоны на каждого получателя:  {per_recipient * per_thousand * 1000:.1f} мс / 1000')
+        self.stdout.write(f'   Шаблоны один раз на пост:       {once * per_thousand * 1000:.1f} мс / 1000')
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Относительно прежнего кода: x{legacy / once:.1f}, '
+            f'относительно шаблонов на каждого получателя: x{per_recipient / once:.1f}'
+        ))
+
+    def measure(self, func):
+        started = time.perf_counter()
+        func()
+        return time.perf_counter() - started
+
+    def render_per_recipient(self, post, recipients):
+        """Те же шаблоны, но всё письмо и превью собираются заново для каждого получателя"""
+        for user_name in recipients:
+            context = {
+                'recipient_name': user_name,
+                'post_title': post.title,
+                'author_name': get_author_name(post.author),
+                'content_preview': get_content_preview(post.content),
+                'post_url': f"{settings.SITE_URL}/post/{post.id}",
+                'site_url': settings.SITE_URL,
+            }
+            render_to_string(NewPostEmail.TEXT_TEMPLATE, context)
+            render_to_string(NewPostEmail.HTML_TEMPLATE, context)
+
+    def render_once(self, post, recipients):
+        email = NewPostEmail(post)
+        for user_name in recipients:
+            email.render(user_name)
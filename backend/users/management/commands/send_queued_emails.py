@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from users.email_utils import send_queued_emails
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди пачками через одно SMTP-соединение'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+            help='Сколько писем отправлять через одно соединение'
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, опрашивая очередь'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Пауза между опросами пустой очереди (секунд)'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        while True:
+            sent, failed = send_queued_emails(batch_size)
+            if sent or failed:
+                self.stdout.write(f'📬 Отправлено: {sent}, ошибок: {failed}')
+
+            if not options['loop']:
+                # Разовый запуск: разбираем очередь до конца
+                if not sent and not failed:
+                    break
+                continue
+
+            if not sent and not failed:
+                time.sleep(options['interval'])
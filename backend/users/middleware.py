@@ -1,5 +1,5 @@
+from django.core.cache import cache
 from django.utils import timezone
-from datetime import timedelta
 
 
 class LastSeenMiddleware:
@@ -7,8 +7,11 @@ class LastSeenMiddleware:
     Обновляет last_seen для аутентифицированных пользователей.
     Выполняется после обработки запроса (в т.ч. JWT-аутентификации в DRF).
     Ограничение: не чаще раза в 5 минут для снижения нагрузки на БД.
+    Отметка о последнем обновлении хранится в кэше, поэтому работает и для
+    TokenUser (stateless-аутентификация без загрузки пользователя из БД).
     """
     THROTTLE_MINUTES = 5
+    CACHE_KEY = 'users:last_seen:{}'
 
     def __init__(self, get_response):
         self.get_response = get_response
@@ -17,11 +20,10 @@ class LastSeenMiddleware:
         response = self.get_response(request)
 
         if hasattr(request, 'user') and request.user.is_authenticated:
-            now = timezone.now()
-            last_seen = getattr(request.user, 'last_seen', None)
-            if last_seen is None or (now - last_seen) > timedelta(minutes=self.THROTTLE_MINUTES):
+            key = self.CACHE_KEY.format(request.user.pk)
+            if cache.add(key, True, self.THROTTLE_MINUTES * 60):
                 from django.contrib.auth import get_user_model
                 User = get_user_model()
-                User.objects.filter(pk=request.user.pk).update(last_seen=now)
+                User.objects.filter(pk=request.user.pk).update(last_seen=timezone.now())
 
         return response
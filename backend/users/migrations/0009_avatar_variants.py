@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-18 09:57
+
+from django.db import migrations, models
+
+
+def queue_existing_avatars(apps, schema_editor):
+    Profile = apps.get_model('users', 'Profile')
+    Profile.objects.exclude(avatar__isnull=True).exclude(avatar='').update(avatar_status='pending')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_status',
+            field=models.CharField(choices=[('pending', 'Ожидает обработки'), ('ready', 'Готово'), ('failed', 'Ошибка')], default='ready', max_length=20, verbose_name='статус обработки аватара'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_variants',
+            field=models.JSONField(blank=True, default=dict, verbose_name='варианты аватара'),
+        ),
+        migrations.RunPython(queue_existing_avatars, migrations.RunPython.noop),
+    ]
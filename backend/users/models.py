@@ -2,6 +2,7 @@ from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
+from blog.images import IMAGE_STATUS_CHOICES
 import random
 import string
 
@@ -58,6 +59,14 @@ class Profile(models.Model):
         blank=True,
         null=True
     )
+    # Уменьшенные копии аватара, строятся командой process_images (см. blog.images)
+    avatar_variants = models.JSONField(_('варианты аватара'), default=dict, blank=True)
+    avatar_status = models.CharField(
+        _('статус обработки аватара'),
+        max_length=20,
+        choices=IMAGE_STATUS_CHOICES,
+        default='ready'
+    )
     bio = models.TextField(
         _('о себе'),
         max_length=500,
@@ -289,4 +298,42 @@ class RegistrationRequest(models.Model):
         if time_passed.total_seconds() > 900:  # 15 минут = 900 секунд
             return False
         
-        return True
\ No newline at end of file
+        return True
+
+class OutgoingEmail(models.Model):
+    """
+    Письмо в очереди на отправку.
+    Отправляется командой send_queued_emails пачками через одно SMTP-соединение.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Ожидает отправки'),
+        ('sent', 'Отправлено'),
+        ('failed', 'Ошибка'),
+    ]
+
+    to_email = models.EmailField(_('получатель'))
+    subject = models.CharField(_('тема'), max_length=255)
+    body = models.TextField(_('текст'))
+    html_body = models.TextField(_('HTML-версия'), blank=True)
+    status = models.CharField(
+        _('статус'),
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending'
+    )
+    attempts = models.PositiveSmallIntegerField(_('попыток отправки'), default=0)
+    next_attempt_at = models.DateTimeField(_('следующая попытка'), default=timezone.now)
+    last_error = models.TextField(_('последняя ошибка'), blank=True)
+    created_at = models.DateTimeField(_('дата создания'), auto_now_add=True)
+    sent_at = models.DateTimeField(_('дата отправки'), blank=True, null=True)
+
+    class Meta:
+        verbose_name = _('исходящее письмо')
+        verbose_name_plural = _('исходящие письма')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='users_outbox_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.to_email}: {self.subject} ({self.get_status_display()})'
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ObjectDoesNotExist
+from blog.images import variant_urls
 from .models import Profile, RegistrationRequest
 import json
 
@@ -9,16 +11,20 @@ User = get_user_model()
 
 class ProfileSerializer(serializers.ModelSerializer):
     """Сериализатор профиля пользователя"""
+    avatar_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = Profile
         fields = [
-            'avatar', 'bio', 'birth_date', 'location', 'website', 'email_notifications',
+            'avatar', 'avatar_variants', 'bio', 'birth_date', 'location', 'website', 'email_notifications',
             'relationship_status', 'political_views', 'religious_views', 'interests',
             'favorite_music', 'favorite_movies', 'favorite_books',
             'smoking', 'drinking', 'life_position'
         ]
 
+    def get_avatar_variants(self, obj):
+        return variant_urls(obj.avatar, obj.avatar_variants, self.context.get('request'))
+
 
 class UserSerializer(serializers.ModelSerializer):
     """Сериализатор пользователя с профилем"""
@@ -42,6 +48,40 @@ class UserSerializer(serializers.ModelSerializer):
         return (timezone.now() - obj.last_seen) < timedelta(minutes=5)
 
 
+class UserListSerializer(serializers.ModelSerializer):
+    """
+    Краткие данные пользователя для списков (авторы постов и комментариев,
+    друзья, подписки, заявки). Полный профиль отдаёт только UserSerializer
+    на страницах профиля. avatar — уменьшенная копия (или оригинал, пока
+    копии не готовы), avatar_webp — та же копия в WebP.
+    """
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'first_name', 'last_name', 'is_verified']
+        read_only_fields = fields
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        thumbnail = self.get_avatar_thumbnail(instance) or {}
+        data['avatar'] = thumbnail.get('jpeg')
+        data['avatar_webp'] = thumbnail.get('webp')
+        return data
+
+    def get_avatar_thumbnail(self, obj):
+        try:
+            profile = obj.profile
+        except ObjectDoesNotExist:
+            return None
+        if not profile.avatar:
+            return None
+        request = self.context.get('request')
+        thumbnail = variant_urls(profile.avatar, profile.avatar_variants, request).get('thumbnail')
+        if thumbnail:
+            return thumbnail
+        url = profile.avatar.url
+        return {'jpeg': request.build_absolute_uri(url) if request else url}
+
+
 class UserCreateSerializer(serializers.ModelSerializer):
     """Сериализатор для создания пользователя (только для администратора)"""
     password = serializers.CharField(write_only=True, required=True, style={'input_type': 'password'})
@@ -1,4 +1,4 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_init, post_save, pre_save
 from django.dispatch import receiver
 from .models import User, Profile
 
@@ -10,6 +10,41 @@ def create_user_profile(sender, instance, created, **kwargs):
 
 
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
+def save_user_profile(sender, instance, update_fields=None, **kwargs):
+    # Частичное сохранение пользователя (last_login при входе и т.п.) профиль не меняет
+    if update_fields is not None:
+        return
     if hasattr(instance, 'profile'):
-        instance.profile.save()
\ No newline at end of file
+        instance.profile.save()
+
+
+@receiver(post_init, sender=Profile)
+def remember_avatar(sender, instance, **kwargs):
+    avatar = instance.__dict__.get('avatar')
+    instance._original_avatar = getattr(avatar, 'name', avatar)
+
+
+@receiver(pre_save, sender=Profile)
+def queue_avatar_processing(sender, instance, update_fields=None, **kwargs):
+    """Новый аватар ставится в очередь на построение вариантов (process_images)"""
+    if update_fields is not None and 'avatar_status' in update_fields:
+        # Сохранение из самого обработчика изображений
+        return
+    if 'avatar' not in instance.__dict__:
+        # Поле не загружено (only/defer) и не менялось
+        return
+    new_avatar = instance.avatar.name or ''
+    if (instance._original_avatar or '') == new_avatar:
+        return
+    # Экземпляр мог устареть (refresh_from_db, обработка в воркере) — сверяемся с БД
+    if instance.pk:
+        stored = Profile.objects.filter(pk=instance.pk).values_list('avatar', flat=True).first()
+        if (stored or '') == new_avatar:
+            return
+    instance.avatar_variants = {}
+    instance.avatar_status = 'pending' if instance.avatar else 'ready'
+
+
+@receiver(post_save, sender=Profile)
+def reset_original_avatar(sender, instance, **kwargs):
+    instance._original_avatar = instance.avatar.name
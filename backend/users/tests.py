@@ -1,3 +1,97 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.template.loader import render_to_string
+from django.test import TestCase, override_settings
+
+from blog.models import Post
+from .email_utils import NewPostEmail, send_queued_emails
+from .models import User, OutgoingEmail
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    EMAIL_OUTBOX_MAX_ATTEMPTS=2,
+)
+class EmailOutboxTests(TestCase):
+    """Уведомления о постах ставятся в очередь и отправляются воркером"""
+
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass', is_approved=True
+        )
+        for i in range(3):
+            User.objects.create_user(
+                username=f'reader{i}', email=f'reader{i}@example.com', password='pass', is_approved=True
+            )
+
+    def test_post_creation_only_queues_emails(self):
+        Post.objects.create(author=self.author, title='Пост', content='Текст')
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutgoingEmail.objects.filter(status='pending').count(), 3)
+
+    def test_worker_sends_batch_over_one_connection(self):
+        Post.objects.create(author=self.author, title='Пост', content='Текст')
+
+        with mock.patch.object(EmailBackend, 'open', autospec=True, side_effect=EmailBackend.open) as opened:
+            call_command('send_queued_emails', '--batch-size', '10', stdout=StringIO())
+
+        self.assertEqual(opened.call_count, 1)
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), [
+            'reader0@example.com', 'reader1@example.com', 'reader2@example.com'
+        ])
+        self.assertEqual(OutgoingEmail.objects.filter(status='sent').count(), 3)
+
+    def test_failed_recipient_is_retried_then_marked_failed(self):
+        Post.objects.create(author=self.author, title='Пост', content='Текст')
+        original_send = EmailBackend.send_messages
+
+        def flaky_send(backend, messages):
+            if messages[0].to == ['reader1@example.com']:
+                raise ConnectionError('mailbox unavailable')
+            return original_send(backend, messages)
+
+        with mock.patch.object(EmailBackend, 'send_messages', autospec=True, side_effect=flaky_send):
+            self.assertEqual(send_queued_emails(), (2, 1))
+
+            failed = OutgoingEmail.objects.get(to_email='reader1@example.com')
+            self.assertEqual((failed.status, failed.attempts), ('pending', 1))
+            self.assertIn('mailbox unavailable', failed.last_error)
+
+            # Следующая попытка откладывается, пока не наступит next_attempt_at
+            self.assertEqual(send_queued_emails(), (0, 0))
+            OutgoingEmail.objects.filter(pk=failed.pk).update(next_attempt_at=failed.created_at)
+            self.assertEqual(send_queued_emails(), (0, 1))
+
+        failed.refresh_from_db()
+        self.assertEqual((failed.status, failed.attempts), ('failed', 2))
+
+
+class NewPostEmailTests(TestCase):
+    """Письмо рендерится один раз на пост, имя получателя подставляется отдельно"""
+
+    def test_render_fills_recipient_name(self):
+        author = User(username='author', first_name='Иван', last_name='Петров')
+        post = Post(id=7, author=author, title='Пост <b>', content='<p>Текст&nbsp;поста</p>')
+        email = NewPostEmail(post)
+
+        text, html = email.render('Мария & Co')
+
+        self.assertIn('Привет, Мария & Co!', text)
+        self.assertIn('Текст\xa0поста', text)
+        self.assertIn('Привет, Мария &amp; Co!', html)
+        self.assertIn('Пост &lt;b&gt;', html)
+        self.assertIn('Иван Петров', html)
+        self.assertNotIn(NewPostEmail.RECIPIENT_MARKER, text + html)
+
+    def test_templates_are_rendered_once_per_post(self):
+        post = Post(id=7, author=User(username='author'), title='Пост', content='Текст')
+        with mock.patch('users.email_utils.render_to_string', wraps=render_to_string) as render:
+            email = NewPostEmail(post)
+            for i in range(50):
+                email.render(f'user{i}')
+        self.assertEqual(render.call_count, 2)
@@ -10,21 +10,35 @@ const Avatar = ({ user, size = 'default', className = '' }) => {
   
   const dimension = sizes[size] || sizes.default;
   
-  // Если есть аватар - показываем его
-  if (user.profile?.avatar) {
+  // Если есть аватар - показываем его (уменьшенную копию, если она уже готова).
+  // В списках приходят краткие данные: avatar/avatar_webp вместо profile
+  const getImage = () => {
+    if (user.profile?.avatar) {
+      const variants = user.profile.avatar_variants || {};
+      const variant = dimension > 64 ? variants.medium : variants.thumbnail;
+      return variant ? { src: variant.jpeg, webp: variant.webp } : { src: user.profile.avatar };
+    }
+    return user.avatar ? { src: user.avatar, webp: user.avatar_webp } : null;
+  };
+
+  const image = getImage();
+  if (image) {
     return (
-      <img 
-        src={user.profile.avatar}
-        alt={user.username}
-        className={`avatar ${className}`}
-        style={{ 
-          width: `${dimension}px`, 
-          height: `${dimension}px`,
-          objectFit: 'cover',
-          borderRadius: '2px',
-          border: '1px solid var(--fb-border)'
-        }}
-      />
+      <picture>
+        {image.webp && <source srcSet={image.webp} type="image/webp" />}
+        <img 
+          src={image.src}
+          alt={user.username}
+          className={`avatar ${className}`}
+          style={{ 
+            width: `${dimension}px`, 
+            height: `${dimension}px`,
+            objectFit: 'cover',
+            borderRadius: '2px',
+            border: '1px solid var(--fb-border)'
+          }}
+        />
+      </picture>
     );
   }
   
@@ -1,4 +1,5 @@
 import React, { useState, useEffect } from 'react';
+import { blogService } from '../services/blogService';
 import { Link, useNavigate } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
 import NotificationBell from './NotificationBell';
@@ -12,6 +13,7 @@ const Header = () => {
   const [showSearch, setShowSearch] = useState(false);
   const [searchResults, setSearchResults] = useState(null);
   const [searchLoading, setSearchLoading] = useState(false);
+  const [suggestions, setSuggestions] = useState([]);
   const [isMobile, setIsMobile] = useState(window.innerWidth <= 768);
 
   useEffect(() => {
@@ -22,6 +24,31 @@ const Header = () => {
     return () => window.removeEventListener('resize', handleResize);
   }, []);
 
+  // Подсказки по заголовкам постов при наборе (с задержкой 200 мс)
+  useEffect(() => {
+    const text = searchQuery.trim();
+    if (!text || isMobile) {
+      setSuggestions([]);
+      return;
+    }
+    let cancelled = false;
+    const timer = setTimeout(() => {
+      blogService.autocomplete(text)
+        .then((data) => !cancelled && setSuggestions(Array.isArray(data) ? data : []))
+        .catch(() => !cancelled && setSuggestions([]));
+    }, 200);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [searchQuery, isMobile]);
+
+  const openSuggestion = (postId) => {
+    setSuggestions([]);
+    setSearchQuery('');
+    navigate(`/post/${postId}`);
+  };
+
   const handleLogout = async () => {
     setMenuOpen(false);
     await logout();
@@ -40,8 +67,8 @@ const Header = () => {
     }
     
     setSearchLoading(true);
+    setSuggestions([]);
     try {
-      const { blogService } = await import('../services/blogService');
       const results = await blogService.search(searchQuery);
       setSearchResults(results);
       setShowSearch(true);
@@ -188,6 +215,33 @@ const Header = () => {
             >
               <FaSearch />
             </button>
+            {suggestions.length > 0 && !showSearch && (
+              <ul
+                className="header-search-suggestions"
+                style={{
+                  position: 'absolute',
+                  top: '100%',
+                  left: 0,
+                  width: '250px',
+                  margin: 0,
+                  padding: 0,
+                  listStyle: 'none',
+                  backgroundColor: 'white',
+                  border: '1px solid var(--fb-border)',
+                  zIndex: 1000
+                }}
+              >
+                {suggestions.map((s) => (
+                  <li
+                    key={s.id}
+                    onMouseDown={() => openSuggestion(s.id)}
+                    style={{ padding: '6px 12px', cursor: 'pointer', fontSize: '13px', color: 'var(--fb-text)' }}
+                  >
+                    {s.title}
+                  </li>
+                ))}
+              </ul>
+            )}
           </form>
         )}
 
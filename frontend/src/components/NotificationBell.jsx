@@ -3,6 +3,7 @@ import { FaBell, FaTimes, FaComment, FaHeart, FaUserPlus, FaUserCheck, FaUserTim
 import { useNavigate } from 'react-router-dom';
 import notificationService from '../services/notificationService';
 import friendsService from '../services/friendsService';
+import { realtimeService } from '../services/realtimeService';
 
 const NotificationBell = ({ mobileMode = false, onMenuClose }) => {
   const navigate = useNavigate();
@@ -13,16 +14,28 @@ const NotificationBell = ({ mobileMode = false, onMenuClose }) => {
   const [isOpen, setIsOpen] = useState(false);
   const [loading, setLoading] = useState(true);
   const dropdownRef = useRef(null);
+  const badgeRef = useRef(null);
 
   useEffect(() => {
-    loadNotifications();
+    refreshBadge();
 
-    // Обновляем каждые 30 секунд
+    // Новые уведомления приходят по WebSocket
+    const unsubscribe = realtimeService.subscribe((event) => {
+      if (event.type === 'notification.new') {
+        refreshBadge();
+      }
+    });
+
+    // Уведомления администрации по сокету не приходят, поэтому значок
+    // проверяется раз в 30 секунд; пока он не изменился, ответ — 304
     const interval = setInterval(() => {
-      loadNotifications();
+      refreshBadge();
     }, 30000);
 
-    return () => clearInterval(interval);
+    return () => {
+      clearInterval(interval);
+      unsubscribe();
+    };
   }, []);
 
   useEffect(() => {
@@ -63,9 +76,6 @@ const NotificationBell = ({ mobileMode = false, onMenuClose }) => {
       const friendData = await friendsService.getInternalNotifications();
       const friends = Array.isArray(friendData) ? friendData : (friendData.results || friendData || []);
       
-      const friendUnreadData = await friendsService.getUnreadNotificationsCount();
-      const friendUnreadCount = friendUnreadData?.count ?? 0;
-
       setPostNotifications(Array.isArray(posts) ? posts : []);
       setFriendNotifications(Array.isArray(friends) ? friends : []);
 
@@ -77,9 +87,6 @@ const NotificationBell = ({ mobileMode = false, onMenuClose }) => {
       ].sort((a, b) => new Date(b.created_at || 0) - new Date(a.created_at || 0));
 
       setAllNotifications(combined);
-
-      const postUnread = postsArr.filter(n => !n.is_read).length;
-      setUnreadCount(postUnread + friendUnreadCount);
     } catch (error) {
       console.error('Error loading notifications:', error);
       setAllNotifications([]);
@@ -88,6 +95,21 @@ const NotificationBell = ({ mobileMode = false, onMenuClose }) => {
     }
   };
 
+  // Списки перезагружаются только когда изменились счётчики значка
+  const refreshBadge = async () => {
+    try {
+      const badge = await notificationService.getBadge();
+      setUnreadCount(badge.notifications + badge.internal_notifications);
+      const key = JSON.stringify(badge);
+      if (key !== badgeRef.current) {
+        badgeRef.current = key;
+        loadNotifications();
+      }
+    } catch (error) {
+      console.error('Error loading badge:', error);
+    }
+  };
+
   const handleMarkAsRead = async (notification) => {
     try {
       if (notification.type === 'post') {
@@ -95,7 +117,7 @@ const NotificationBell = ({ mobileMode = false, onMenuClose }) => {
       } else if (notification.type === 'friend') {
         await friendsService.markNotificationRead(notification.id);
       }
-      loadNotifications();
+      refreshBadge();
     } catch (error) {
       console.error('Error marking as read:', error);
     }
@@ -112,7 +134,7 @@ const NotificationBell = ({ mobileMode = false, onMenuClose }) => {
       // Помечаем все внутренние уведомления
       await friendsService.markAllNotificationsRead();
 
-      loadNotifications();
+      refreshBadge();
     } catch (error) {
       console.error('Error marking all as read:', error);
     }
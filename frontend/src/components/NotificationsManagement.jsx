@@ -422,6 +422,13 @@ const StatsModal = ({ notification, stats, onClose }) => {
               </div>
               <div style={{ fontSize: '12px', color: 'var(--fb-text-light)' }}>Закрыто</div>
             </div>
+
+            <div style={{ textAlign: 'center', padding: '15px', backgroundColor: 'var(--fb-hover)', borderRadius: '5px' }}>
+              <div style={{ fontSize: '28px', fontWeight: 'bold', color: 'var(--fb-blue)' }}>
+                {Math.round((stats.read_rate || 0) * 100)}%
+              </div>
+              <div style={{ fontSize: '12px', color: 'var(--fb-text-light)' }}>Доля прочтений</div>
+            </div>
           </div>
 
           <div style={{ marginTop: '20px' }}>
@@ -13,7 +13,7 @@ const PostCard = ({ post, onLikeToggle }) => {
 
   const handleLike = async () => {
     try {
-      const response = await blogService.toggleLike(post.id);
+      const response = await blogService.setLike(post.id, !isLiked);
       setIsLiked(response.is_liked);
       setLikesCount(response.likes_count);
       if (onLikeToggle) onLikeToggle();
@@ -79,14 +79,22 @@ const PostCard = ({ post, onLikeToggle }) => {
 
       {post.images && post.images.length > 0 && (
         <div>
-          {post.images.map((image) => (
-            <img 
-              key={image.id}
-              src={image.image} 
-              alt={image.caption || 'Post image'}
-              className="post-image"
-            />
-          ))}
+          {post.images.map((image) => {
+            const medium = image.variants?.medium;
+            return (
+              <picture key={image.id}>
+                {medium && <source srcSet={medium.webp} type="image/webp" />}
+                <img 
+                  src={medium ? medium.jpeg : image.image} 
+                  width={medium?.width}
+                  height={medium?.height}
+                  alt={image.caption || 'Post image'}
+                  className="post-image"
+                  loading="lazy"
+                />
+              </picture>
+            );
+          })}
         </div>
       )}
 
@@ -2,13 +2,14 @@ import React, { useState, useEffect, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
 import { messagesService } from '../services/messagesService';
+import { realtimeService } from '../services/realtimeService';
 import { parseSmilies } from '../utils/smilies';
 import Header from '../components/Header';
 import Avatar from '../components/Avatar';
 import SmileyPicker from '../components/SmileyPicker';
 import { FaArrowLeft } from 'react-icons/fa';
 
-const POLL_INTERVAL = 3000;
+const RETRY_DELAY = 3000;
 const MOBILE_BREAKPOINT = 768;
 
 const Messages = () => {
@@ -25,7 +26,7 @@ const Messages = () => {
   const [isMobile, setIsMobile] = useState(false);
   const [mobileShowChat, setMobileShowChat] = useState(false);
   const messagesEndRef = useRef(null);
-  const pollRef = useRef(null);
+  const lastMessageIdRef = useRef(0);
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
@@ -45,7 +46,9 @@ const Messages = () => {
     if (!convId) return;
     try {
       const data = await messagesService.getMessages(convId);
-      setMessages(Array.isArray(data) ? data : []);
+      const list = Array.isArray(data) ? data : [];
+      setMessages(list);
+      lastMessageIdRef.current = list.length ? list[list.length - 1].id : 0;
       await messagesService.markAsRead(convId);
       scrollToBottom();
     } catch (err) {
@@ -77,7 +80,6 @@ const Messages = () => {
       const conv = conversations.find((c) => c.id === parseInt(conversationId));
       if (conv) {
         setSelectedConversation(conv);
-        loadMessages(conv.id);
       } else if (conversations.length > 0) {
         navigate(`/messages/${conversations[0].id}`, { replace: true });
       }
@@ -87,17 +89,76 @@ const Messages = () => {
     setLoading(false);
   }, [conversationId, username, conversations, isMobile]);
 
+  const appendMessages = (fresh) => {
+    setMessages((prev) => {
+      const known = new Set(prev.map((m) => m.id));
+      return [...prev, ...fresh.filter((m) => !known.has(m.id))];
+    });
+    const lastId = fresh[fresh.length - 1].id;
+    lastMessageIdRef.current = Math.max(lastMessageIdRef.current, lastId);
+  };
+
+  const receiveMessages = async (convId, fresh) => {
+    if (!fresh.length) return;
+    appendMessages(fresh);
+    if (fresh.some((m) => m.sender !== currentUser?.id)) {
+      await messagesService.markAsRead(convId);
+    }
+    loadConversations();
+    scrollToBottom();
+  };
+
+  // Новые сообщения приходят по WebSocket. Пока сокет недоступен, работает
+  // long-poll: запрос уходит сразу после ответа и возвращает только сообщения
+  // новее последнего полученного.
   useEffect(() => {
-    if (!selectedConversation?.id) return;
-    loadMessages(selectedConversation.id);
+    const convId = selectedConversation?.id;
+    if (!convId) return;
+    let active = true;
+    const wait = () => new Promise((resolve) => setTimeout(resolve, RETRY_DELAY));
 
-    pollRef.current = setInterval(() => {
-      loadMessages(selectedConversation.id);
-      loadConversations();
-    }, POLL_INTERVAL);
+    const unsubscribe = realtimeService.subscribe(
+      (event) => {
+        if (event.type === 'message.new') {
+          if (event.conversation_id === convId) {
+            receiveMessages(convId, [event.message]);
+          } else {
+            loadConversations();
+          }
+        } else if (event.type === 'message.read' && event.conversation_id === convId) {
+          setMessages((prev) => prev.map((m) => (
+            m.sender === currentUser?.id ? { ...m, is_read: true } : m
+          )));
+        }
+      },
+      // После (пере)подключения догружаем то, что пришло, пока сокета не было
+      () => messagesService.getNewMessages(convId, lastMessageIdRef.current)
+        .then((fresh) => active && receiveMessages(convId, fresh))
+        .catch(() => {})
+    );
+
+    const poll = async () => {
+      await loadMessages(convId);
+      while (active) {
+        if (realtimeService.isConnected()) {
+          await wait();
+          continue;
+        }
+        try {
+          const fresh = await messagesService.pollMessages(convId, lastMessageIdRef.current);
+          if (!active) break;
+          await receiveMessages(convId, fresh);
+        } catch (err) {
+          if (!active) break;
+          await wait();
+        }
+      }
+    };
+    poll();
 
     return () => {
-      if (pollRef.current) clearInterval(pollRef.current);
+      active = false;
+      unsubscribe();
     };
   }, [selectedConversation?.id]);
 
@@ -110,7 +171,7 @@ const Messages = () => {
     setError('');
     try {
       const msg = await messagesService.sendMessage(selectedConversation.id, text);
-      setMessages((prev) => [...prev, msg]);
+      appendMessages([msg]);
       setNewMessage('');
       loadConversations();
       scrollToBottom();
@@ -18,6 +18,8 @@ const PostDetail = () => {
   
   const [post, setPost] = useState(null);
   const [comments, setComments] = useState([]);
+  const [commentsCursor, setCommentsCursor] = useState(null);
+  const [moreCommentsLoading, setMoreCommentsLoading] = useState(false);
   const [newComment, setNewComment] = useState('');
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
@@ -25,13 +27,16 @@ const PostDetail = () => {
 
   useEffect(() => {
     loadPost();
-    loadComments();
   }, [id]);
 
+  const cursorFrom = (link) => (link ? new URL(link).searchParams.get('after') : null);
+
   const loadPost = async () => {
     try {
       const data = await blogService.getPost(id);
       setPost(data);
+      setComments(data.comments || []);
+      setCommentsCursor(cursorFrom(data.comments_next));
     } catch (err) {
       setError('Ошибка загрузки поста');
       console.error(err);
@@ -40,19 +45,26 @@ const PostDetail = () => {
     }
   };
 
-  const loadComments = async () => {
+  const loadMoreComments = async () => {
+    setMoreCommentsLoading(true);
     try {
-      const data = await blogService.getComments(id);
-      setComments(Array.isArray(data) ? data : (data.results || []));
+      const data = await blogService.getComments(id, commentsCursor);
+      setComments(prev => [...prev, ...data.results]);
+      setCommentsCursor(cursorFrom(data.next));
     } catch (err) {
       console.error(err);
-      setComments([]);
+    } finally {
+      setMoreCommentsLoading(false);
     }
   };
 
+  const changeCommentsCount = (delta) => {
+    setPost(prev => ({ ...prev, comments_count: prev.comments_count + delta }));
+  };
+
   const handleLike = async () => {
     try {
-      const response = await blogService.toggleLike(post.id);
+      const response = await blogService.setLike(post.id, !post.is_liked);
       setPost(prev => ({
         ...prev,
         is_liked: response.is_liked,
@@ -70,9 +82,13 @@ const PostDetail = () => {
 
     setCommentLoading(true);
     try {
-      await blogService.addComment(id, newComment);
+      const comment = await blogService.addComment(id, newComment);
       setNewComment('');
-      loadComments();
+      // Если загружены не все страницы, комментарий придёт с последней из них
+      if (!commentsCursor) {
+        setComments(prev => [...prev, comment]);
+      }
+      changeCommentsCount(1);
     } catch (err) {
       console.error(err);
     } finally {
@@ -85,7 +101,8 @@ const PostDetail = () => {
 
     try {
       await blogService.deleteComment(commentId);
-      loadComments();
+      setComments(prev => prev.filter(comment => comment.id !== commentId));
+      changeCommentsCount(-1);
     } catch (err) {
       console.error(err);
     }
@@ -249,14 +266,14 @@ const PostDetail = () => {
 
               <div className="post-action">
                 <FaComment />
-                <span>Комментарии ({comments.length})</span>
+                <span>Комментарии ({post.comments_count})</span>
               </div>
             </div>
           </div>
 
           <div className="card" style={{ marginTop: '10px' }}>
             <div className="card-header">
-              Комментарии ({comments.length})
+              Комментарии ({post.comments_count})
             </div>
             
             <div className="card-body">
@@ -322,6 +339,17 @@ const PostDetail = () => {
                       </div>
                     </div>
                   ))}
+                  {commentsCursor && (
+                    <div style={{ textAlign: 'center', marginTop: '10px' }}>
+                      <button
+                        onClick={loadMoreComments}
+                        className="btn btn-secondary btn-sm"
+                        disabled={moreCommentsLoading}
+                      >
+                        {moreCommentsLoading ? 'Загрузка...' : 'Показать ещё комментарии'}
+                      </button>
+                    </div>
+                  )}
                 </div>
               )}
             </div>
@@ -185,9 +185,11 @@ const Search = () => {
                                 "{comment.post.title}"
                               </a>
                             </div>
-                            <div style={{ fontSize: '14px', color: 'var(--fb-text)', lineHeight: '1.5' }}>
-                              {comment.content}
-                            </div>
+                            {/* headline экранирован на сервере, из разметки в нём только <mark> */}
+                            <div
+                              style={{ fontSize: '14px', color: 'var(--fb-text)', lineHeight: '1.5' }}
+                              dangerouslySetInnerHTML={{ __html: comment.headline || '' }}
+                            />
                             <div style={{ fontSize: '12px', color: 'var(--fb-text-light)', marginTop: '8px' }}>
                               {new Date(comment.created_at).toLocaleDateString('ru-RU', {
                                 day: 'numeric',
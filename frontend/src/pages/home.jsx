@@ -9,25 +9,24 @@ const Home = () => {
   const [posts, setPosts] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
-  const [page, setPage] = useState(1);
-  const [hasMore, setHasMore] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
 
   useEffect(() => {
     loadPosts();
-  }, [page]);
+  }, []);
 
-  const loadPosts = async () => {
+  const loadPosts = async (cursor = null) => {
     try {
       setLoading(true);
-      const data = await blogService.getPosts(page);
+      const data = await blogService.getFeed(cursor);
       
-      if (page === 1) {
-        setPosts(data.results || data);
+      if (!cursor) {
+        setPosts(data.results);
       } else {
-        setPosts(prev => [...prev, ...(data.results || data)]);
+        setPosts(prev => [...prev, ...data.results]);
       }
       
-      setHasMore(!!data.next);
+      setNextCursor(data.next ? new URL(data.next).searchParams.get('cursor') : null);
       setError('');
     } catch (err) {
       setError('Ошибка загрузки постов');
@@ -38,7 +37,7 @@ const Home = () => {
   };
 
   const handleLoadMore = () => {
-    setPage(prev => prev + 1);
+    loadPosts(nextCursor);
   };
 
   return (
@@ -48,7 +47,7 @@ const Home = () => {
         <div style={{ maxWidth: '600px', margin: '0 auto' }}>
           {error && <div className="error">{error}</div>}
 
-          {loading && page === 1 ? (
+          {loading && posts.length === 0 ? (
             <div className="loading">Загрузка постов...</div>
           ) : posts.length === 0 ? (
             <div className="card">
@@ -64,11 +63,10 @@ const Home = () => {
                 <PostCard 
                   key={post.id} 
                   post={post}
-                  onLikeToggle={loadPosts}
                 />
               ))}
 
-              {hasMore && (
+              {nextCursor && (
                 <div style={{ textAlign: 'center', marginTop: '20px' }}>
                   <button 
                     onClick={handleLoadMore}
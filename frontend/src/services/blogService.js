@@ -1,5 +1,44 @@
 import api from './api';
 
+const UPLOAD_RETRIES = 3;
+
+// Загрузка вложения по частям: при обрыве продолжаем с offset, который знает сервер
+const uploadAttachment = async (file) => {
+  const { data: upload } = await api.post('/blog/posts/uploads/', {
+    file_name: file.name,
+    content_type: file.type,
+    file_size: file.size,
+  });
+
+  let offset = upload.offset;
+  let retries = 0;
+  while (offset < file.size) {
+    const chunk = file.slice(offset, offset + upload.chunk_size);
+    try {
+      const { data } = await api.put(`/blog/posts/uploads/${upload.id}/`, chunk, {
+        headers: {
+          'Content-Type': 'application/offset+octet-stream',
+          'Upload-Offset': offset,
+        },
+      });
+      offset = data.offset;
+      retries = 0;
+    } catch (err) {
+      if (retries >= UPLOAD_RETRIES) throw err;
+      retries += 1;
+      const { data } = await api.get(`/blog/posts/uploads/${upload.id}/`);
+      offset = data.offset;
+    }
+  }
+  return upload.id;
+};
+
+const appendAttachmentUploads = async (formData, attachments) => {
+  for (const file of attachments) {
+    formData.append('attachment_uploads', await uploadAttachment(file));
+  }
+};
+
 export const blogService = {
 
   getPosts: async (page = 1) => {
@@ -8,6 +47,15 @@ export const blogService = {
   },
 
 
+  // Лента с курсорной пагинацией: cursor берётся из поля next предыдущего ответа
+  getFeed: async (cursor = null) => {
+    const response = await api.get('/blog/posts/feed/', {
+      params: cursor ? { cursor } : {},
+    });
+    return response.data;
+  },
+
+
   getPost: async (id) => {
     const response = await api.get(`/blog/posts/${id}/`);
     return response.data;
@@ -33,9 +81,7 @@ export const blogService = {
     
 
     if (data.attachments && data.attachments.length > 0) {
-      data.attachments.forEach((file) => {
-        formData.append('uploaded_attachments', file);
-      });
+      await appendAttachmentUploads(formData, data.attachments);
     }
     
     const response = await api.post('/blog/posts/create/', formData, {
@@ -63,9 +109,7 @@ export const blogService = {
     
 
     if (data.attachments && data.attachments.length > 0) {
-      data.attachments.forEach((file) => {
-        formData.append('uploaded_attachments', file);
-      });
+      await appendAttachmentUploads(formData, data.attachments);
     }
     
     const response = await api.put(`/blog/posts/${id}/update/`, formData, {
@@ -83,8 +127,11 @@ export const blogService = {
   },
 
 
-  getComments: async (postId) => {
-    const response = await api.get(`/blog/posts/${postId}/comments/`);
+  // Страница комментариев после курсора; первые комментарии приходят в getPost
+  getComments: async (postId, after = null) => {
+    const response = await api.get(`/blog/posts/${postId}/comments/`, {
+      params: after ? { after } : {},
+    });
     return response.data;
   },
 
@@ -111,8 +158,10 @@ export const blogService = {
   },
 
 
-  toggleLike: async (postId) => {
-    const response = await api.post(`/blog/posts/${postId}/like/`);
+  // Идемпотентно: повторный клик с тем же состоянием ничего не меняет
+  setLike: async (postId, liked) => {
+    const url = `/blog/posts/${postId}/likes/me/`;
+    const response = liked ? await api.put(url) : await api.delete(url);
     return response.data;
   },
 
@@ -130,4 +179,10 @@ export const blogService = {
     const response = await api.get(`/blog/search/?q=${encodeURIComponent(query)}`);
     return response.data;
   },
+
+  // Подсказки при наборе: [{ id, title }]
+  autocomplete: async (query) => {
+    const response = await api.get('/blog/search/autocomplete/', { params: { q: query } });
+    return response.data;
+  },
 };
\ No newline at end of file
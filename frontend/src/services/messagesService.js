@@ -1,5 +1,7 @@
 import api from './api';
 
+const LONG_POLL_TIMEOUT = 35000;
+
 export const messagesService = {
   getConversations: async () => {
     const response = await api.get('/messages/conversations/');
@@ -16,6 +18,23 @@ export const messagesService = {
     return Array.isArray(response.data) ? response.data : (response.data.results || []);
   },
 
+  // Сообщения новее sinceId, без пагинации
+  getNewMessages: async (conversationId, sinceId) => {
+    const response = await api.get(`/messages/conversations/${conversationId}/messages/`, {
+      params: { since_id: sinceId },
+    });
+    return Array.isArray(response.data) ? response.data : [];
+  },
+
+  // Long-poll: сервер держит запрос, пока не появятся новые сообщения (204 — ничего нового)
+  pollMessages: async (conversationId, sinceId) => {
+    const response = await api.get(`/messages/conversations/${conversationId}/messages/poll/`, {
+      params: { since_id: sinceId },
+      timeout: LONG_POLL_TIMEOUT,
+    });
+    return response.status === 204 ? [] : response.data;
+  },
+
   sendMessage: async (conversationId, content) => {
     const response = await api.post(`/messages/conversations/${conversationId}/messages/send/`, { content });
     return response.data;
@@ -33,6 +33,13 @@ export const notificationService = {
     return response.data;
   },
 
+  // Счётчики значка: уведомления, внутренние уведомления и сообщения.
+  // Сервер отдаёт ETag, браузер сам переспрашивает с If-None-Match и получает 304
+  getBadge: async () => {
+    const response = await api.get('/notifications/badge/');
+    return response.data;
+  },
+
   // === ADMIN ENDPOINTS ===
 
   // Получить все уведомления (админ)
@@ -0,0 +1,79 @@
+// WebSocket-подключение к /ws/: новые сообщения, прочтения и уведомления.
+// Токен отправляется первым сообщением, а не в URL, чтобы не попадать в журналы.
+// Если соединение недоступно, страницы продолжают работать через long-poll/опрос.
+const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/api';
+const WS_URL = import.meta.env.VITE_WS_URL || API_URL.replace(/^http/, 'ws').replace(/\/api\/?$/, '/ws/');
+const RECONNECT_DELAY = 5000;
+const PING_INTERVAL = 30000;
+
+const listeners = new Set();
+const openListeners = new Set();
+let socket = null;
+let reconnectTimer = null;
+let pingTimer = null;
+let ready = false;
+
+const connect = () => {
+  const token = localStorage.getItem('access_token');
+  if (!token || socket) return;
+
+  socket = new WebSocket(WS_URL);
+
+  socket.onopen = () => {
+    socket.send(JSON.stringify({ type: 'auth', token }));
+    pingTimer = setInterval(() => socket?.send(JSON.stringify({ type: 'ping' })), PING_INTERVAL);
+  };
+
+  socket.onmessage = (e) => {
+    let event;
+    try {
+      event = JSON.parse(e.data);
+    } catch {
+      return;
+    }
+    // Сервер подтвердил токен: с этого момента события доставляются
+    if (event.type === 'ready') {
+      ready = true;
+      openListeners.forEach((listener) => listener());
+      return;
+    }
+    listeners.forEach((listener) => listener(event));
+  };
+
+  socket.onclose = () => {
+    clearInterval(pingTimer);
+    socket = null;
+    ready = false;
+    if (listeners.size > 0) {
+      reconnectTimer = setTimeout(connect, RECONNECT_DELAY);
+    }
+  };
+};
+
+const disconnect = () => {
+  clearTimeout(reconnectTimer);
+  if (socket) {
+    socket.onclose = null;
+    socket.close();
+    socket = null;
+  }
+  ready = false;
+  clearInterval(pingTimer);
+};
+
+export const realtimeService = {
+  // Подписка на события; onOpen вызывается при каждом (пере)подключении,
+  // чтобы догрузить пропущенное. Возвращает функцию отписки.
+  subscribe: (listener, onOpen) => {
+    listeners.add(listener);
+    if (onOpen) openListeners.add(onOpen);
+    connect();
+    return () => {
+      listeners.delete(listener);
+      if (onOpen) openListeners.delete(onOpen);
+      if (listeners.size === 0) disconnect();
+    };
+  },
+
+  isConnected: () => ready && socket?.readyState === WebSocket.OPEN,
+};